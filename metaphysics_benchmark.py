@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+"""
+形而上学概念データベースのベンチマークスクリプト
+合成データを生成し、クエリの所要時間を規模ごとに計測する
+"""
+
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import importlib.util
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metaphysics_python import (CONCEPT_TABLES, INDEX_DEFINITIONS, RELATION_SUMMARY_TRIGGERS,
+                                MetaphysicsDB)
+
+SAMPLE_QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'metaphysics_sample_queries.sql')
+
+# 文化的背景の出現比率（西洋・仏教に偏った実データの分布を模す）
+CULTURE_WEIGHTS = {
+    'western': 30, 'buddhist': 15, 'western_modern': 12, 'daoist': 10, 'hindu': 8,
+    'western_ancient': 8, 'western_christian': 7, 'confucian': 4, 'islamic': 4, 'japanese': 2,
+}
+
+# 関係タイプの出現比率。創造系の関係は半数を神概念から張る
+RELATION_TYPE_WEIGHTS = {
+    'generates': 14, 'depends_on': 14, 'contains': 12, 'opposes': 10, 'transcends': 10,
+    'creates': 10, 'causes': 10, 'realizes': 8, 'is_empty_of': 6, 'sustains': 6,
+}
+CREATIVE_RELATION_TYPES = ('creates', 'generates', 'causes', 'sustains')
+
+# 分析クエリが値で分岐する列の語彙（それ以外の TEXT 列は「列名_番号」で埋める）
+COLUMN_VOCABULARY = {
+    'logical_necessity': ('necessary', 'contingent', 'impossible', None),
+    'temporal_stability': ('eternal', 'historical', 'contextual', 'fluid'),
+    'knowability': ('experiential_only', 'partially_knowable', 'knowable', 'unknowable'),
+    'contradiction_type': ('logical', 'ontological', 'epistemic', 'cultural'),
+    'objectivity': ('absolute', 'relative', 'illusory', 'intersubjective'),
+    'embodiment': ('embodied', 'disembodied', 'both'),
+}
+
+# 閉包表はハブの多いグラフでは行数が概念数の2乗近くまで増えるため、
+# --only で明示したときだけ計測する
+OPT_IN_BENCHMARKS = ('enable_closure_table', 'rebuild_closure_table')
+
+# 定義文に使う語（全文検索がそれらしく当たるように実データの語彙から選ぶ）
+DEFINITION_WORDS = (
+    '存在', '無', '空', '縁起', '実体', '現象', '意識', '時間', '空間', '永遠', '根本',
+    '原理', '創造', '否定', '超越', '内在', '真理', '理性', '霊魂', '自然', '道', '法',
+)
+
+# 書き換え前の analyze_paradoxes（OR結合版）。比較計測用に保持する
+LEGACY_PARADOX_SQL = """
+    SELECT
+        ec.name as existence_name,
+        ec.cultural_context as existence_culture,
+        nc.name as nothingness_name,
+        nc.cultural_context as nothingness_culture,
+        nc.paradox_level,
+        cr.relation_type,
+        cr.strength,
+        cr.logical_necessity
+    FROM concept_relations cr
+    JOIN existence_concepts ec ON (
+        (cr.source_table = 'existence_concepts' AND cr.source_id = ec.id) OR
+        (cr.target_table = 'existence_concepts' AND cr.target_id = ec.id)
+    )
+    JOIN nothingness_concepts nc ON (
+        (cr.source_table = 'nothingness_concepts' AND cr.source_id = nc.id) OR
+        (cr.target_table = 'nothingness_concepts' AND cr.target_id = nc.id)
+    )
+    WHERE nc.paradox_level >= 7
+    ORDER BY nc.paradox_level DESC, cr.strength DESC
+"""
+
+
+def populate_paradox_data(db: MetaphysicsDB, relation_count: int,
+                          concepts_per_table: int = 1000, seed: int = 42):
+    """存在概念・無概念と、その間の関係を relation_count 件生成"""
+    rng = random.Random(seed)
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO existence_concepts (id, name, cultural_context, abstraction_level)
+            VALUES (?, ?, ?, ?)
+        """, [(i, f'存在{i}', 'western', rng.randint(0, 10))
+              for i in range(1, concepts_per_table + 1)])
+        cursor.executemany("""
+            INSERT INTO nothingness_concepts (id, name, cultural_context, paradox_level)
+            VALUES (?, ?, ?, ?)
+        """, [(i, f'無{i}', 'buddhist', rng.randint(0, 10))
+              for i in range(1, concepts_per_table + 1)])
+
+        def relations():
+            for _ in range(relation_count):
+                a = ('existence_concepts', rng.randint(1, concepts_per_table))
+                b = ('nothingness_concepts', rng.randint(1, concepts_per_table))
+                if rng.random() < 0.5:
+                    a, b = b, a
+                yield a + b + ('generates', round(rng.random(), 3))
+
+        # 同じ概念の組を引き直した関係は自然キーが重複するため捨てる
+        cursor.executemany("""
+            INSERT OR IGNORE INTO concept_relations
+            (source_table, source_id, target_table, target_id, relation_type, strength)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, relations())
+        conn.commit()
+
+
+def time_legacy_paradox_query(db: MetaphysicsDB, timeout: float) -> Optional[float]:
+    """旧クエリの所要時間（秒）。timeout を超えたら中断して None を返す"""
+    with db.get_connection() as conn:
+        deadline = time.perf_counter() + timeout
+        conn.set_progress_handler(lambda: time.perf_counter() > deadline, 100000)
+        start = time.perf_counter()
+        try:
+            [dict(row) for row in conn.execute(LEGACY_PARADOX_SQL).fetchall()]
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.set_progress_handler(None, 0)
+        return time.perf_counter() - start
+
+
+def benchmark_paradoxes(sizes: List[int], timeout: float = 60.0) -> List[Dict]:
+    """analyze_paradoxes の新旧クエリを関係数ごとに比較"""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            db = MetaphysicsDB(os.path.join(workdir, 'bench.db'))
+            populate_paradox_data(db, size)
+
+            start = time.perf_counter()
+            rows = db.analyze_paradoxes()
+            current = time.perf_counter() - start
+            legacy = time_legacy_paradox_query(db, timeout)
+
+            # 索引追加前の状態（旧クエリ本来の計画）も計測する
+            with db.get_connection() as conn:
+                for index_name in INDEX_DEFINITIONS:
+                    conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+                conn.commit()
+            legacy_unindexed = time_legacy_paradox_query(db, timeout)
+
+        results.append({'relations': size, 'rows': len(rows), 'current_sec': current,
+                        'legacy_sec': legacy, 'legacy_unindexed_sec': legacy_unindexed})
+
+        def fmt(seconds):
+            return f"{seconds:.3f}s" if seconds is not None else f"> {timeout:.0f}s (中断)"
+        print(f"  {size:>9,} relations: 新 {fmt(current)} / 旧 {fmt(legacy)}"
+              f" / 旧・索引なし {fmt(legacy_unindexed)}")
+    return results
+
+
+def benchmark_similarity(sizes: List[int], queries: int = 50, top_k: int = 10,
+                         seed: int = 42, skew: float = 2.5) -> List[Dict]:
+    """similar_concepts の全件比較（exact=True）と LSH 索引による検索を関係数ごとに比較
+
+    索引検索の再現率は、全件比較の上位 top_k のうち索引検索でも返った割合の平均。
+    """
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir, \
+                contextlib.redirect_stdout(io.StringIO()):
+            db = MetaphysicsDB(os.path.join(workdir, 'bench.db'))
+            generate_synthetic_data(db, skew=skew, seed=seed, **scaled_counts(size))
+            start = time.perf_counter()
+            db.enable_similarity_index()
+            build = time.perf_counter() - start
+
+            with db.get_connection() as conn:
+                concepts = [tuple(row) for row in conn.execute(
+                    "SELECT concept_table, concept_id FROM concept_registry")]
+            sample = random.Random(seed).sample(concepts, min(queries, len(concepts)))
+            exact_latencies, indexed_latencies, recalls = [], [], []
+            for concept in sample:
+                start = time.perf_counter()
+                expected = db.similar_concepts(*concept, top_k=top_k, exact=True)
+                exact_latencies.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                found = db.similar_concepts(*concept, top_k=top_k)
+                indexed_latencies.append(time.perf_counter() - start)
+                expected_keys = {(r['concept_table'], r['concept_id']) for r in expected}
+                found_keys = {(r['concept_table'], r['concept_id']) for r in found}
+                recalls.append(len(expected_keys & found_keys) / max(len(expected_keys), 1))
+
+            # 1概念の追加から、その概念を基準に検索できるまで（差分更新を含む）
+            start = time.perf_counter()
+            concept_id = db.add_custom_concept('nothingness_concepts', name='計測用の空',
+                                               cultural_context='buddhist',
+                                               definition='縁起によって現れる空の概念')
+            db.similar_concepts('nothingness_concepts', concept_id, top_k=top_k)
+            incremental = time.perf_counter() - start
+            db.close()
+
+        entry = {'relations': size, 'concepts': len(concepts), 'build_sec': build,
+                 'exact': latency_summary(exact_latencies),
+                 'indexed': latency_summary(indexed_latencies),
+                 'recall': sum(recalls) / len(recalls), 'incremental_sec': incremental}
+        results.append(entry)
+        print(f"  {size:>9,} relations ({len(concepts):,} 概念): 構築 {build:.2f}s"
+              f" / 全件 p50 {entry['exact']['p50'] * 1000:.1f} ms"
+              f" / 索引 p50 {entry['indexed']['p50'] * 1000:.1f} ms"
+              f" / 再現率@{top_k} {entry['recall']:.2f}"
+              f" / 追加→検索 {incremental * 1000:.1f} ms")
+    return results
+
+
+def _weighted_chooser(rng: random.Random, weights: Dict[Any, int]) -> Callable[[], Any]:
+    """重み付き辞書から値を1つ選ぶ関数を作成"""
+    values, cumulative = list(weights), list(itertools.accumulate(weights.values()))
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+def scaled_counts(size: int) -> Dict[str, int]:
+    """関係数 size に対する各テーブルの行数（概念はテーブルごと）"""
+    return {'concepts': max(size // 20, 10), 'relations': size,
+            'contradictions': max(size // 10, 1), 'interpretations': max(size // 10, 1)}
+
+
+def generate_synthetic_data(db: MetaphysicsDB, concepts: int = 1000, relations: int = 10000,
+                            contradictions: int = 1000, interpretations: int = 1000,
+                            skew: float = 2.5, seed: int = 42,
+                            batch_size: int = 10000) -> Dict[str, float]:
+    """全テーブルに偏りのある合成データを生成
+
+    concepts は概念テーブルごとの行数。関係・矛盾・解釈の参照先は
+    id = 1 + floor(n * u ** skew)（u は一様乱数）で選ぶため、id の小さい概念ほど
+    多くの関係を持つハブになる（skew=1 で一様）。
+    行は生成しながら executemany で挿入し、関係の索引と集計表は挿入後に作り直す。
+    戻り値はテーブル群ごとの挿入速度（行/秒）。
+    """
+    rng = random.Random(seed)
+    culture = _weighted_chooser(rng, CULTURE_WEIGHTS)
+    relation_type = _weighted_chooser(rng, RELATION_TYPE_WEIGHTS)
+    epoch = datetime.datetime(2000, 1, 1)
+
+    def created_at() -> str:
+        return (epoch + datetime.timedelta(seconds=rng.randrange(25 * 365 * 86400))).isoformat(' ')
+
+    def text_value(column: str) -> Optional[str]:
+        if column in COLUMN_VOCABULARY:
+            return rng.choice(COLUMN_VOCABULARY[column])
+        return f"{column}_{int(5 * rng.random() ** skew)}"
+
+    def column_value(column: str, declared_type: str):
+        if column == 'cultural_context':
+            return culture()
+        if column == 'definition':
+            return 'の'.join(rng.sample(DEFINITION_WORDS, 3)) + 'に関する概念'
+        if column == 'created_at':
+            return created_at()
+        if declared_type == 'INTEGER':
+            return rng.randint(0, 10)
+        if declared_type == 'BOOLEAN':
+            return rng.random() < 0.5
+        return text_value(column)
+
+    totals: Dict[str, List[float]] = {}
+    with db.get_connection() as conn:
+        def insert(label: str, table: str, columns: List[str], rows, conflict: str = ''):
+            start = time.perf_counter()
+            statement = (f"INSERT {conflict} INTO {table} ({', '.join(columns)}) "
+                         f"VALUES ({', '.join('?' * len(columns))})")
+            batch, inserted = [], 0
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    conn.executemany(statement, batch)
+                    inserted += len(batch)
+                    batch.clear()
+            if batch:
+                conn.executemany(statement, batch)
+                inserted += len(batch)
+            # 時間には行の生成とトリガーによる概念台帳・検索索引への書き込みも含まれる
+            total = totals.setdefault(label, [0, 0.0])
+            total[0] += inserted
+            total[1] += time.perf_counter() - start
+
+        sizes = {}
+        for table in CONCEPT_TABLES:
+            schema = [(row[1], row[2].upper()) for row in conn.execute(f"PRAGMA table_info({table})")
+                      if row[1] not in ('id', 'name')]
+            prefix = table[:-len('_concepts')]
+            start_id = (conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0] or 0) + 1
+            insert('concepts', table, ['name'] + [column for column, _ in schema],
+                   ([f"{prefix}{i}"] + [column_value(column, declared_type)
+                                        for column, declared_type in schema]
+                    for i in range(start_id, start_id + concepts)))
+            sizes[table] = start_id + concepts - 1
+
+        def endpoint(table: Optional[str] = None) -> Tuple[str, int]:
+            table = table or rng.choice(CONCEPT_TABLES)
+            return table, 1 + int(sizes[table] * rng.random() ** skew)
+
+        def relation_rows():
+            for _ in range(relations):
+                kind = relation_type()
+                source = endpoint('divine_concepts' if kind in CREATIVE_RELATION_TYPES
+                                  and rng.random() < 0.5 else None)
+                target = endpoint()
+                if target == source:
+                    target = endpoint()
+                yield source + target + (kind, round(rng.betavariate(2, 2), 3), culture(),
+                                         text_value('logical_necessity'),
+                                         text_value('temporal_stability'), created_at())
+
+        # 索引と集計表は挿入後にまとめて作る方が速い
+        relation_indexes = {name: definition for name, definition in INDEX_DEFINITIONS.items()
+                            if definition.startswith('concept_relations ')}
+        for index_name in relation_indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        for trigger_name in RELATION_SUMMARY_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+        # ハブ同士の関係は自然キー（両端と種類）が重複しやすいため、重複分は捨てる
+        insert('relations', 'concept_relations',
+               ['source_table', 'source_id', 'target_table', 'target_id', 'relation_type',
+                'strength', 'cultural_specificity', 'logical_necessity',
+                'temporal_stability', 'created_at'], relation_rows(), conflict='OR IGNORE')
+        for index_name, definition in relation_indexes.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {definition}")
+        for sql in RELATION_SUMMARY_TRIGGERS.values():
+            conn.execute(sql)
+        db._fill_relation_summaries(conn)
+
+        insert('contradictions', 'contradictions',
+               ['concept1_table', 'concept1_id', 'concept2_table', 'concept2_id',
+                'contradiction_type', 'unresolved', 'philosopher_comments'],
+               (endpoint() + endpoint() + (text_value('contradiction_type'),
+                                           rng.random() < 0.7, None)
+                for _ in range(contradictions)))
+        insert('interpretations', 'cultural_interpretations',
+               ['base_concept_table', 'base_concept_id', 'culture', 'interpretation'],
+               (endpoint() + (culture(), 'の'.join(rng.sample(DEFINITION_WORDS, 4)) + 'として解釈')
+                for _ in range(interpretations)))
+        conn.commit()
+        conn.execute("ANALYZE")
+    return {label: rows / max(seconds, 1e-9) for label, (rows, seconds) in totals.items()}
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """所要時間（秒）のリストからパーセンタイルと1秒あたりの実行回数を計算"""
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        # 最近傍順位法
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    total = sum(ordered)
+    return {'count': len(ordered), 'min': ordered[0], 'p50': percentile(50),
+            'p90': percentile(90), 'p95': percentile(95), 'p99': percentile(99),
+            'max': ordered[-1], 'mean': total / len(ordered),
+            'throughput_per_sec': len(ordered) / total if total else float('inf')}
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, warmup: int = 1,
+            setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """func を計測。最初のウォームアップ実行は tracemalloc 下で行いピークメモリを記録する
+
+    setup は各実行の前に呼ばれ、計測時間には含まれない。
+    warmup=0 なら Python 側のピークメモリは記録しない。
+    """
+    latencies, peak, result = [], None, None
+    for i in range(warmup + repeat):
+        if setup:
+            setup()
+        if i == 0 and warmup:
+            tracemalloc.start()
+            try:
+                result = func()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        elif i < warmup:
+            result = func()
+        else:
+            start = time.perf_counter()
+            result = func()
+            latencies.append(time.perf_counter() - start)
+    if isinstance(result, int):
+        rows = result
+    else:
+        try:
+            rows = len(result)
+        except TypeError:
+            rows = None
+    return {'latency': latency_summary(latencies), 'peak_python_bytes': peak, 'rows': rows}
+
+
+def split_sql_statements(text: str) -> List[Tuple[str, str]]:
+    """SQLファイルを sqlite3.complete_statement で文ごとに分割し (ラベル, SQL) のリストを返す
+
+    ラベルは文の直前にある「-- 1-1.」形式の見出し、なければ通し番号。
+    """
+    statements, buffer, label, in_body = [], [], None, False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('--') and not in_body:
+            # 文の本体より前のコメントは見出しとしてのみ扱う
+            heading = re.match(r'--\s*(\d+-\d+)\.', stripped)
+            if heading:
+                label = heading.group(1)
+            elif '【ボーナス】' in stripped:
+                label = 'bonus'
+            continue
+        if not stripped and not in_body:
+            continue
+        in_body = True
+        buffer.append(line)
+        candidate = '\n'.join(buffer)
+        if sqlite3.complete_statement(candidate):
+            statements.append((label or str(len(statements) + 1), candidate.strip()))
+            buffer, label, in_body = [], None, False
+    return statements
+
+
+def method_benchmarks(db: MetaphysicsDB, workdir: str) -> List[Tuple[str, Callable, Optional[Callable], int]]:
+    """(名前, 関数, setup, 実行回数の上限) のリスト。読み取りを先に、書き込みを最後に並べる"""
+    hub = ('divine_concepts', 1)
+    other = ('existence_concepts', 1)
+    export_dir = os.path.join(workdir, 'export')
+    import_count = [0]
+
+    def fresh_import_target():
+        import_count[0] += 1
+        return MetaphysicsDB(os.path.join(workdir, f'import{import_count[0]}.db'))
+
+    def bulk_import():
+        target = fresh_import_target()
+        return target.bulk_import(export_dir)
+
+    def custom_rows():
+        return [{'name': f'bench{i}', 'cultural_context': 'western', 'definition': '計測用'}
+                for i in range(1000)]
+
+    def snapshot_to_memory():
+        target = sqlite3.connect(':memory:')
+        try:
+            return db.snapshot(target)
+        finally:
+            target.close()
+
+    def reverse_relations():
+        # 既存の関係100件を逆向きに足し、次の増分の矛盾検出で検査させる
+        with db.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO concept_relations
+                    (source_table, source_id, target_table, target_id, relation_type, logical_necessity)
+                SELECT target_table, target_id, source_table, source_id, relation_type, 'impossible'
+                FROM concept_relations ORDER BY random() LIMIT 100
+                ON CONFLICT (source_table, source_id, target_table, target_id, relation_type)
+                DO UPDATE SET logical_necessity = excluded.logical_necessity
+            """)
+            conn.commit()
+
+    # 列指向スナップショットは NumPy がある環境でだけ計測する
+    snapshot_benchmarks = [
+        ('concept_snapshot', db.concept_snapshot, db._invalidate_caches, 0),
+        ('concept_snapshot.group_by',
+         lambda: db.concept_snapshot().group_by('existence_concepts', 'abstraction_level'), None, 0),
+        ('concept_snapshot.compare_cultures',
+         lambda: db.concept_snapshot().compare_cultures('existence_concepts', 'abstraction_level'),
+         None, 0),
+        ('concept_snapshot.correlation',
+         lambda: db.concept_snapshot().correlation('divine_concepts'), None, 0),
+        ('load_concept_snapshot',
+         lambda: db.load_concept_snapshot(os.path.join(workdir, 'snapshot.npz')),
+         lambda: db.save_concept_snapshot(os.path.join(workdir, 'snapshot.npz')), 0),
+    ] if importlib.util.find_spec('numpy') else []
+
+    return [
+        ('setup_database', db.setup_database, None, 0),
+        ('query_cross_cultural_concepts', db.query_cross_cultural_concepts, None, 0),
+        ('find_god_independent_concepts', db.find_god_independent_concepts, None, 0),
+        ('find_god_independent_concepts[parallel]',
+         lambda: db.find_god_independent_concepts(parallel=True), None, 0),
+        ('analyze_paradoxes', db.analyze_paradoxes, None, 0),
+        ('analyze_paradoxes[limit=100]', lambda: db.analyze_paradoxes(limit=100), None, 0),
+        ('iter_paradoxes', lambda: _drain(db.iter_paradoxes()), None, 0),
+        ('iter_cross_cultural_concepts', lambda: _drain(db.iter_cross_cultural_concepts()), None, 0),
+        ('iter_relations[tuple]', lambda: _drain(db.iter_relations(row_type='tuple')), None, 0),
+        ('iter_relations[page]',
+         lambda: _drain(db.iter_relations(after=(0.5, 2 ** 62), limit=50)), None, 0),
+        ('concept_network_analysis', db.concept_network_analysis, None, 0),
+        *snapshot_benchmarks,
+        ('build_concept_graph', db.build_concept_graph, db._invalidate_caches, 0),
+        ('concept_pagerank', db.concept_pagerank, None, 0),
+        ('concept_centrality[degree]', lambda: db.concept_centrality('degree'), None, 0),
+        ('concept_centrality[eigenvector]', lambda: db.concept_centrality('eigenvector'), None, 0),
+        ('concept_centrality[betweenness]',
+         lambda: db.concept_centrality('betweenness', sample_size=16), None, 0),
+        ('concept_shortest_path', lambda: db.concept_shortest_path(*hub, *other), None, 0),
+        ('concept_descendants', lambda: db.concept_descendants(*hub, max_depth=3), None, 0),
+        ('concept_descendants[graph]',
+         lambda: db.concept_descendants(*hub, max_depth=3, use_graph=True), None, 0),
+        ('concept_ancestors', lambda: db.concept_ancestors(*other, max_depth=3), None, 0),
+        ('concept_paths', lambda: db.concept_paths(*hub, *other, max_depth=3), None, 0),
+        ('search', lambda: db.search('存在の根本'), None, 0),
+        ('search[short]', lambda: db.search('無'), None, 0),
+        ('explain_builtin_queries', db.explain_builtin_queries, None, 0),
+        ('check_query_plans', db.check_query_plans, None, 0),
+        ('cache_stats', db.cache_stats, None, 0),
+        ('snapshot[memory]', snapshot_to_memory, None, 0),
+        ('export_to_json[ndjson]',
+         lambda: db.export_to_json(os.path.join(workdir, 'export.ndjson'), format='ndjson'), None, 1),
+        ('export_to_json[split]',
+         lambda: db.export_to_json(export_dir, format='ndjson', split=True), None, 1),
+        ('bulk_import', bulk_import, None, 1),
+        ('insert_sample_data', db.insert_sample_data, None, 0),
+        ('add_custom_concept',
+         lambda: db.add_custom_concept('dao_concepts', name='計測', cultural_context='daoist'),
+         None, 0),
+        ('add_custom_concepts[1000]',
+         lambda: db.add_custom_concepts('dao_concepts', custom_rows()), None, 0),
+        # 矛盾検出は初回に差分記録用のトリガーと索引を作るため書き込みの後に置く
+        ('detect_contradictions[full]', lambda: db.detect_contradictions(full=True), None, 1),
+        ('detect_contradictions[incremental]', db.detect_contradictions, reverse_relations, 0),
+        # 閉包表を有効にすると以降の書き込みでトリガーが動くため最後に置く
+        ('enable_closure_table', db.enable_closure_table, None, 1),
+        ('rebuild_closure_table', db.rebuild_closure_table, None, 1),
+    ]
+
+
+def run_suite(sizes: List[int], repeat: int = 5, warmup: int = 1, seed: int = 42,
+              skew: float = 2.5, only: Optional[List[str]] = None,
+              skip: Optional[List[str]] = None) -> Dict[str, Any]:
+    """規模ごとに合成データを生成し、全公開メソッドとサンプルSQLを計測"""
+    def selected(name: str) -> bool:
+        if only:
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in only):
+                return False
+        elif name in OPT_IN_BENCHMARKS:
+            return False
+        return not (skip and any(fnmatch.fnmatch(name, pattern) for pattern in skip))
+
+    with open(SAMPLE_QUERIES_PATH, encoding='utf-8') as f:
+        sample_queries = split_sql_statements(f.read())
+
+    report = {
+        'meta': {
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'sizes': sizes, 'repeat': repeat, 'warmup': warmup, 'seed': seed, 'skew': skew,
+        },
+        'generation': {},
+        'results': [],
+    }
+    for size in sizes:
+        counts = scaled_counts(size)
+        print(f"🔄 {size:,} relations: 合成データを生成中 {counts}")
+        with tempfile.TemporaryDirectory() as workdir, \
+                contextlib.redirect_stdout(io.StringIO()):
+            db = MetaphysicsDB(os.path.join(workdir, 'bench.db'))
+            start = time.perf_counter()
+            rates = generate_synthetic_data(db, skew=skew, seed=seed, **counts)
+            report['generation'][str(size)] = {
+                'counts': counts, 'seconds': time.perf_counter() - start,
+                'rows_per_sec': rates, 'db_bytes': os.path.getsize(db.db_path),
+            }
+
+            benchmarks = [('sql:' + label, (lambda sql=sql: _run_sql(db, sql)), None, 0)
+                          for label, sql in sample_queries]
+            benchmarks += method_benchmarks(db, workdir)
+            for name, func, setup, limit in benchmarks:
+                if not selected(name):
+                    continue
+                runs = min(repeat, limit) if limit else repeat
+                entry = measure(func, runs, warmup if not limit else 0, setup)
+                entry.update({'size': size, 'name': name})
+                report['results'].append(entry)
+                print(f"  {name:<45} p50 {entry['latency']['p50'] * 1000:10.2f} ms"
+                      f"  p95 {entry['latency']['p95'] * 1000:10.2f} ms", file=sys.__stdout__)
+            db.close()
+    report['max_rss_kb'] = _max_rss_kb()
+    return report
+
+
+def _drain(rows) -> int:
+    """ジェネレーターを最後まで読み、行を保持せずに件数だけ返す"""
+    return sum(1 for _ in rows)
+
+
+def _run_sql(db: MetaphysicsDB, sql: str) -> List[sqlite3.Row]:
+    with db.get_connection() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def _max_rss_kb() -> Optional[int]:
+    """プロセスの最大常駐メモリ（KB）。resource モジュールのない環境では None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト単位で返す
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 0.2, metric: str = 'p50') -> List[Dict[str, Any]]:
+    """2回分の計測結果を (規模, 名前) ごとに比較し、threshold を超えて遅くなった項目に印を付ける"""
+    previous = {(entry['size'], entry['name']): entry for entry in baseline['results']}
+    rows = []
+    for entry in current['results']:
+        before = previous.get((entry['size'], entry['name']))
+        if before is None:
+            continue
+        old, new = before['latency'][metric], entry['latency'][metric]
+        ratio = new / old if old else float('inf')
+        rows.append({'size': entry['size'], 'name': entry['name'], 'baseline': old,
+                     'current': new, 'ratio': ratio, 'regression': ratio > 1 + threshold})
+    return rows
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description="形而上学データベースのベンチマーク")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    paradox = subparsers.add_parser('paradox', help="analyze_paradoxes の新旧比較")
+    paradox.add_argument('--sizes', type=int, nargs='+',
+                         default=[10_000, 100_000, 1_000_000])
+    paradox.add_argument('--timeout', type=float, default=60.0,
+                         help="旧クエリ1回あたりの打ち切り秒数")
+
+    similarity = subparsers.add_parser('similarity', help="類似概念検索の全件比較と索引検索の比較")
+    similarity.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    similarity.add_argument('--queries', type=int, default=50, help="規模ごとの検索回数")
+    similarity.add_argument('--top-k', type=int, default=10)
+    similarity.add_argument('--seed', type=int, default=42)
+    similarity.add_argument('--skew', type=float, default=2.5)
+
+    suite = subparsers.add_parser('suite', help="全公開メソッドとサンプルSQLの計測")
+    suite.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000],
+                       help="関係数（1k〜10M）。概念・矛盾・解釈の行数はこれに比例する")
+    suite.add_argument('--repeat', type=int, default=5)
+    suite.add_argument('--warmup', type=int, default=1)
+    suite.add_argument('--seed', type=int, default=42)
+    suite.add_argument('--skew', type=float, default=2.5, help="ハブ概念への偏り（1で一様）")
+    suite.add_argument('--only', nargs='+',
+                       help="計測する項目名のパターン（fnmatch）。閉包表の項目はここで指定した場合のみ計測")
+    suite.add_argument('--skip', nargs='+', help="除外する項目名のパターン（fnmatch）")
+    suite.add_argument('--output', default='benchmark_results.json')
+
+    generate = subparsers.add_parser('generate', help="合成データを生成したDBファイルを作成")
+    generate.add_argument('path')
+    generate.add_argument('--size', type=int, default=100_000, help="関係数")
+    generate.add_argument('--seed', type=int, default=42)
+    generate.add_argument('--skew', type=float, default=2.5)
+
+    compare = subparsers.add_parser('compare', help="2回分の suite 結果を比較")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.2,
+                         help="この比率を超えて遅くなった項目を退行とみなす")
+    compare.add_argument('--metric', default='p50', choices=['p50', 'p90', 'p95', 'p99', 'mean'])
+
+    args = parser.parse_args()
+    if args.command == 'paradox':
+        print("🔄 analyze_paradoxes ベンチマーク")
+        benchmark_paradoxes(args.sizes, args.timeout)
+    elif args.command == 'similarity':
+        print("🔄 類似概念検索ベンチマーク")
+        benchmark_similarity(args.sizes, args.queries, args.top_k, args.seed, args.skew)
+    elif args.command == 'suite':
+        report = run_suite(args.sizes, args.repeat, args.warmup, args.seed, args.skew,
+                           args.only, args.skip)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 計測結果を {args.output} に保存しました")
+    elif args.command == 'generate':
+        db = MetaphysicsDB(args.path)
+        rates = generate_synthetic_data(db, skew=args.skew, seed=args.seed,
+                                        **scaled_counts(args.size))
+        db.close()
+        print(f"✅ 合成データを {args.path} に生成しました（行/秒: "
+              + ", ".join(f"{label} {rate:,.0f}" for label, rate in rates.items()) + "）")
+    elif args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        rows = compare_results(baseline, current, args.threshold, args.metric)
+        for row in rows:
+            mark = '⚠️ ' if row['regression'] else '  '
+            print(f"{mark}{row['size']:>10,} {row['name']:<45} "
+                  f"{row['baseline'] * 1000:10.2f} ms → {row['current'] * 1000:10.2f} ms"
+                  f" (x{row['ratio']:.2f})")
+        regressions = sum(row['regression'] for row in rows)
+        print(f"{'❌' if regressions else '✅'} 退行 {regressions} 件 / 比較 {len(rows)} 件")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,729 @@
 SQLiteを使用して複雑な哲学概念とその関係性を管理する
 """
 
+# CLI やワーカープロセスの起動を速くするため、一部の処理でしか使わないモジュール
+# （json・random・tempfile・shutil・logging・asyncio・concurrent.futures・圧縮形式など）は
+# 使う関数の中で import する（copy・inspect・re は dataclasses が読み込むため起動時に載る）
 import sqlite3
-import json
-import datetime
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+import functools
+import heapq
+import itertools
+import math
+import operator
+import os
+import queue
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
+from dataclasses import astuple, dataclass, fields
 from contextlib import contextmanager
 
+# PRAGMA user_version に記録するスキーマの版。setup_database のDDLを変えたら上げる
+# （記録された版が一致すれば起動時に setup_database を実行しない）
+SCHEMA_VERSION = 3
+
+# プールモードで接続確立時に適用するPRAGMA
+# WALにより読み取りは書き込み中でもブロックされない
+DEFAULT_POOL_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',      # WALではNORMALでもコミット単位の整合性は保たれる
+    'mmap_size': 268435456,       # 256MB
+    'cache_size': -65536,         # 負値はKiB単位（64MB）
+    'busy_timeout': 5000,         # ミリ秒
+    'temp_store': 'MEMORY',
+}
+
+# 10種の概念テーブル（concept_relations 等の *_table 列が参照する値）
+CONCEPT_TABLES = (
+    'existence_concepts', 'nothingness_concepts', 'time_concepts',
+    'space_concepts', 'consciousness_concepts', 'substance_concepts',
+    'universal_concepts', 'divine_concepts', 'good_concepts',
+    'dao_concepts',
+)
+
+# エクスポート対象の全データテーブル
+DATA_TABLES = CONCEPT_TABLES + (
+    'concept_relations', 'contradictions', 'cultural_interpretations',
+)
+
+# 圧縮形式ごとのファイル拡張子（いずれも標準ライブラリで読み書きできる）
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+
+# 多態キー (table, id) で概念を参照するテーブルの索引
+# setup_database で IF NOT EXISTS 付きで作成されるため既存DBにも追加される
+INDEX_DEFINITIONS = {
+    'idx_concept_relations_source':
+        "concept_relations (source_table, source_id)",
+    'idx_concept_relations_target':
+        "concept_relations (target_table, target_id)",
+    'idx_concept_relations_type':
+        "concept_relations (source_table, relation_type, target_table, target_id)",
+    'idx_concept_relations_strength':
+        "concept_relations (strength)",
+    'idx_concept_relations_culture':
+        "concept_relations (cultural_specificity, strength)",
+    'idx_contradictions_concept1':
+        "contradictions (concept1_table, concept1_id)",
+    'idx_contradictions_concept2':
+        "contradictions (concept2_table, concept2_id)",
+    'idx_cultural_interpretations_base':
+        "cultural_interpretations (base_concept_table, base_concept_id)",
+}
+
+# 重複を許さない自然キー（setup_database で一意索引 idx_<table>_natural_key を作り、
+# insert_sample_data・add_custom_concepts はこのキーで ON CONFLICT DO UPDATE する）
+NATURAL_KEYS = {
+    **{table: ('name', 'cultural_context') for table in CONCEPT_TABLES},
+    'concept_relations': ('source_table', 'source_id', 'target_table', 'target_id', 'relation_type'),
+}
+
+# 一意索引と ON CONFLICT の対象に使う式
+# cultural_context が NULL の概念どうしも同じキーとみなすため IFNULL で揃える
+NATURAL_KEY_TARGETS = {
+    table: ', '.join(f"IFNULL({column}, '')" if column == 'cultural_context' else column
+                     for column in columns)
+    for table, columns in NATURAL_KEYS.items()
+}
+
+# 到達探索で使う関係の重み（ConceptGraph と同じく NULL は既定値 0.5、負の値は 0 とみなす）
+# 再帰CTE・メモリ上のグラフ・閉包テーブルで同じ辺がたどられるようにする
+RELATION_WEIGHT_SQL = "MAX(COALESCE(cr.strength, 0.5), 0.0)"
+
+# 推移閉包テーブル（enable_closure_table で作成）
+# 挿入トリガーは「新しい辺の始点の祖先 × 終点の子孫」の組を最短の深さで追加する
+CLOSURE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS concept_closure (
+    ancestor_table TEXT NOT NULL,
+    ancestor_id INTEGER NOT NULL,
+    descendant_table TEXT NOT NULL,
+    descendant_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_table, ancestor_id, descendant_table, descendant_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_concept_closure_descendant
+    ON concept_closure (descendant_table, descendant_id, depth);
+
+CREATE TABLE IF NOT EXISTS concept_closure_state (stale INTEGER NOT NULL);
+INSERT INTO concept_closure_state (stale)
+    SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM concept_closure_state);
+
+CREATE TRIGGER IF NOT EXISTS trg_concept_closure_insert
+AFTER INSERT ON concept_relations
+BEGIN
+    INSERT INTO concept_closure
+        (ancestor_table, ancestor_id, descendant_table, descendant_id, depth)
+    SELECT a.concept_table, a.concept_id, d.concept_table, d.concept_id,
+           a.depth + 1 + d.depth
+    FROM (
+        SELECT ancestor_table AS concept_table, ancestor_id AS concept_id, depth
+        FROM concept_closure
+        WHERE descendant_table = NEW.source_table AND descendant_id = NEW.source_id
+        UNION ALL
+        SELECT NEW.source_table, NEW.source_id, 0
+    ) a, (
+        SELECT descendant_table AS concept_table, descendant_id AS concept_id, depth
+        FROM concept_closure
+        WHERE ancestor_table = NEW.target_table AND ancestor_id = NEW.target_id
+        UNION ALL
+        SELECT NEW.target_table, NEW.target_id, 0
+    ) d
+    WHERE true
+    ON CONFLICT (ancestor_table, ancestor_id, descendant_table, descendant_id)
+    DO UPDATE SET depth = MIN(depth, excluded.depth);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_concept_closure_delete
+AFTER DELETE ON concept_relations
+BEGIN
+    UPDATE concept_closure_state SET stale = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_concept_closure_update
+AFTER UPDATE OF source_table, source_id, target_table, target_id ON concept_relations
+BEGIN
+    UPDATE concept_closure_state SET stale = 1;
+END;
+"""
+
+# concept_relations の集計表（トリガーで増分更新し、concept_network_analysis 等が読む）
+# 強度の平均は AVG() と同じく NULL を除いて求めるため、合計と件数を別に持つ
+RELATION_SUMMARY_SQL = """
+CREATE TABLE IF NOT EXISTS relation_table_stats (
+    source_table TEXT PRIMARY KEY,
+    connection_count INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS concept_degree (
+    concept_table TEXT NOT NULL,
+    concept_id INTEGER NOT NULL,
+    out_degree INTEGER NOT NULL DEFAULT 0,
+    out_strength_count INTEGER NOT NULL DEFAULT 0,
+    out_strength_sum REAL NOT NULL DEFAULT 0,
+    in_degree INTEGER NOT NULL DEFAULT 0,
+    in_strength_count INTEGER NOT NULL DEFAULT 0,
+    in_strength_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (concept_table, concept_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS relation_culture_stats (
+    cultural_specificity TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    strength_count INTEGER NOT NULL,
+    strength_sum REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _relation_summary_statements(row: str, sign: str) -> str:
+    """row（NEW / OLD）の関係1件分を集計表に加える（sign='-' なら差し引く）"""
+    strength = f"COALESCE({row}.strength, 0.0)"
+    has_strength = f"({row}.strength IS NOT NULL)"
+    statements = [f"""
+        INSERT INTO relation_table_stats (source_table, connection_count)
+        VALUES ({row}.source_table, {sign}1)
+        ON CONFLICT (source_table) DO UPDATE
+        SET connection_count = connection_count + excluded.connection_count;
+        
+        INSERT INTO relation_culture_stats
+        (cultural_specificity, count, strength_count, strength_sum)
+        SELECT {row}.cultural_specificity, {sign}1, {sign}{has_strength}, {sign}{strength}
+        WHERE {row}.cultural_specificity IS NOT NULL
+        ON CONFLICT (cultural_specificity) DO UPDATE
+        SET count = count + excluded.count,
+            strength_count = strength_count + excluded.strength_count,
+            strength_sum = strength_sum + excluded.strength_sum;
+    """]
+    for side, direction in (('source', 'out'), ('target', 'in')):
+        statements.append(f"""
+            INSERT INTO concept_degree
+            (concept_table, concept_id, {direction}_degree,
+             {direction}_strength_count, {direction}_strength_sum)
+            VALUES ({row}.{side}_table, {row}.{side}_id, {sign}1,
+                    {sign}{has_strength}, {sign}{strength})
+            ON CONFLICT (concept_table, concept_id) DO UPDATE
+            SET {direction}_degree = {direction}_degree + excluded.{direction}_degree,
+                {direction}_strength_count =
+                    {direction}_strength_count + excluded.{direction}_strength_count,
+                {direction}_strength_sum =
+                    {direction}_strength_sum + excluded.{direction}_strength_sum;
+        """)
+    if sign == '-':
+        # 件数が0になった行は消す（浮動小数の合計に残る誤差もここで捨てられる）
+        statements.append(f"""
+            DELETE FROM relation_table_stats
+            WHERE source_table = {row}.source_table AND connection_count = 0;
+            DELETE FROM relation_culture_stats
+            WHERE cultural_specificity = {row}.cultural_specificity AND count = 0;
+            DELETE FROM concept_degree
+            WHERE out_degree = 0 AND in_degree = 0 AND (
+                (concept_table = {row}.source_table AND concept_id = {row}.source_id) OR
+                (concept_table = {row}.target_table AND concept_id = {row}.target_id));
+        """)
+    return ''.join(statements)
+
+
+# concept_relations の変更を集計表へ反映するトリガー（一括取り込み時は外して最後に集計し直す）
+RELATION_SUMMARY_TRIGGERS = {
+    'trg_relation_summary_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_relation_summary_insert
+        AFTER INSERT ON concept_relations
+        BEGIN
+            {_relation_summary_statements('NEW', '')}
+        END
+    """,
+    'trg_relation_summary_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_relation_summary_delete
+        AFTER DELETE ON concept_relations
+        BEGIN
+            {_relation_summary_statements('OLD', '-')}
+        END
+    """,
+    'trg_relation_summary_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_relation_summary_update
+        AFTER UPDATE OF source_table, source_id, target_table, target_id,
+                        strength, cultural_specificity ON concept_relations
+        BEGIN
+            {_relation_summary_statements('OLD', '-')}
+            {_relation_summary_statements('NEW', '')}
+        END
+    """,
+}
+
+# 概念の大域キー = (テーブル番号 << CONCEPT_KEY_SHIFT) + 元の id
+# concept_registry の主キーと concept_search の rowid で共通に使い、(table, id) から計算だけで引ける
+CONCEPT_KEY_SHIFT = 40
+
+# 概念台帳：(table, id) の名前解決を1回の索引検索にする
+CONCEPT_REGISTRY_SQL = """
+CREATE TABLE IF NOT EXISTS concept_registry (
+    concept_key INTEGER PRIMARY KEY,
+    concept_table TEXT NOT NULL,
+    concept_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    cultural_context TEXT,
+    UNIQUE (concept_table, concept_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_concept_registry_name
+    ON concept_registry (name, cultural_context);
+"""
+
+# (table列, id列, エクスポート時の名前列) — 概念を多態キーで参照する列の組
+REFERENCE_COLUMNS = {
+    'concept_relations': (
+        ('source_table', 'source_id', 'source_name'),
+        ('target_table', 'target_id', 'target_name'),
+    ),
+    'contradictions': (
+        ('concept1_table', 'concept1_id', 'concept1_name'),
+        ('concept2_table', 'concept2_id', 'concept2_name'),
+    ),
+    'cultural_interpretations': (
+        ('base_concept_table', 'base_concept_id', 'base_concept_name'),
+    ),
+}
+
+# 全文検索索引 concept_search の対象テーブル（番号は CONCEPT_TABLES と共通）
+SEARCH_SOURCE_TABLES = CONCEPT_TABLES + ('cultural_interpretations',)
+
+# 索引の (name, definition, cultural_context) 列に入れる元の列（None は概念テーブル共通）
+SEARCH_COLUMNS = {
+    None: ('name', 'definition', 'cultural_context'),
+    'cultural_interpretations': ('NULL', 'interpretation', 'culture'),
+}
+
+# trigram 索引で引けない3文字未満の語を BM25 で順位付けするための副索引 concept_search_grams
+# 各列を文字 2-gram（末尾の1文字を含む）の空白区切りにして unicode61 で索引し、
+# 2文字の語はそのまま、1文字の語は前方一致で引く。
+# トリガー内では WITH が使えないため、位置の表 search_gram_positions と結合して n-gram を作る
+# （SEARCH_GRAM_MAX_LENGTH 文字より後ろは副索引に入らない）
+SEARCH_GRAM_MAX_LENGTH = 10000
+
+
+def _search_grams_sql(column: str) -> str:
+    """列の値を文字 2-gram の空白区切りに変換する式（NULL はそのまま）"""
+    if column == 'NULL':
+        return column
+    return f"""(SELECT group_concat(substr({column}, n, 2), ' ')
+             FROM search_gram_positions WHERE n <= length({column}))"""
+
+
+def _search_gram_triggers() -> Dict[str, str]:
+    """SEARCH_SOURCE_TABLES の変更を concept_search_grams へ反映するトリガー（名前 → CREATE 文）"""
+    triggers = {}
+    for number, table in enumerate(SEARCH_SOURCE_TABLES):
+        columns = SEARCH_COLUMNS.get(table, SEARCH_COLUMNS[None])
+        new_values = (f"({number} << {CONCEPT_KEY_SHIFT}) + NEW.id, "
+                      + ', '.join(_search_grams_sql(f"NEW.{col}" if col != 'NULL' else col)
+                                  for col in columns))
+        insert = f"""
+            INSERT INTO concept_search_grams (rowid, name, definition, cultural_context)
+            VALUES ({new_values});"""
+        delete = f"""
+            DELETE FROM concept_search_grams
+            WHERE rowid = ({number} << {CONCEPT_KEY_SHIFT}) + OLD.id;"""
+        for event, body in (('insert', insert), ('delete', delete), ('update', delete + insert)):
+            name = f"trg_{table}_search_grams_{event}"
+            triggers[name] = f"""
+                CREATE TRIGGER IF NOT EXISTS {name}
+                AFTER {event.upper()} ON {table}
+                BEGIN{body}
+                END
+            """
+    return triggers
+
+
+# 一括取り込み時は外して最後に作り直す
+SEARCH_GRAM_TRIGGERS = _search_gram_triggers()
+
+# check_query_plans で実行計画を検査する組み込みクエリのメソッド
+PLAN_CHECKED_METHODS = (
+    'query_cross_cultural_concepts',
+    'find_god_independent_concepts',
+    'analyze_paradoxes',
+    'concept_network_analysis',
+)
+
+# 類似検索索引（enable_similarity_index で作成）
+# 特徴ベクトルは区画ごとに特徴ハッシュで畳み込み、区画ごとに正規化してから連結する
+SIMILARITY_BLOCKS = {'attributes': 64, 'relations': 64, 'ngrams': 128}
+SIMILARITY_DIMENSIONS = sum(SIMILARITY_BLOCKS.values())
+# 乱択超平面 LSH：帯ごとに SIMILARITY_BAND_BITS 本の超平面の符号を1バイトのバケットにまとめる
+SIMILARITY_BANDS = 32
+SIMILARITY_BAND_BITS = 8
+SIMILARITY_SEED = 42
+# 属性の特徴に使わない列（文化をまたいで比べるため cultural_context も除く）
+SIMILARITY_EXCLUDED_COLUMNS = ('id', 'name', 'definition', 'cultural_context', 'created_at')
+
+SIMILARITY_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS concept_vectors (
+    concept_key INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL,
+    vector BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS concept_lsh (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    concept_key INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, concept_key)
+) WITHOUT ROWID;
+
+-- 概念・関係の変更で特徴ベクトルの再計算が必要になった概念（トリガーで登録）
+CREATE TABLE IF NOT EXISTS similarity_pending (concept_key INTEGER PRIMARY KEY);
+"""
+
+# detect_contradictions の検出規則（contradictions.contradiction_type にこの名前で記録する）
+CONTRADICTION_RULES = {
+    'opposing_relations': '同じ概念の組に（逆向きの関係を向きをそろえて読んだものも含め）対立する種類の関係がある',
+    'necessity_conflict': '同じ事実が一方の向きで necessary、逆向きの関係で impossible と登録されている',
+    'creation_cycle': '創造・生成の関係が循環している',
+}
+# 同じ向きの同じ概念の組に両方あると矛盾とみなす関係の種類
+OPPOSING_RELATION_TYPES = (
+    ('contains', 'is_empty_of'),
+    ('depends_on', 'transcends'),
+    ('sustains', 'opposes'),
+)
+# B → A の関係 y は A → B の関係 INVERSE_RELATION_TYPES[y] と同じ事実を表す
+INVERSE_RELATION_TYPES = {
+    'opposes': 'opposes',
+    'grounds': 'depends_on',
+    'depends_on': 'grounds',
+    'contains': 'contained_in',
+    'contained_in': 'contains',
+    'creates': 'created_by',
+    'created_by': 'creates',
+    'generates': 'generated_by',
+    'generated_by': 'generates',
+    'sustains': 'sustained_by',
+    'sustained_by': 'sustains',
+    'transcends': 'transcended_by',
+    'transcended_by': 'transcends',
+}
+
+
+def _reversed_opposing_types() -> List[Tuple[str, str]]:
+    """A → B の関係 x と B → A の関係 y が対立する (x, y) の組（同じ矛盾を両側から数えないよう片方だけ）"""
+    found = []
+    for first, second in OPPOSING_RELATION_TYPES:
+        for x, opposite in ((first, second), (second, first)):
+            for y, inverse in INVERSE_RELATION_TYPES.items():
+                if inverse == opposite and (x, y) not in found and (y, x) not in found:
+                    found.append((x, y))
+    return found
+
+
+REVERSED_OPPOSING_RELATION_TYPES = _reversed_opposing_types()
+# 循環すると矛盾とみなす関係の種類
+CYCLE_RELATION_TYPES = ('creates', 'generates')
+# 部分索引を使えるよう、クエリにも索引と同じ条件をリテラルで書く
+CYCLE_RELATION_FILTER = f"relation_type IN ({', '.join(repr(t) for t in CYCLE_RELATION_TYPES)})"
+
+# 矛盾検出の差分管理（detect_contradictions の初回実行で作成）
+CONTRADICTION_SCHEMA_SQL = f"""
+-- 前回の検出以降に関係が変更された概念の組（トリガーで登録）
+-- cycle は変更前後のどちらかが循環検査の対象の関係だったか
+CREATE TABLE IF NOT EXISTS contradiction_pending (
+    source_table TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    target_table TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    cycle INTEGER NOT NULL,
+    PRIMARY KEY (source_table, source_id, target_table, target_id)
+) WITHOUT ROWID;
+
+-- 同じ概念の組の関係を突き合わせる被覆索引
+CREATE INDEX IF NOT EXISTS idx_concept_relations_pair
+    ON concept_relations (source_table, source_id, target_table, target_id,
+                          relation_type, logical_necessity);
+
+-- 循環検査の対象の関係だけを両方向にたどる被覆索引
+CREATE INDEX IF NOT EXISTS idx_concept_relations_cycle_source
+    ON concept_relations (source_table, source_id, target_table, target_id, relation_type)
+    WHERE {CYCLE_RELATION_FILTER};
+CREATE INDEX IF NOT EXISTS idx_concept_relations_cycle_target
+    ON concept_relations (target_table, target_id, source_table, source_id)
+    WHERE {CYCLE_RELATION_FILTER};
+
+-- REPLACE では削除トリガーが動かないため、挿入前に上書きされる既存の関係の組も登録する
+CREATE TRIGGER IF NOT EXISTS trg_concept_relations_contradiction_insert
+BEFORE INSERT ON concept_relations
+BEGIN
+    INSERT INTO contradiction_pending
+    SELECT source_table, source_id, target_table, target_id, {CYCLE_RELATION_FILTER}
+    FROM concept_relations WHERE id = NEW.id
+    UNION ALL
+    SELECT NEW.source_table, NEW.source_id, NEW.target_table, NEW.target_id,
+           NEW.{CYCLE_RELATION_FILTER} WHERE true
+    ON CONFLICT DO UPDATE SET cycle = cycle OR excluded.cycle;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_concept_relations_contradiction_delete
+AFTER DELETE ON concept_relations
+BEGIN
+    INSERT INTO contradiction_pending
+    VALUES (OLD.source_table, OLD.source_id, OLD.target_table, OLD.target_id,
+            OLD.{CYCLE_RELATION_FILTER})
+    ON CONFLICT DO UPDATE SET cycle = cycle OR excluded.cycle;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_concept_relations_contradiction_update
+AFTER UPDATE OF source_table, source_id, target_table, target_id,
+                relation_type, logical_necessity ON concept_relations
+BEGIN
+    INSERT INTO contradiction_pending
+    VALUES (OLD.source_table, OLD.source_id, OLD.target_table, OLD.target_id,
+            OLD.{CYCLE_RELATION_FILTER}),
+           (NEW.source_table, NEW.source_id, NEW.target_table, NEW.target_id,
+            NEW.{CYCLE_RELATION_FILTER})
+    ON CONFLICT DO UPDATE SET cycle = cycle OR excluded.cycle;
+END;
+"""
+
+# ConceptSnapshot.compare_cultures の既定の文化圏（末尾の % は前方一致。サンプルSQLのパターン2と同じ区分）
+CULTURE_GROUPS = {
+    'western': ('western%',),
+    'eastern': ('buddhist', 'daoist', 'hindu'),
+}
+
+def concept_key(table: str, concept_id: int) -> int:
+    """(table, id) を concept_registry の大域キーに変換"""
+    return (CONCEPT_TABLES.index(table) << CONCEPT_KEY_SHIFT) + concept_id
+
+def _compression_from_path(path: str) -> Optional[str]:
+    """ファイル拡張子から圧縮形式を判定"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+def _open_text(path: str, mode: str, compression: Optional[str] = None):
+    """圧縮形式に応じてUTF-8テキストファイルを開く"""
+    if compression is None:
+        return open(path, mode, encoding='utf-8')
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if compression == 'bz2':
+        import bz2
+        return bz2.open(path, mode + 't', encoding='utf-8')
+    if compression == 'xz':
+        import lzma
+        return lzma.open(path, mode + 't', encoding='utf-8')
+    raise ValueError(f"未知の圧縮形式です: {compression}")
+
+def _require_numpy():
+    """NumPy を遅延インポート（未インストールなら導入方法を示す ImportError）"""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("この機能には NumPy が必要です（pip install numpy）") from None
+    return np
+
+def _similarity_vector(features: Dict[str, List[Tuple[str, float]]]) -> array:
+    """区画ごとの (トークン, 重み) から単位長の float32 ベクトルを作る
+    
+    特徴ハッシュ：トークンの crc32（プロセスをまたいで安定）で区画内の位置と符号を決める。
+    """
+    from zlib import crc32
+    
+    vector = array('f', bytes(4 * SIMILARITY_DIMENSIONS))
+    blocks = []
+    offset = 0
+    for block, width in SIMILARITY_BLOCKS.items():
+        values = [0.0] * width
+        for token, weight in features.get(block, ()):
+            h = crc32(f"{block}:{token}".encode('utf-8'))
+            values[h % width] += weight if h & 0x80000000 else -weight
+        norm = math.sqrt(sum(v * v for v in values))
+        if norm > 0:
+            blocks.append((offset, values, norm))
+        offset += width
+    # 空でない区画が等しく効くよう、各区画を 1/√区画数 の長さにそろえる
+    for offset, values, norm in blocks:
+        scale = 1.0 / (norm * math.sqrt(len(blocks)))
+        for i, v in enumerate(values):
+            vector[offset + i] = v * scale
+    return vector
+
+def _definition_ngrams(text: Optional[str]) -> List[Tuple[str, float]]:
+    """定義文の文字 2-gram・3-gram（NFKC 正規化・小文字化し、空白は除く）"""
+    if not text:
+        return []
+    import unicodedata
+    
+    text = ''.join(unicodedata.normalize('NFKC', text).lower().split())
+    if len(text) < 2:
+        return [(text, 1.0)]
+    return [(text[i:i + n], 1.0) for n in (2, 3) for i in range(len(text) - n + 1)]
+
+@functools.lru_cache(maxsize=1)
+def _similarity_planes() -> Tuple[Tuple[float, ...], ...]:
+    """LSH の乱択超平面（SIMILARITY_SEED から決定的に生成）"""
+    import random
+    
+    rng = random.Random(SIMILARITY_SEED)
+    return tuple(tuple(rng.gauss(0.0, 1.0) for _ in range(SIMILARITY_DIMENSIONS))
+                 for _ in range(SIMILARITY_BANDS * SIMILARITY_BAND_BITS))
+
+def _lsh_signatures(vectors: List[array]) -> List[bytes]:
+    """各ベクトルの LSH 署名（帯ごとのバケット番号を1バイトずつ並べたもの）"""
+    planes = _similarity_planes()
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None and vectors:
+        matrix = np.frombuffer(b''.join(v.tobytes() for v in vectors), dtype=np.float32)
+        bits = (matrix.reshape(len(vectors), -1) @ np.asarray(planes, dtype=np.float32).T) >= 0
+        weights = 1 << np.arange(SIMILARITY_BAND_BITS)
+        buckets = bits.reshape(len(vectors), SIMILARITY_BANDS, SIMILARITY_BAND_BITS) @ weights
+        return [bytes(row) for row in buckets.astype(np.uint8).tolist()]
+    signatures = []
+    for vector in vectors:
+        # 特徴ベクトルは疎なので、非ゼロの成分だけで内積をとる
+        nonzero = [(i, v) for i, v in enumerate(vector) if v]
+        bits = [sum(plane[i] * v for i, v in nonzero) >= 0 for plane in planes]
+        signatures.append(bytes(
+            sum(bit << b for b, bit in enumerate(bits[band * SIMILARITY_BAND_BITS:
+                                                     (band + 1) * SIMILARITY_BAND_BITS]))
+            for band in range(SIMILARITY_BANDS)))
+    return signatures
+
+def _similarity_scores(query: array, vectors: List[bytes]) -> List[float]:
+    """単位長ベクトルどうしの内積（= コサイン類似度）。NumPy があればまとめて計算"""
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None and vectors:
+        matrix = np.frombuffer(b''.join(vectors), dtype=np.float32).reshape(len(vectors), -1)
+        return (matrix @ np.frombuffer(query.tobytes(), dtype=np.float32)).tolist()
+    # 特徴ベクトルは疎なので、基準側の非ゼロ成分だけで内積をとる
+    positions = [i for i, v in enumerate(query) if v]
+    weights = [query[i] for i in positions]
+    scores = []
+    for blob in vectors:
+        vector = array('f')
+        vector.frombytes(blob)
+        scores.append(sum(map(operator.mul, weights, map(vector.__getitem__, positions))))
+    return scores
+
+def _sqlite_connect(path: str, **kwargs) -> sqlite3.Connection:
+    """パスを開く（'file:' で始まる場合は URI として解釈し、共有メモリ上のデータベースも開ける）"""
+    return sqlite3.connect(path, uri=path.startswith('file:'), **kwargs)
+
+def _read_only_connect(db_path: str, pragmas: Dict[str, Any]) -> sqlite3.Connection:
+    """並列実行のワーカー用に、プールとは別の読み取り専用接続を開く"""
+    import pathlib
+    
+    if db_path.startswith('file:'):
+        # URI（共有メモリ上の複製など）はそのまま開く
+        conn = _sqlite_connect(db_path, check_same_thread=False)
+    else:
+        uri = pathlib.Path(db_path).absolute().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # journal_mode はファイルに記録済みで、読み取り専用接続からは変更できない
+    for key, value in pragmas.items():
+        if key != 'journal_mode':
+            conn.execute(f"PRAGMA {key} = {value}")
+    return conn
+
+def _run_table_task(db_path: str, pragmas: Dict[str, Any], func, table: str):
+    """ワーカー側で読み取り専用接続を開いて func(conn, table) を実行"""
+    conn = _read_only_connect(db_path, pragmas)
+    try:
+        return func(conn, table)
+    finally:
+        conn.close()
+
+def _iter_export_rows(conn: sqlite3.Connection, table: str,
+                      created_after=None, created_before=None,
+                      chunk_size: int = 1000, resolve_names: bool = False):
+    """テーブルの行を fetchmany で少しずつ辞書として返す
+    
+    resolve_names=True なら参照先概念の名前を概念台帳から引いて *_name 列として加える。
+    """
+    conditions, params = [], []
+    if created_after is not None or created_before is not None:
+        # created_at 列を持たないテーブルは期間指定の対象外（全行を出力）
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if 'created_at' in columns:
+            if created_after is not None:
+                conditions.append("t.created_at >= ?")
+                params.append(str(created_after))
+            if created_before is not None:
+                conditions.append("t.created_at < ?")
+                params.append(str(created_before))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    selects, joins = ["t.*"], []
+    if resolve_names:
+        for n, (table_column, id_column, name_column) in enumerate(
+                REFERENCE_COLUMNS.get(table, ())):
+            selects.append(f"r{n}.name AS {name_column}")
+            joins.append(f"LEFT JOIN concept_registry r{n} ON r{n}.concept_table = "
+                         f"t.{table_column} AND r{n}.concept_id = t.{id_column}")
+    
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(selects)} FROM {table} t {' '.join(joins)}"
+                   f"{where} ORDER BY t.id", params)
+    columns = [description[0] for description in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(zip(columns, row))
+
+def _write_export_rows(f, conn: sqlite3.Connection, table: str, format: str,
+                       split: bool, **row_options) -> int:
+    """テーブルの行を export_to_json の書式で f へ書き出し、行数を返す"""
+    import json
+    
+    count = 0
+    for row in _iter_export_rows(conn, table, **row_options):
+        if format == 'json':
+            # json.dump(indent=2) の配列要素と同じ字下げにする
+            text = json.dumps(row, ensure_ascii=False, indent=2, default=str)
+            f.write(',\n    ' if count else '\n    ')
+            f.write(text.replace('\n', '\n    '))
+        else:
+            f.write(json.dumps(row if split else {'table': table, 'row': row},
+                               ensure_ascii=False, default=str))
+            f.write('\n')
+        count += 1
+    return count
+
+def _export_table_file(conn: sqlite3.Connection, table: str, directory: str,
+                       suffix: str, compression: Optional[str], format: str,
+                       split: bool, row_options: Dict[str, Any]) -> int:
+    """1テーブル分を directory/<table><suffix> へ書き出す（並列時はワーカープロセスで実行）"""
+    with _open_text(os.path.join(directory, table + suffix), 'w', compression) as f:
+        return _write_export_rows(f, conn, table, format, split, **row_options)
+
+@functools.lru_cache(maxsize=64)
+def _namedtuple_row(columns: Tuple[str, ...]):
+    """列名の組ごとに1つだけ作る軽量な行クラス"""
+    from collections import namedtuple
+    return namedtuple('Row', columns)
+
+def _row_converter(columns: List[str], row_type: str) -> Callable:
+    """タプルの行を row_type（'dict' / 'tuple' / 'namedtuple'）に変換する関数を返す"""
+    if row_type == 'dict':
+        return lambda row: dict(zip(columns, row))
+    if row_type == 'tuple':
+        return tuple
+    if row_type == 'namedtuple':
+        return _namedtuple_row(tuple(columns))._make
+    raise ValueError(f"未知の行形式です: {row_type}")
+
 @dataclass
 class ConceptRelation:
     """概念間の関係を表すデータクラス"""
@@ -24,25 +740,1209 @@ class ConceptRelation:
     logical_necessity: str = 'unknown'
     temporal_stability: str = 'contextual'
 
+class ConceptGraph:
+    """concept_relations から構築する重み付き有向グラフ
+    
+    ノードは (table, id) をキーとし、辺は送信側・受信側の2つのCSR配列
+    （array モジュールの 'q' / 'd' 型）に strength を重みとして保持する。
+    NumPy がインストールされていれば PageRank・固有ベクトル中心性はベクトル化して計算する。
+    """
+    
+    def __init__(self):
+        self.nodes: List[Tuple[str, int]] = []
+        self.node_index: Dict[Tuple[str, int], int] = {}
+        self.relation_types: List[str] = []
+        # 送信側CSR: ノード u の辺は out_offsets[u]:out_offsets[u+1]
+        self.out_offsets = array('q', [0])
+        self.out_targets = array('q')
+        self.out_weights = array('d')
+        self.out_types = array('q')
+        self.out_relation_ids = array('q')
+        # 受信側CSR
+        self.in_offsets = array('q', [0])
+        self.in_sources = array('q')
+        self.in_weights = array('d')
+        self.in_types = array('q')
+    
+    @classmethod
+    def from_rows(cls, rows) -> 'ConceptGraph':
+        """(id, source_table, source_id, target_table, target_id, relation_type, strength) の行から構築"""
+        graph = cls()
+        node_index = graph.node_index
+        nodes = graph.nodes
+        type_codes: Dict[str, int] = {}
+        sources, targets = array('q'), array('q')
+        weights, types, relation_ids = array('d'), array('q'), array('q')
+        
+        for relation_id, source_table, source_id, target_table, target_id, relation_type, strength in rows:
+            for key in ((source_table, source_id), (target_table, target_id)):
+                if key not in node_index:
+                    node_index[key] = len(nodes)
+                    nodes.append(key)
+            if relation_type not in type_codes:
+                type_codes[relation_type] = len(graph.relation_types)
+                graph.relation_types.append(relation_type)
+            sources.append(node_index[(source_table, source_id)])
+            targets.append(node_index[(target_table, target_id)])
+            # strength が NULL の関係はスキーマの既定値 0.5 とみなす
+            weights.append(0.5 if strength is None else max(float(strength), 0.0))
+            types.append(type_codes[relation_type])
+            relation_ids.append(relation_id)
+        
+        n = len(nodes)
+        out_order = cls._counting_sort(sources, n)
+        graph.out_offsets = cls._offsets(sources, n)
+        graph.out_targets = array('q', (targets[e] for e in out_order))
+        graph.out_weights = array('d', (weights[e] for e in out_order))
+        graph.out_types = array('q', (types[e] for e in out_order))
+        graph.out_relation_ids = array('q', (relation_ids[e] for e in out_order))
+        
+        in_order = cls._counting_sort(targets, n)
+        graph.in_offsets = cls._offsets(targets, n)
+        graph.in_sources = array('q', (sources[e] for e in in_order))
+        graph.in_weights = array('d', (weights[e] for e in in_order))
+        graph.in_types = array('q', (types[e] for e in in_order))
+        return graph
+    
+    @staticmethod
+    def _offsets(keys, n: int):
+        """キーごとの件数からCSRのオフセット配列を作成"""
+        counts = [0] * (n + 1)
+        for k in keys:
+            counts[k + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        return array('q', counts)
+    
+    @staticmethod
+    def _counting_sort(keys, n: int):
+        """keys の値で安定ソートした辺番号の並びを返す"""
+        positions = list(ConceptGraph._offsets(keys, n)[:-1])
+        order = array('q', bytes(8 * len(keys)))
+        for edge, k in enumerate(keys):
+            order[positions[k]] = edge
+            positions[k] += 1
+        return order
+    
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+    
+    @property
+    def edge_count(self) -> int:
+        return len(self.out_targets)
+    
+    def _numpy_arrays(self):
+        """NumPy が利用可能なら (np, 辺の送信元, 送信先, 重み) を返す"""
+        try:
+            import numpy as np
+        except ImportError:
+            return None
+        offsets = np.frombuffer(self.out_offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(self.node_count, dtype=np.int64), np.diff(offsets))
+        targets = np.frombuffer(self.out_targets, dtype=np.int64)
+        weights = np.frombuffer(self.out_weights, dtype=np.float64)
+        return np, sources, targets, weights
+    
+    def degree(self, weighted: bool = False) -> Dict[str, List[float]]:
+        """各ノードの入次数・出次数（weighted=True なら strength の合計）"""
+        n = self.node_count
+        out_degree, in_degree = [0.0] * n, [0.0] * n
+        for u in range(n):
+            start, end = self.out_offsets[u], self.out_offsets[u + 1]
+            out_degree[u] = sum(self.out_weights[start:end]) if weighted else end - start
+            start, end = self.in_offsets[u], self.in_offsets[u + 1]
+            in_degree[u] = sum(self.in_weights[start:end]) if weighted else end - start
+        return {
+            'in_degree': in_degree,
+            'out_degree': out_degree,
+            'degree': [i + o for i, o in zip(in_degree, out_degree)],
+        }
+    
+    def pagerank(self, damping: float = 0.85, max_iter: int = 100,
+                 tol: float = 1e-6) -> List[float]:
+        """strength で重み付けした PageRank（出辺を持たないノードの質量は全体に一様分配）"""
+        n = self.node_count
+        if n == 0:
+            return []
+        out_strength = self.degree(weighted=True)['out_degree']
+        
+        vectorized = self._numpy_arrays()
+        if vectorized is not None:
+            np, sources, targets, weights = vectorized
+            out_sum = np.asarray(out_strength)
+            dangling = out_sum == 0
+            share = np.divide(weights, out_sum[sources], out=np.zeros_like(weights),
+                              where=out_sum[sources] > 0)
+            rank = np.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                base = (1.0 - damping) / n + damping * rank[dangling].sum() / n
+                new_rank = base + damping * np.bincount(targets, weights=rank[sources] * share,
+                                                        minlength=n)
+                converged = np.abs(new_rank - rank).sum() < n * tol
+                rank = new_rank
+                if converged:
+                    break
+            return rank.tolist()
+        
+        rank = [1.0 / n] * n
+        for _ in range(max_iter):
+            dangling_mass = sum(rank[u] for u in range(n) if out_strength[u] == 0)
+            base = (1.0 - damping) / n + damping * dangling_mass / n
+            new_rank = [base] * n
+            for u in range(n):
+                if out_strength[u] == 0:
+                    continue
+                share = damping * rank[u] / out_strength[u]
+                for e in range(self.out_offsets[u], self.out_offsets[u + 1]):
+                    new_rank[self.out_targets[e]] += share * self.out_weights[e]
+            error = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if error < n * tol:
+                break
+        return rank
+    
+    def eigenvector_centrality(self, max_iter: int = 100, tol: float = 1e-6) -> List[float]:
+        """受信辺の strength で重み付けした固有ベクトル中心性（L2正規化）"""
+        n = self.node_count
+        if n == 0:
+            return []
+        
+        vectorized = self._numpy_arrays()
+        if vectorized is not None:
+            np, sources, targets, weights = vectorized
+            x = np.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                # x + A^T x で反復すると周期的なグラフでも収束する
+                new_x = x + np.bincount(targets, weights=x[sources] * weights, minlength=n)
+                norm = np.linalg.norm(new_x) or 1.0
+                new_x /= norm
+                converged = np.abs(new_x - x).sum() < n * tol
+                x = new_x
+                if converged:
+                    break
+            return x.tolist()
+        
+        x = [1.0 / n] * n
+        for _ in range(max_iter):
+            new_x = list(x)
+            for v in range(n):
+                for e in range(self.in_offsets[v], self.in_offsets[v + 1]):
+                    new_x[v] += x[self.in_sources[e]] * self.in_weights[e]
+            norm = math.sqrt(sum(value * value for value in new_x)) or 1.0
+            new_x = [value / norm for value in new_x]
+            error = sum(abs(a - b) for a, b in zip(new_x, x))
+            x = new_x
+            if error < n * tol:
+                break
+        return x
+    
+    def betweenness_centrality(self, sample_size: Optional[int] = None,
+                               seed: int = 0, normalized: bool = True) -> List[float]:
+        """有向・ホップ数基準の媒介中心性（Brandes法）
+        
+        sample_size を指定すると始点を無作為抽出して近似する（大規模グラフ向け）。
+        """
+        n = self.node_count
+        centrality = [0.0] * n
+        sources = range(n)
+        if sample_size is not None and sample_size < n:
+            import random
+            sources = random.Random(seed).sample(range(n), sample_size)
+        
+        for s in sources:
+            stack = []
+            predecessors: Dict[int, List[int]] = {s: []}
+            sigma = {s: 1}
+            distance = {s: 0}
+            frontier = deque([s])
+            while frontier:
+                v = frontier.popleft()
+                stack.append(v)
+                for e in range(self.out_offsets[v], self.out_offsets[v + 1]):
+                    w = self.out_targets[e]
+                    if w not in distance:
+                        distance[w] = distance[v] + 1
+                        frontier.append(w)
+                        sigma[w] = 0
+                        predecessors[w] = []
+                    if distance[w] == distance[v] + 1:
+                        sigma[w] += sigma[v]
+                        predecessors[w].append(v)
+            delta = dict.fromkeys(stack, 0.0)
+            while stack:
+                w = stack.pop()
+                for v in predecessors[w]:
+                    delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+                if w != s:
+                    centrality[w] += delta[w]
+        
+        scale = 1.0
+        if sample_size is not None and 0 < sample_size < n:
+            scale = n / sample_size
+        if normalized and n > 2:
+            scale /= (n - 1) * (n - 2)
+        return [value * scale for value in centrality]
+    
+    def traverse(self, start: Tuple[str, int], max_depth: int = 10, reverse: bool = False,
+                 relation_types: Optional[List[str]] = None,
+                 min_strength: float = 0.0) -> Dict[Tuple[str, int], int]:
+        """幅優先探索で到達できるノードと最短ホップ数（reverse=True で辺を逆向きにたどる）"""
+        if start not in self.node_index:
+            return {}
+        allowed = None
+        if relation_types is not None:
+            allowed = {code for code, name in enumerate(self.relation_types) if name in relation_types}
+        if reverse:
+            offsets, neighbours, weights, types = (
+                self.in_offsets, self.in_sources, self.in_weights, self.in_types)
+        else:
+            offsets, neighbours, weights, types = (
+                self.out_offsets, self.out_targets, self.out_weights, self.out_types)
+        
+        origin = self.node_index[start]
+        depth = {origin: 0}
+        frontier = [origin]
+        for level in range(1, max_depth + 1):
+            next_frontier = []
+            for u in frontier:
+                for e in range(offsets[u], offsets[u + 1]):
+                    v = neighbours[e]
+                    if v in depth or weights[e] < min_strength:
+                        continue
+                    if allowed is not None and types[e] not in allowed:
+                        continue
+                    depth[v] = level
+                    next_frontier.append(v)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        del depth[origin]
+        return {self.nodes[v]: d for v, d in depth.items()}
+    
+    def shortest_path(self, source: Tuple[str, int], target: Tuple[str, int],
+                      weighted: bool = True) -> Optional[Dict[str, Any]]:
+        """2概念間の最短経路
+        
+        weighted=True では辺のコストを -log(strength) とし、strength の積が最大となる
+        （最も強い）関係の連鎖を求める。False ではホップ数最小の経路を求める。
+        到達不能なら None。
+        """
+        if source not in self.node_index or target not in self.node_index:
+            return None
+        start, goal = self.node_index[source], self.node_index[target]
+        cost = {start: 0.0}
+        previous: Dict[int, Tuple[int, int]] = {}
+        heap = [(0.0, start)]
+        while heap:
+            current_cost, u = heapq.heappop(heap)
+            if u == goal:
+                break
+            if current_cost > cost[u]:
+                continue
+            for e in range(self.out_offsets[u], self.out_offsets[u + 1]):
+                if weighted:
+                    step = -math.log(self.out_weights[e]) if self.out_weights[e] > 0 else math.inf
+                else:
+                    step = 1.0
+                v = self.out_targets[e]
+                new_cost = current_cost + step
+                if new_cost < cost.get(v, math.inf):
+                    cost[v] = new_cost
+                    previous[v] = (u, e)
+                    heapq.heappush(heap, (new_cost, v))
+        
+        if goal not in cost or math.isinf(cost[goal]):
+            return None
+        path, edges = [goal], []
+        while path[-1] != start:
+            u, e = previous[path[-1]]
+            path.append(u)
+            edges.append(e)
+        path.reverse()
+        edges.reverse()
+        return {
+            'nodes': [self.nodes[u] for u in path],
+            'relations': [{
+                'relation_id': self.out_relation_ids[e],
+                'relation_type': self.relation_types[self.out_types[e]],
+                'strength': self.out_weights[e],
+            } for e in edges],
+            'hops': len(edges),
+            'cost': cost[goal],
+        }
+    
+    def strongly_connected_components(self) -> array:
+        """ノードごとの強連結成分の番号（Tarjan法を明示的なスタックで反復実行）"""
+        n = self.node_count
+        offsets, targets = self.out_offsets, self.out_targets
+        order = array('q', [-1]) * n
+        low = array('q', [0]) * n
+        component = array('q', [-1]) * n
+        on_stack = bytearray(n)
+        stack: List[int] = []
+        visited = components = 0
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = visited
+            visited += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            while work:
+                frame = work[-1]
+                u, e = frame
+                if e < offsets[u + 1]:
+                    frame[1] = e + 1
+                    v = targets[e]
+                    if order[v] == -1:
+                        order[v] = low[v] = visited
+                        visited += 1
+                        stack.append(v)
+                        on_stack[v] = 1
+                        work.append([v, offsets[v]])
+                    elif on_stack[v] and order[v] < low[u]:
+                        low[u] = order[v]
+                    continue
+                work.pop()
+                if work and low[u] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[u]
+                if low[u] == order[u]:
+                    while True:
+                        v = stack.pop()
+                        on_stack[v] = 0
+                        component[v] = components
+                        if v == u:
+                            break
+                    components += 1
+        return component
+
+class ConceptSnapshot:
+    """概念テーブルの数値属性を列ごとの NumPy 配列に展開したスナップショット
+    
+    数値・真偽値の列は float64（NULL は NaN）、id は int64、cultural_context は
+    全テーブル共通の辞書 cultures への int32 の符号（NULL は -1）として持つ。
+    集計結果は JSON にそのまま書ける Python の数値で返す。
+    """
+    
+    NUMERIC_TYPES = ('INTEGER', 'REAL', 'BOOLEAN')
+    
+    def __init__(self, tables: Dict[str, Dict[str, Any]], cultures: List[str]):
+        self.tables = tables
+        self.cultures = cultures
+    
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection, tables) -> 'ConceptSnapshot':
+        """各テーブルを1回の全件読み込みで列配列に変換"""
+        np = _require_numpy()
+        culture_codes: Dict[str, int] = {}
+        snapshot: Dict[str, Dict[str, Any]] = {}
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        for table in tables:
+            numeric = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")
+                       if row[1] != 'id' and row[2].upper() in cls.NUMERIC_TYPES]
+            rows = cursor.execute(f"""
+                SELECT id, cultural_context{''.join(', ' + column for column in numeric)}
+                FROM {table} ORDER BY id
+            """).fetchall()
+            columns = {
+                'id': np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+                'cultural_context': np.fromiter(
+                    (-1 if row[1] is None else culture_codes.setdefault(row[1], len(culture_codes))
+                     for row in rows), dtype=np.int32, count=len(rows)),
+            }
+            # None は float64 への変換で NaN になる
+            for position, column in enumerate(numeric, start=2):
+                columns[column] = np.array([row[position] for row in rows], dtype=np.float64)
+            snapshot[table] = columns
+        return cls(snapshot, list(culture_codes))
+    
+    def fingerprint(self) -> Dict[str, Tuple[int, int]]:
+        """テーブルごとの (行数, 最大id)。保存したスナップショットが古くないかの確認に使う"""
+        return {table: (len(columns['id']), int(columns['id'].max()) if len(columns['id']) else 0)
+                for table, columns in self.tables.items()}
+    
+    def save(self, path: str):
+        """.npz に保存（path に拡張子がなければ NumPy が .npz を付ける）"""
+        np = _require_numpy()
+        arrays = {f"{table}.{column}": values
+                  for table, columns in self.tables.items() for column, values in columns.items()}
+        np.savez(path, cultures=np.array(self.cultures, dtype=str), **arrays)
+    
+    @classmethod
+    def load(cls, path: str) -> 'ConceptSnapshot':
+        """save で保存した .npz から復元"""
+        np = _require_numpy()
+        tables: Dict[str, Dict[str, Any]] = {}
+        with np.load(path, allow_pickle=False) as data:
+            cultures = [str(culture) for culture in data['cultures']]
+            for key in data.files:
+                if '.' in key:
+                    table, column = key.split('.', 1)
+                    tables.setdefault(table, {})[column] = data[key]
+        return cls(tables, cultures)
+    
+    def columns(self, table: str) -> List[str]:
+        """table の数値・真偽値の列名"""
+        return [column for column in self._table(table) if column not in ('id', 'cultural_context')]
+    
+    def _table(self, table: str) -> Dict[str, Any]:
+        if table not in self.tables:
+            raise ValueError(f"スナップショットに含まれないテーブルです: {table}")
+        return self.tables[table]
+    
+    def _column(self, table: str, column: str):
+        columns = self._table(table)
+        if column in ('id', 'cultural_context') or column not in columns:
+            raise ValueError(f"{table} の数値列ではありません: {column}")
+        return columns[column]
+    
+    @staticmethod
+    def _group_stats(np, codes, values, labels) -> List[Dict[str, Any]]:
+        """符号 codes ごとの件数・平均・母標準偏差・最小・最大を bincount でまとめて計算"""
+        k = len(labels)
+        counts = np.bincount(codes, minlength=k)
+        sums = np.bincount(codes, weights=values, minlength=k)
+        squares = np.bincount(codes, weights=values * values, minlength=k)
+        minimum = np.full(k, np.inf)
+        maximum = np.full(k, -np.inf)
+        np.minimum.at(minimum, codes, values)
+        np.maximum.at(maximum, codes, values)
+        results = []
+        for g in np.flatnonzero(counts):
+            n = int(counts[g])
+            mean = sums[g] / n
+            results.append({
+                'group': labels[g],
+                'count': n,
+                'mean': float(mean),
+                'std': math.sqrt(max(float(squares[g] / n - mean * mean), 0.0)),
+                'min': float(minimum[g]),
+                'max': float(maximum[g]),
+            })
+        return results
+    
+    def group_by(self, table: str, column: str, by: str = 'cultural_context') -> List[Dict[str, Any]]:
+        """column を by（cultural_context または別の数値列）ごとに集計（NULL の行は除く）"""
+        np = _require_numpy()
+        values = self._column(table, column)
+        valid = ~np.isnan(values)
+        if by == 'cultural_context':
+            codes = self._table(table)['cultural_context']
+            valid &= codes >= 0
+            codes, labels = codes[valid], self.cultures
+        else:
+            keys = self._column(table, by)
+            valid &= ~np.isnan(keys)
+            unique, codes = np.unique(keys[valid], return_inverse=True)
+            labels = [int(key) if key.is_integer() else float(key) for key in unique]
+        results = self._group_stats(np, codes, values[valid], labels)
+        results.sort(key=lambda r: (-r['count'], str(r['group'])))
+        return results
+    
+    def histogram(self, table: str, column: str, bins: int = 10,
+                  value_range: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+        """column の度数分布（edges は bins + 1 個の境界、missing は NULL の件数）"""
+        np = _require_numpy()
+        values = self._column(table, column)
+        valid = ~np.isnan(values)
+        counts, edges = np.histogram(values[valid], bins=bins, range=value_range)
+        return {
+            'counts': counts.tolist(),
+            'edges': edges.tolist(),
+            'missing': int(len(values) - valid.sum()),
+        }
+    
+    def correlation(self, table: str, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """数値列どうしのピアソン相関行列（列の組ごとに両方が NULL でない行で計算）
+        
+        分散が0などで定義できない組は None。
+        """
+        np = _require_numpy()
+        columns = list(columns or self.columns(table))
+        data = [self._column(table, column) for column in columns]
+        matrix: List[List[Optional[float]]] = [[None] * len(columns) for _ in columns]
+        for i in range(len(columns)):
+            for j in range(i, len(columns)):
+                valid = ~(np.isnan(data[i]) | np.isnan(data[j]))
+                x, y = data[i][valid], data[j][valid]
+                if len(x) < 2:
+                    continue
+                x, y = x - x.mean(), y - y.mean()
+                denominator = math.sqrt(float((x * x).sum() * (y * y).sum()))
+                if denominator > 0:
+                    matrix[i][j] = matrix[j][i] = float((x * y).sum()) / denominator
+        return {'columns': columns, 'matrix': matrix}
+    
+    def _culture_mask(self, np, codes, patterns) -> Any:
+        """patterns（末尾 % で前方一致）のいずれかに当たる文化の行を True にする"""
+        matched = [code for code, culture in enumerate(self.cultures)
+                   if any(culture.startswith(pattern[:-1]) if pattern.endswith('%')
+                          else culture == pattern for pattern in patterns)]
+        return np.isin(codes, matched)
+    
+    def compare_cultures(self, table: str, column: str,
+                         groups: Optional[Dict[str, Tuple[str, ...]]] = None) -> List[Dict[str, Any]]:
+        """文化圏ごとの column の統計量と、テーブル全体の平均との差（difference）
+        
+        groups は {文化圏名: 文化名のタプル}（既定は CULTURE_GROUPS）。文化圏どうしは重なってもよい。
+        """
+        np = _require_numpy()
+        values = self._column(table, column)
+        codes = self._table(table)['cultural_context']
+        valid = ~np.isnan(values)
+        overall = float(values[valid].mean()) if valid.any() else None
+        results = []
+        for name, patterns in (groups or CULTURE_GROUPS).items():
+            mask = valid & self._culture_mask(np, codes, patterns)
+            stats = self._group_stats(np, np.zeros(int(mask.sum()), dtype=np.int64),
+                                      values[mask], [name])
+            entry = stats[0] if stats else {'group': name, 'count': 0, 'mean': None,
+                                            'std': None, 'min': None, 'max': None}
+            entry['difference'] = (entry['mean'] - overall) if stats else None
+            results.append(entry)
+        return results
+
+class ResultCache:
+    """メソッド名と引数をキーとする有界LRU結果キャッシュ（スレッドセーフ）"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, value, generation: int):
+        """generation が計算開始時から変わっていなければ（途中で書き込みがなければ）格納"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+class QueryStats:
+    """SQL文ごとの実行回数・時間・行数の集計
+    
+    パーセンタイル用の所要時間はキーごとに最大 sample_size 件を無作為抽出で保持する。
+    """
+    
+    def __init__(self, sample_size: int = 1024):
+        import random
+        
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self.reset()
+    
+    def reset(self):
+        """集計をすべて破棄"""
+        with self._lock:
+            self._entries: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+    
+    def add(self, method: Optional[str], sql: str, elapsed: float, rows: int):
+        """1回分の実行結果を集計に加える"""
+        with self._lock:
+            entry = self._entries.get((method, sql))
+            if entry is None:
+                entry = self._entries[(method, sql)] = {
+                    'count': 0, 'rows': 0, 'total': 0.0, 'max': 0.0, 'samples': []}
+            entry['count'] += 1
+            entry['rows'] += rows
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            samples = entry['samples']
+            if len(samples) < self.sample_size:
+                samples.append(elapsed)
+            else:
+                # リザーバーサンプリング
+                slot = self._random.randrange(entry['count'])
+                if slot < self.sample_size:
+                    samples[slot] = elapsed
+    
+    def summary(self, group_by: str = 'statement') -> List[Dict[str, Any]]:
+        """集計結果を合計時間の降順で返す（時間はミリ秒）
+        
+        group_by: 'statement'（呼び出し元メソッドとSQL文の組）または 'method'
+        """
+        if group_by not in ('statement', 'method'):
+            raise ValueError(f"未知の集計単位です: {group_by}")
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        with self._lock:
+            for (method, sql), entry in self._entries.items():
+                key = (method, sql) if group_by == 'statement' else (method,)
+                group = groups.setdefault(key, {'count': 0, 'rows': 0, 'total': 0.0,
+                                                'max': 0.0, 'samples': []})
+                group['count'] += entry['count']
+                group['rows'] += entry['rows']
+                group['total'] += entry['total']
+                group['max'] = max(group['max'], entry['max'])
+                group['samples'].extend(entry['samples'])
+        
+        results = []
+        for key, group in groups.items():
+            samples = sorted(group['samples'])
+            
+            def percentile(p: float) -> float:
+                return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000
+            
+            result = {'method': key[0]}
+            if group_by == 'statement':
+                result['sql'] = key[1]
+            result.update({
+                'count': group['count'], 'rows': group['rows'],
+                'total_ms': group['total'] * 1000,
+                'mean_ms': group['total'] * 1000 / group['count'],
+                'p50_ms': percentile(50), 'p95_ms': percentile(95), 'p99_ms': percentile(99),
+                'max_ms': group['max'] * 1000,
+            })
+            results.append(result)
+        results.sort(key=lambda result: result['total_ms'], reverse=True)
+        return results
+
+class QueryInstrumentation:
+    """SQL文の計測設定と記録先（MetaphysicsDB.enable_instrumentation で作成）
+    
+    slow_query_ms 以上かかった文は slow_queries に残し、ロガーにも警告として出力する。
+    explain: False / 'slow'（遅い文のみ）/ True（全SELECT文）で EXPLAIN QUERY PLAN を付加
+    exporter: 文ごとの記録（辞書）を受け取る関数。外部のメトリクス収集へ渡す用途
+    """
+    
+    def __init__(self, slow_query_ms: float = 100.0, explain=False,
+                 exporter: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 slow_log_size: int = 1000, sample_size: int = 1024):
+        if explain not in (False, True, 'slow'):
+            raise ValueError(f"未知の explain 指定です: {explain}")
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self.exporter = exporter
+        self.stats = QueryStats(sample_size)
+        self.slow_queries: deque = deque(maxlen=slow_log_size)
+        self._plans: Dict[str, List[str]] = {}
+    
+    def _plan(self, conn: sqlite3.Connection, sql: str, parameters) -> Optional[List[str]]:
+        """SELECT文の実行計画（SQL文ごとに1回だけ取得してキャッシュ）"""
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        plan = self._plans.get(sql)
+        if plan is None:
+            # 計測用カーソルを経由すると記録が再帰するため素のカーソルを使う
+            try:
+                rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+                plan = [row[-1] for row in rows]
+            except sqlite3.Error:
+                plan = []
+            self._plans[sql] = plan
+        return plan
+    
+    def record(self, conn: sqlite3.Connection, sql: str, parameters,
+               method: Optional[str], elapsed: float, rows: int):
+        """1文の実行結果を集計・低速ログ・エクスポーターへ渡す"""
+        sql = ' '.join(sql.split())
+        self.stats.add(method, sql, elapsed, rows)
+        elapsed_ms = elapsed * 1000
+        slow = elapsed_ms >= self.slow_query_ms
+        if not slow and self.exporter is None:
+            return
+        
+        record = {'timestamp': time.time(), 'method': method, 'sql': sql,
+                  'elapsed_ms': elapsed_ms, 'rows': rows}
+        if self.explain is True or (self.explain == 'slow' and slow):
+            record['plan'] = self._plan(conn, sql, parameters)
+        if slow:
+            import logging
+            self.slow_queries.append(record)
+            logging.getLogger(__name__).warning(
+                "低速クエリ %.1f ms (%s, %d 行): %s", elapsed_ms, method, rows, sql)
+        if self.exporter is not None:
+            try:
+                self.exporter(record)
+            except Exception:
+                # 計測の失敗で本来の処理を止めない
+                import logging
+                logging.getLogger(__name__).exception("計測結果のエクスポートに失敗しました")
+
+@functools.lru_cache(maxsize=None)
+def _public_method_codes() -> Dict[Any, str]:
+    """MetaphysicsDB の公開メソッドのコードオブジェクト → メソッド名"""
+    import inspect
+    
+    codes = {}
+    for name, member in vars(MetaphysicsDB).items():
+        if name.startswith('_') or not callable(member):
+            continue
+        func = inspect.unwrap(member)
+        if hasattr(func, '__code__'):
+            codes[func.__code__] = name
+    return codes
+
+def _calling_method() -> Optional[str]:
+    """呼び出し元をさかのぼって最も内側の MetaphysicsDB 公開メソッド名を返す"""
+    codes = _public_method_codes()
+    frame = sys._getframe(1)
+    while frame is not None:
+        name = codes.get(frame.f_code)
+        if name is not None:
+            return name
+        frame = frame.f_back
+    return None
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    """実行と取得にかかった時間・行数を記録するカーソル（計測有効時のみ使用）
+    
+    文の所要時間は execute と fetch の呼び出し内で費やした時間の合計で、
+    呼び出し側が行を処理している時間は含まない。結果を最後まで読まれなかった文は
+    次の execute、close、または接続の返却時に記録される。
+    """
+    _pending = None
+    
+    def _start(self, sql: str, parameters):
+        self._finish()
+        self._pending = [sql, parameters, _calling_method(), 0.0, 0]
+        self.connection._pending_cursors.add(self)
+    
+    def _finish(self):
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        self.connection._pending_cursors.discard(self)
+        sql, parameters, method, elapsed, rows = pending
+        self.connection.instrumentation.record(self.connection, sql, parameters,
+                                               method, elapsed, rows)
+    
+    def _run(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._pending[3] += time.perf_counter() - start
+    
+    def _executed(self):
+        # 結果列のない文（INSERT など）はこの時点で完了している
+        if self.description is None:
+            self._pending[4] = max(self.rowcount, 0)
+            self._finish()
+        return self
+    
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        self._run(super().execute, sql, parameters)
+        return self._executed()
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql, ())
+        self._run(super().executemany, sql, seq_of_parameters)
+        return self._executed()
+    
+    def executescript(self, sql_script):
+        self._start(sql_script, ())
+        self._run(super().executescript, sql_script)
+        self._finish()
+        return self
+    
+    def fetchone(self):
+        if self._pending is None:
+            return super().fetchone()
+        row = self._run(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._pending[4] += 1
+        return row
+    
+    def fetchmany(self, size=None):
+        if self._pending is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        size = self.arraysize if size is None else size
+        rows = self._run(super().fetchmany, size)
+        self._pending[4] += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+    
+    def fetchall(self):
+        if self._pending is None:
+            return super().fetchall()
+        rows = self._run(super().fetchall)
+        self._pending[4] += len(rows)
+        self._finish()
+        return rows
+    
+    def __next__(self):
+        if self._pending is None:
+            return super().__next__()
+        try:
+            row = self._run(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._pending[4] += 1
+        return row
+    
+    def close(self):
+        self._finish()
+        super().close()
+
+class _InstrumentedConnection(sqlite3.Connection):
+    """計測用カーソルを使う接続（Connection.execute などの省略形も計測対象にする）"""
+    instrumentation: Optional[QueryInstrumentation] = None
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_cursors = set()
+    
+    def cursor(self, factory=_InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+    
+    def finish_pending(self):
+        """読み切られていない文の記録を確定させる"""
+        for cursor in list(self._pending_cursors):
+            cursor._finish()
+
+def _cached_result(method):
+    """分析メソッドの結果を MetaphysicsDB の結果キャッシュに保持するデコレーター
+    
+    キャッシュ上の値は呼び出し側に変更されないよう複製して返す。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self._result_cache
+        # 実行計画の取得中は実際にSQLを発行させる
+        if cache is None or self._statement_trace is not None:
+            return method(self, *args, **kwargs)
+        self._check_external_changes()
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        
+        found, value = cache.get(key)
+        if not found:
+            generation = cache.generation
+            value = method(self, *args, **kwargs)
+            cache.put(key, value, generation)
+        from copy import deepcopy
+        return deepcopy(value)
+    return wrapper
+
 class MetaphysicsDB:
     """形而上学概念データベースの操作クラス"""
     
-    def __init__(self, db_path: str = "metaphysics.db"):
+    def __init__(self, db_path: str = "metaphysics.db", pooled: bool = False,
+                 pool_size: int = 8, pragmas: Optional[Dict[str, Any]] = None,
+                 result_cache_size: int = 0):
+        """
+        pooled=True で長寿命接続のプールを使用する（オプトイン）。
+        pool_size はプール内の最大接続数、pragmas は DEFAULT_POOL_PRAGMAS への上書き。
+        result_cache_size > 0 で分析メソッドの結果をLRUキャッシュする（オプトイン）。
+        """
         self.db_path = db_path
-        self.setup_database()
+        self.pooled = pooled
+        self.pool_size = pool_size
+        self.pragmas = dict(DEFAULT_POOL_PRAGMAS, **(pragmas or {}))
+        self._statement_trace = None
+        self._instrumentation: Optional[QueryInstrumentation] = None
+        self._concept_graph = None
+        self._concept_snapshots: Dict[Tuple[str, ...], ConceptSnapshot] = {}
+        self._result_cache = ResultCache(result_cache_size) if result_cache_size > 0 else None
+        self._watch_lock = threading.Lock()
+        self._watch_conn = None
+        self._watch_pid = None
+        self._data_version = None
+        self._table_columns: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._insertable_columns: Dict[str, Tuple[str, ...]] = {}
+        self._insert_statements: Dict[Tuple[str, Tuple[str, ...], bool], str] = {}
+        self._reset_pool()
+        self._ensure_schema()
+    
+    def _reset_pool(self):
+        """接続プールの状態を初期化"""
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._pool_connections = []
+        self._local = threading.local()
+    
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        """新しい接続を開く（計測が有効なら計測用の接続クラスを使う）"""
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return _sqlite_connect(self.db_path, **kwargs)
+        conn = _sqlite_connect(self.db_path, factory=_InstrumentedConnection, **kwargs)
+        conn.instrumentation = instrumentation
+        return conn
+    
+    def _open_pooled_connection(self) -> sqlite3.Connection:
+        """PRAGMAを適用した長寿命接続を作成"""
+        # close() は別スレッドから呼ばれるため check_same_thread を無効化
+        # （1つの接続を同時に使うのは常に1スレッドのみ）
+        conn = self._connect(check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # 接続の初期設定は取得を要求したメソッドの計測に含めないよう、素のカーソルで実行する
+        cursor = sqlite3.Cursor(conn)
+        for key, value in self.pragmas.items():
+            cursor.execute(f"PRAGMA {key} = {value}")
+        cursor.close()
+        return conn
+    
+    def _acquire_pooled_connection(self) -> sqlite3.Connection:
+        """プールから接続を取得（空きがなく上限に達していれば返却を待つ）"""
+        if os.getpid() != self._pid:
+            # fork後の子プロセスでは親の接続を使っても閉じてもいけない
+            # （閉じるとWALのチェックポイントやロック解放が親と競合する）
+            self._abandoned_connections = self._pool_connections
+            self._reset_pool()
+        
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._pool_lock:
+            if len(self._pool_connections) < self.pool_size:
+                conn = self._open_pooled_connection()
+                self._pool_connections.append(conn)
+                return conn
+        return self._idle.get()
+    
+    def _map_tables(self, func, tables: List[str], workers: Optional[int] = None,
+                    processes: bool = False) -> List:
+        """func(conn, table) をテーブルごとにワーカーで実行し、tables の順に結果を返す
+        
+        各ワーカーは独自の読み取り専用接続を使う。テーブルごとに別の接続なので、
+        実行中に書き込みがあるとテーブル間で異なる時点のデータを読む可能性がある。
+        processes=False ならスレッド（sqlite3 は文の実行中に GIL を解放する）、
+        True ならプロセスで実行する（func はモジュールレベルの関数で、結果は pickle 可能なこと）。
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        
+        workers = max(workers or min(len(tables), os.cpu_count() or 1), 1)
+        executor = (ProcessPoolExecutor(workers) if processes else
+                    ThreadPoolExecutor(workers, thread_name_prefix='metaphysics-table'))
+        task = functools.partial(_run_table_task, self.db_path, self.pragmas, func)
+        with executor:
+            return list(executor.map(task, tables))
     
     @contextmanager
     def get_connection(self):
         """データベース接続のコンテキストマネージャー"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 辞書ライクなアクセス
+        if not self.pooled:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row  # 辞書ライクなアクセス
+            if self._statement_trace is not None:
+                conn.set_trace_callback(self._statement_trace.append)
+            try:
+                yield conn
+            finally:
+                if isinstance(conn, _InstrumentedConnection):
+                    conn.finish_pending()
+                conn.close()
+            return
+        
+        # 同一スレッド内の入れ子呼び出しでは同じ接続を再利用し、最後に抜けた側が返却する
+        # （iter_* のジェネレーターは取得と異なる順序で終わることがある）
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None and local.pid != os.getpid():
+            # with ブロックの途中で fork した子は、スレッドローカルに残った親の接続を使わない
+            conn = None
+        if conn is None:
+            conn = self._acquire_pooled_connection()
+            local = self._local
+            local.conn = conn
+            local.pid = os.getpid()
+            local.depth = 0
+            if self._statement_trace is not None:
+                conn.set_trace_callback(self._statement_trace.append)
+        local.depth += 1
         try:
             yield conn
         finally:
+            local.depth -= 1
+            if local.depth == 0:
+                self._release_pooled_connection(conn, local)
+    
+    def _release_pooled_connection(self, conn: sqlite3.Connection, local: threading.local):
+        """スレッドが使い終えた接続をプールへ返却"""
+        local.conn = None
+        if local.pid != os.getpid():
+            # fork 前に取得した親の接続は、子では巻き戻しも返却もせずに手放す
+            return
+        conn.set_trace_callback(None)
+        if isinstance(conn, _InstrumentedConnection):
+            conn.finish_pending()
+        # 非プール時の close() と同様に未コミットの変更は破棄する
+        if conn.in_transaction:
+            conn.rollback()
+        if conn in self._pool_connections:
+            if getattr(conn, 'instrumentation', None) is self._instrumentation:
+                self._idle.put(conn)
+            else:
+                # 計測の設定が切り替わる前に貸し出していた接続は作り直す
+                self._discard_pooled_connection(conn)
+    
+    def _discard_pooled_connection(self, conn: sqlite3.Connection):
+        """プールから接続を外して閉じる"""
+        with self._pool_lock:
+            if conn in self._pool_connections:
+                self._pool_connections.remove(conn)
+        conn.close()
+    
+    def enable_instrumentation(self, slow_query_ms: float = 100.0, explain=False,
+                               exporter: Optional[Callable[[Dict[str, Any]], None]] = None,
+                               slow_log_size: int = 1000,
+                               sample_size: int = 1024) -> QueryInstrumentation:
+        """実行される全SQL文の所要時間・行数・呼び出し元メソッドの計測を開始
+        
+        引数は QueryInstrumentation を参照。既に有効なら新しい設定・空の集計でやり直す。
+        無効時は通常の接続クラスをそのまま使うため、計測のための負荷はかからない。
+        """
+        self._instrumentation = QueryInstrumentation(slow_query_ms, explain, exporter,
+                                                     slow_log_size, sample_size)
+        self._retire_idle_connections()
+        return self._instrumentation
+    
+    def disable_instrumentation(self):
+        """計測を停止（集計結果は破棄される）"""
+        self._instrumentation = None
+        self._retire_idle_connections()
+    
+    def _retire_idle_connections(self):
+        """計測設定の切り替え時に、待機中のプール接続を閉じて作り直させる"""
+        if not self.pooled or os.getpid() != self._pid:
+            return
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard_pooled_connection(conn)
+    
+    def query_stats(self, group_by: str = 'statement') -> List[Dict[str, Any]]:
+        """計測中のSQL文ごと（group_by='method' なら呼び出し元メソッドごと）の集計
+        
+        回数・行数と、所要時間の合計・平均・p50/p95/p99・最大（ミリ秒）を合計時間の降順で返す。
+        """
+        if self._instrumentation is None:
+            raise ValueError("計測が有効ではありません（enable_instrumentation を呼んでください）")
+        return self._instrumentation.stats.summary(group_by)
+    
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """しきい値を超えた文の記録（古い順）"""
+        if self._instrumentation is None:
+            raise ValueError("計測が有効ではありません（enable_instrumentation を呼んでください）")
+        return list(self._instrumentation.slow_queries)
+    
+    def close(self):
+        """プール内の全接続を閉じる（以後の呼び出しでは新しい接続が作られる）"""
+        if os.getpid() != self._pid:
+            return
+        with self._watch_lock:
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+                self._watch_conn = None
+        if not self.pooled:
+            return
+        with self._pool_lock:
+            connections = self._pool_connections
+            self._reset_pool()
+        for conn in connections:
             conn.close()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _invalidate_caches(self):
+        """書き込み後にメモリ上の派生データを破棄"""
+        self._concept_graph = None
+        self._concept_snapshots = {}
+        if self._result_cache is not None:
+            self._result_cache.clear()
+    
+    def _check_external_changes(self):
+        """他の接続・プロセスによるコミットを PRAGMA data_version で検出してキャッシュを破棄
+        
+        data_version は同じ接続から見て他の接続がコミットした場合にのみ変化するため、
+        監視専用の長寿命接続で値を比較する。
+        """
+        with self._watch_lock:
+            if self._watch_conn is None or self._watch_pid != os.getpid():
+                # fork後は親の監視接続を閉じずに手放す
+                self._watch_conn = _sqlite_connect(self.db_path, check_same_thread=False)
+                self._watch_pid = os.getpid()
+                self._data_version = None
+            version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = self._data_version is not None and version != self._data_version
+            self._data_version = version
+        if changed:
+            self._invalidate_caches()
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """結果キャッシュのヒット・ミス・追い出し・無効化の回数と現在のサイズ"""
+        if self._result_cache is None:
+            return {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0,
+                    'size': 0, 'maxsize': 0}
+        return self._result_cache.stats()
+    
+    def _ensure_schema(self):
+        """記録されたスキーマの版が古いときだけ setup_database を実行（一致すれば読み取り1回のみ）"""
+        with self.get_connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"このデータベースのスキーマ（版 {version}）はこのバージョンより新しいため開けません")
+        if version < SCHEMA_VERSION:
+            self.setup_database()
+    
     def setup_database(self):
-        """データベースとテーブルを作成"""
+        """データベースとテーブルを作成し、スキーマの版を記録"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
@@ -212,22 +2112,345 @@ class MetaphysicsDB:
                 if statement.strip():
                     cursor.execute(statement)
             
+            # 多態キーの索引（既存DBファイルにもここで追加される）
+            for index_name, definition in INDEX_DEFINITIONS.items():
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {definition}")
+            
+            self._setup_natural_keys(conn)
+            self._setup_concept_registry(conn)
+            self._setup_relation_summaries(conn)
+            self._setup_search_index(conn)
+            
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
+            self._load_schema_cache(conn)
             print("✅ データベーステーブルを作成しました")
+    
+    def _setup_natural_keys(self, conn: sqlite3.Connection):
+        """自然キーの一意索引を作成（索引のないテーブルは先に重複を1行にまとめる）
+        
+        版1までは insert_sample_data を実行するたびに同じ概念・関係が増えていたため、
+        初回だけ最小の id の行を残して重複を削除し、関係・矛盾・文化的解釈の参照を残した行へ付け替える。
+        削除と付け替えは通常の DELETE・UPDATE なので、概念台帳や集計表はトリガーで追従する。
+        """
+        existing = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        missing = [table for table in NATURAL_KEYS
+                   if f"idx_{table}_natural_key" not in existing]
+        if not missing:
+            return
+        
+        def create_index(table: str) -> bool:
+            """一意索引を作成（重複があれば False。失敗した文だけが取り消される）"""
+            try:
+                conn.execute(f"""
+                    CREATE UNIQUE INDEX idx_{table}_natural_key
+                    ON {table} ({NATURAL_KEY_TARGETS[table]})
+                """)
+            except sqlite3.IntegrityError:
+                return False
+            return True
+        
+        def duplicates_of(table: str) -> List[Tuple[int, int]]:
+            """(重複行の id, 残す行の id) の一覧"""
+            return conn.execute(f"""
+                SELECT id, keep_id FROM (
+                    SELECT id, MIN(id) OVER (PARTITION BY {NATURAL_KEY_TARGETS[table]}) AS keep_id
+                    FROM {table}
+                )
+                WHERE id <> keep_id
+            """).fetchall()
+        
+        conn.execute("BEGIN")
+        try:
+            # 重複の検出には全件の並べ替えが要るため、まず索引の作成を試し、失敗したテーブルだけ調べる
+            merged = 0
+            for table in missing:
+                if table not in CONCEPT_TABLES or create_index(table):
+                    continue
+                pairs = duplicates_of(table)
+                if 'concept_relations' not in missing:
+                    # 参照の付け替えで関係が重複しうるため、関係の一意索引も作り直す
+                    conn.execute("DROP INDEX idx_concept_relations_natural_key")
+                    missing.append('concept_relations')
+                for referencing, columns in REFERENCE_COLUMNS.items():
+                    for table_column, id_column, _ in columns:
+                        conn.executemany(f"""
+                            UPDATE {referencing} SET {id_column} = ?
+                            WHERE {table_column} = '{table}' AND {id_column} = ?
+                        """, [(keep_id, duplicate_id) for duplicate_id, keep_id in pairs])
+                conn.executemany(f"DELETE FROM {table} WHERE id = ?",
+                                 [(duplicate_id,) for duplicate_id, _ in pairs])
+                merged += len(pairs)
+                create_index(table)
+            
+            removed = 0
+            if 'concept_relations' in missing and not create_index('concept_relations'):
+                duplicate_ids = [(duplicate_id,) for duplicate_id, _ in duplicates_of('concept_relations')]
+                conn.executemany("DELETE FROM concept_relations WHERE id = ?", duplicate_ids)
+                removed = len(duplicate_ids)
+                create_index('concept_relations')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if merged or removed:
+            print(f"✅ 重複していた概念 {merged} 件・関係 {removed} 件を削除しました")
+    
+    def _setup_concept_registry(self, conn: sqlite3.Connection):
+        """全概念テーブルを横断する概念台帳と同期用トリガーを作成（初回は既存行を登録）"""
+        exists = conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_registry'
+        """).fetchone()
+        conn.executescript(CONCEPT_REGISTRY_SQL)
+        
+        for number, table in enumerate(CONCEPT_TABLES):
+            key = f"({number} << {CONCEPT_KEY_SHIFT})"
+            if exists is None:
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO concept_registry
+                    (concept_key, concept_table, concept_id, name, cultural_context)
+                    SELECT {key} + id, '{table}', id, name, cultural_context FROM {table}
+                """)
+            conn.executescript(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_registry_insert
+                AFTER INSERT ON {table}
+                BEGIN
+                    INSERT INTO concept_registry
+                    (concept_key, concept_table, concept_id, name, cultural_context)
+                    VALUES ({key} + NEW.id, '{table}', NEW.id, NEW.name, NEW.cultural_context);
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_registry_delete
+                AFTER DELETE ON {table}
+                BEGIN
+                    DELETE FROM concept_registry WHERE concept_key = {key} + OLD.id;
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_registry_update
+                AFTER UPDATE OF id, name, cultural_context ON {table}
+                BEGIN
+                    UPDATE concept_registry
+                    SET concept_key = {key} + NEW.id, concept_id = NEW.id,
+                        name = NEW.name, cultural_context = NEW.cultural_context
+                    WHERE concept_key = {key} + OLD.id;
+                END;
+            """)
+    
+    def _setup_relation_summaries(self, conn: sqlite3.Connection):
+        """concept_relations の集計表と増分更新用トリガーを作成（初回は既存行から集計）"""
+        exists = conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_degree'
+        """).fetchone()
+        conn.executescript(RELATION_SUMMARY_SQL)
+        if exists is None:
+            self._fill_relation_summaries(conn)
+        for sql in RELATION_SUMMARY_TRIGGERS.values():
+            conn.execute(sql)
+    
+    def _fill_relation_summaries(self, conn: sqlite3.Connection):
+        """concept_relations 全体から集計表を作り直す（呼び出し側のトランザクション内で実行）"""
+        for table in ('relation_table_stats', 'concept_degree', 'relation_culture_stats'):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("""
+            INSERT INTO relation_table_stats (source_table, connection_count)
+            SELECT source_table, COUNT(*) FROM concept_relations GROUP BY source_table
+        """)
+        conn.execute("""
+            INSERT INTO relation_culture_stats
+            (cultural_specificity, count, strength_count, strength_sum)
+            SELECT cultural_specificity, COUNT(*), COUNT(strength), TOTAL(strength)
+            FROM concept_relations
+            WHERE cultural_specificity IS NOT NULL
+            GROUP BY cultural_specificity
+        """)
+        conn.execute("""
+            INSERT INTO concept_degree
+            (concept_table, concept_id, out_degree, out_strength_count, out_strength_sum,
+             in_degree, in_strength_count, in_strength_sum)
+            SELECT concept_table, concept_id,
+                   SUM(out_degree), SUM(out_strength_count), TOTAL(out_strength_sum),
+                   SUM(in_degree), SUM(in_strength_count), TOTAL(in_strength_sum)
+            FROM (
+                SELECT source_table AS concept_table, source_id AS concept_id,
+                       COUNT(*) AS out_degree, COUNT(strength) AS out_strength_count,
+                       TOTAL(strength) AS out_strength_sum,
+                       0 AS in_degree, 0 AS in_strength_count, 0.0 AS in_strength_sum
+                FROM concept_relations GROUP BY source_table, source_id
+                UNION ALL
+                SELECT target_table, target_id, 0, 0, 0.0,
+                       COUNT(*), COUNT(strength), TOTAL(strength)
+                FROM concept_relations GROUP BY target_table, target_id
+            )
+            GROUP BY concept_table, concept_id
+        """)
+    
+    def rebuild_relation_summaries(self):
+        """関係の集計表を concept_relations から作り直す
+        
+        通常はトリガーで常に最新に保たれる。INSERT OR REPLACE による置き換えなど
+        削除トリガーが動かない操作の後や、増減の繰り返しで浮動小数の誤差が気になる場合に使う。
+        """
+        with self.get_connection() as conn:
+            conn.execute("BEGIN")
+            self._fill_relation_summaries(conn)
+            conn.commit()
+        self._invalidate_caches()
+    
+    def _setup_search_index(self, conn: sqlite3.Connection):
+        """全文検索索引と同期用トリガーを作成（初回作成時は既存行を取り込む）"""
+        exists = conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_search'
+        """).fetchone()
+        if exists is None:
+            # trigram は SQLite 3.34 以降。使えない環境では unicode61 にフォールバック
+            for tokenizer in ('trigram', 'unicode61'):
+                try:
+                    conn.execute(f"""
+                        CREATE VIRTUAL TABLE concept_search USING fts5(
+                            name, definition, cultural_context, tokenize = '{tokenizer}'
+                        )
+                    """)
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            else:
+                return  # FTS5 なしでビルドされた SQLite
+            for number, table in enumerate(SEARCH_SOURCE_TABLES):
+                name, definition, context = SEARCH_COLUMNS.get(table, SEARCH_COLUMNS[None])
+                conn.execute(f"""
+                    INSERT INTO concept_search (rowid, name, definition, cultural_context)
+                    SELECT ({number} << {CONCEPT_KEY_SHIFT}) + id, {name}, {definition}, {context}
+                    FROM {table}
+                """)
+        
+        self._setup_search_grams(conn)
+        
+        for number, table in enumerate(SEARCH_SOURCE_TABLES):
+            name, definition, context = SEARCH_COLUMNS.get(table, SEARCH_COLUMNS[None])
+            new_values = (f"({number} << {CONCEPT_KEY_SHIFT}) + NEW.id, "
+                          + ', '.join(f"NEW.{col}" if col != 'NULL' else col
+                                      for col in (name, definition, context)))
+            conn.executescript(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert
+                AFTER INSERT ON {table}
+                BEGIN
+                    INSERT INTO concept_search (rowid, name, definition, cultural_context)
+                    VALUES ({new_values});
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete
+                AFTER DELETE ON {table}
+                BEGIN
+                    DELETE FROM concept_search
+                    WHERE rowid = ({number} << {CONCEPT_KEY_SHIFT}) + OLD.id;
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update
+                AFTER UPDATE ON {table}
+                BEGIN
+                    DELETE FROM concept_search
+                    WHERE rowid = ({number} << {CONCEPT_KEY_SHIFT}) + OLD.id;
+                    INSERT INTO concept_search (rowid, name, definition, cultural_context)
+                    VALUES ({new_values});
+                END;
+            """)
+    
+    def _setup_search_grams(self, conn: sqlite3.Connection):
+        """短い語の検索用の n-gram 副索引と同期用トリガーを作成（初回作成時は既存行を取り込む）"""
+        conn.execute("CREATE TABLE IF NOT EXISTS search_gram_positions (n INTEGER PRIMARY KEY)")
+        conn.execute("""
+            WITH RECURSIVE p(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM p WHERE n < ?)
+            INSERT OR IGNORE INTO search_gram_positions SELECT n FROM p
+        """, (SEARCH_GRAM_MAX_LENGTH,))
+        exists = conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_search_grams'
+        """).fetchone()
+        if exists is None:
+            self._fill_search_grams(conn)
+        for sql in SEARCH_GRAM_TRIGGERS.values():
+            conn.execute(sql)
+    
+    def _fill_search_grams(self, conn: sqlite3.Connection):
+        """concept_search から n-gram の副索引を作り直す（呼び出し側のトランザクション内で実行）"""
+        conn.execute("DROP TABLE IF EXISTS concept_search_grams")
+        conn.execute("""
+            CREATE VIRTUAL TABLE concept_search_grams USING fts5(
+                name, definition, cultural_context, tokenize = 'unicode61'
+            )
+        """)
+        conn.execute(f"""
+            INSERT INTO concept_search_grams (rowid, name, definition, cultural_context)
+            SELECT rowid, {_search_grams_sql('name')}, {_search_grams_sql('definition')},
+                   {_search_grams_sql('cultural_context')}
+            FROM concept_search
+        """)
+    
+    def _load_schema_cache(self, conn: sqlite3.Connection):
+        """各データテーブルの列情報と INSERT 文をキャッシュ"""
+        table_columns = {}
+        insertable_columns = {}
+        for table in DATA_TABLES:
+            table_info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+            table_columns[table] = tuple(col[1] for col in table_info)
+            # id列は自動採番に任せる（strength・created_at など DEFAULT 値のある列は指定できる）
+            insertable_columns[table] = tuple(col[1] for col in table_info if col[1] != 'id')
+        self._insertable_columns = insertable_columns
+        self._insert_statements = {}
+        # 最後に代入し、他スレッドから読み込み途中の状態が見えないようにする
+        self._table_columns = table_columns
+    
+    def _schema_cache(self) -> Dict[str, Tuple[str, ...]]:
+        """列情報のキャッシュ（起動時には読まず、初めて必要になったときに読み込む）"""
+        if self._table_columns is None:
+            with self.get_connection() as conn:
+                self._load_schema_cache(conn)
+        return self._table_columns
+    
+    def _columns_of(self, table: str) -> Tuple[str, ...]:
+        """キャッシュ済みのテーブル列一覧（未知のテーブルは ValueError）"""
+        try:
+            return self._schema_cache()[table]
+        except KeyError:
+            raise ValueError(f"未知のテーブルです: {table}") from None
+    
+    def _insert_statement(self, table: str, columns: Tuple[str, ...],
+                          returning: bool = False) -> str:
+        """列の組ごとに INSERT 文を組み立ててキャッシュ
+        
+        自然キーを持つテーブルでは、キーが一致する既存行の残りの列を更新する upsert にする。
+        returning=True なら追加・更新した行の id を返す（更新時は lastrowid が変わらないため）。
+        同一の文字列を再利用することで sqlite3 のステートメントキャッシュが効く。
+        """
+        key = (table, columns, returning)
+        statement = self._insert_statements.get(key)
+        if statement is None:
+            statement = (f"INSERT INTO {table} ({','.join(columns)}) "
+                         f"VALUES ({','.join('?' * len(columns))})")
+            natural_key = NATURAL_KEYS.get(table)
+            if natural_key is not None:
+                # キーの列しか指定されていなくても RETURNING が行を返すよう、何も変えない代入を置く
+                updates = ', '.join(f"{col} = excluded.{col}"
+                                    for col in columns if col not in natural_key)
+                statement += (f" ON CONFLICT ({NATURAL_KEY_TARGETS[table]})"
+                              f" DO UPDATE SET {updates or 'id = id'}")
+            if returning:
+                statement += " RETURNING id"
+            self._insert_statements[key] = statement
+        return statement
 
     def insert_sample_data(self):
-        """サンプルデータを挿入"""
+        """サンプルデータを挿入（自然キーによる upsert のため、何度実行しても行は増えない）"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # テーブルごとに明示的にカラムを指定してサンプルデータを挿入
+            # テーブルごとに明示的にカラムを指定してサンプルデータを挿入（全体で1トランザクション）
             
             # 存在概念
-            cursor.executemany("""
-                INSERT OR REPLACE INTO existence_concepts 
-                (name, cultural_context, definition, abstraction_level, temporal_aspect, spatial_aspect)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, [
+            cursor.executemany(self._insert_statement('existence_concepts', (
+                'name', 'cultural_context', 'definition', 'abstraction_level',
+                'temporal_aspect', 'spatial_aspect',
+            )), [
                 ('存在', 'western', 'ハイデガーの根本概念、現存在の基盤', 10, True, True),
                 ('有', 'buddhist', '一切法有、現象界の存在性', 9, True, True),
                 ('実在', 'western', 'プラトンのイデア界の実体', 10, False, False),
@@ -235,14 +2458,11 @@ class MetaphysicsDB:
                 ('Being', 'western', 'ハイデガーのSein概念', 10, True, True),
             ])
             
-            conn.commit()
-            
             # 無・空・虚無概念
-            cursor.executemany("""
-                INSERT OR REPLACE INTO nothingness_concepts
-                (name, cultural_context, definition, type, relation_to_existence, paradox_level)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, [
+            cursor.executemany(self._insert_statement('nothingness_concepts', (
+                'name', 'cultural_context', 'definition', 'type',
+                'relation_to_existence', 'paradox_level',
+            )), [
                 ('無', 'daoist', '道教の根本概念、有を生み出す源', 'daoist_wu', '有を生成する', 8),
                 ('空', 'buddhist', '縁起による実体の空性', 'buddhist_emptiness', '固定実体の否定', 9),
                 ('虚無', 'western', '絶対的な無、存在の完全否定', 'absolute_void', '存在との対立', 7),
@@ -250,11 +2470,10 @@ class MetaphysicsDB:
             ])
             
             # 時間概念
-            cursor.executemany("""
-                INSERT OR REPLACE INTO time_concepts
-                (name, cultural_context, definition, linearity, objectivity, measurement_unit, arrow_direction)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [
+            cursor.executemany(self._insert_statement('time_concepts', (
+                'name', 'cultural_context', 'definition', 'linearity',
+                'objectivity', 'measurement_unit', 'arrow_direction',
+            )), [
                 ('時間', 'western_newton', 'ニュートンの絶対時間', True, 'absolute', 'second', 'forward'),
                 ('時空', 'western_einstein', 'アインシュタインの相対論的時空', True, 'relative', 'spacetime_interval', 'forward'),
                 ('劫', 'buddhist', '仏教の宇宙論的時間単位', False, 'illusory', 'kalpa', 'none'),
@@ -262,33 +2481,30 @@ class MetaphysicsDB:
             ])
             
             # 神・絶対者概念
-            cursor.executemany("""
-                INSERT OR REPLACE INTO divine_concepts
-                (name, cultural_context, definition, transcendence_level, immanence_level, personality, causality_role)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [
+            cursor.executemany(self._insert_statement('divine_concepts', (
+                'name', 'cultural_context', 'definition', 'transcendence_level',
+                'immanence_level', 'personality', 'causality_role',
+            )), [
                 ('神', 'western_christian', 'キリスト教の創造神', 10, 3, True, 'first_cause'),
                 ('ブラフマン', 'hindu', 'ウパニシャッドの根本実在', 10, 10, False, 'sustaining_cause'),
                 ('道', 'daoist', '老子の根本原理', 8, 10, False, 'no_cause'),
             ])
             
             # 道・根本原理概念
-            cursor.executemany("""
-                INSERT OR REPLACE INTO dao_concepts
-                (name, cultural_context, definition, expressability, action_principle, universality_scope, knowability)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [
+            cursor.executemany(self._insert_statement('dao_concepts', (
+                'name', 'cultural_context', 'definition', 'expressability',
+                'action_principle', 'universality_scope', 'knowability',
+            )), [
                 ('道', 'daoist', '老子の道徳経の根本概念', False, 'wu_wei', 'cosmic', 'experiential_only'),
                 ('ダルマ', 'buddhist', '仏教の法・真理', True, 'dharma', 'universal', 'partially_knowable'),
                 ('ロゴス', 'western_ancient', 'ヘラクレイトスの理性原理', True, 'logos', 'cosmic', 'knowable'),
             ])
             
             # 意識・精神概念
-            cursor.executemany("""
-                INSERT OR REPLACE INTO consciousness_concepts
-                (name, cultural_context, definition, embodiment, unity, privacy_level, computational)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [
+            cursor.executemany(self._insert_statement('consciousness_concepts', (
+                'name', 'cultural_context', 'definition', 'embodiment',
+                'unity', 'privacy_level', 'computational',
+            )), [
                 ('意識', 'western_modern', '現代哲学の心の問題', 'embodied', True, 8, False),
                 ('心', 'buddhist', '仏教の心識論', 'both', False, 6, False),
                 ('魂', 'western_ancient', 'プラトンの霊魂論', 'disembodied', True, 10, False),
@@ -303,126 +2519,276 @@ class MetaphysicsDB:
                 ConceptRelation('consciousness_concepts', 1, 'existence_concepts', 1, 'realizes', 0.6, 'western_modern', 'contingent', 'contextual'),
             ]
             
-            for rel in relations:
-                cursor.execute("""
-                    INSERT INTO concept_relations 
-                    (source_table, source_id, target_table, target_id, relation_type, 
-                     strength, cultural_specificity, logical_necessity, temporal_stability)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (rel.source_table, rel.source_id, rel.target_table, rel.target_id, 
-                      rel.relation_type, rel.strength, rel.cultural_specificity, 
-                      rel.logical_necessity, rel.temporal_stability))
+            columns = tuple(field.name for field in fields(ConceptRelation))
+            cursor.executemany(self._insert_statement('concept_relations', columns),
+                               [astuple(rel) for rel in relations])
             
             conn.commit()
+            self._invalidate_caches()
             print("✅ サンプルデータを挿入しました")
 
+    def _iter_query(self, sql: str, params=(), row_type: str = 'dict',
+                    batch_size: int = 500, read_only: bool = False):
+        """SELECT 文の結果を fetchmany で batch_size 行ずつ取得しながら1行ずつ返す
+        
+        sqlite3.Row を経由せずタプルから直接 row_type の行を作るため、
+        結果全体を保持することはない。接続は最後の行を返すか close() されるまで保持する。
+        read_only=True なら書き込みを含む文を SQLite 側で拒否させる。
+        """
+        with self.get_connection() as conn:
+            if read_only:
+                conn.execute("PRAGMA query_only = ON")
+            try:
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                cursor.execute(sql, params)
+                convert = _row_converter([column[0] for column in cursor.description], row_type)
+                try:
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield convert(row)
+                finally:
+                    cursor.close()
+            finally:
+                if read_only:
+                    conn.execute("PRAGMA query_only = OFF")
+
+    def _cross_cultural_rows(self, row_type: str = 'dict', batch_size: int = 500):
+        """文化横断的概念の行を返す（一覧版と iter_ 版で共有）"""
+        yield from self._iter_query("""
+            SELECT 
+                ec.name as existence_concept,
+                ec.cultural_context as existence_culture,
+                nc.name as nothingness_concept,
+                nc.cultural_context as nothingness_culture,
+                cr.relation_type,
+                cr.strength
+            FROM concept_relations cr
+            JOIN concept_registry ec ON ec.concept_table = cr.source_table AND ec.concept_id = cr.source_id
+            JOIN concept_registry nc ON nc.concept_table = cr.target_table AND nc.concept_id = cr.target_id
+            WHERE cr.source_table = 'existence_concepts' AND cr.target_table = 'nothingness_concepts'
+            UNION
+            SELECT 
+                nc.name as existence_concept,
+                nc.cultural_context as existence_culture,
+                ec.name as nothingness_concept,
+                ec.cultural_context as nothingness_culture,
+                cr.relation_type,
+                cr.strength
+            FROM concept_relations cr
+            JOIN concept_registry nc ON nc.concept_table = cr.source_table AND nc.concept_id = cr.source_id
+            JOIN concept_registry ec ON ec.concept_table = cr.target_table AND ec.concept_id = cr.target_id
+            WHERE cr.source_table = 'nothingness_concepts' AND cr.target_table = 'existence_concepts'
+            ORDER BY strength DESC
+        """, row_type=row_type, batch_size=batch_size)
+
+    @_cached_result
     def query_cross_cultural_concepts(self) -> List[Dict]:
         """文化横断的概念を検索"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    ec.name as existence_concept,
-                    ec.cultural_context as existence_culture,
-                    nc.name as nothingness_concept,
-                    nc.cultural_context as nothingness_culture,
-                    cr.relation_type,
-                    cr.strength
-                FROM concept_relations cr
-                JOIN existence_concepts ec ON cr.source_table = 'existence_concepts' AND cr.source_id = ec.id
-                JOIN nothingness_concepts nc ON cr.target_table = 'nothingness_concepts' AND cr.target_id = nc.id
-                UNION
-                SELECT 
-                    nc.name as existence_concept,
-                    nc.cultural_context as existence_culture,
-                    ec.name as nothingness_concept,
-                    ec.cultural_context as nothingness_culture,
-                    cr.relation_type,
-                    cr.strength
-                FROM concept_relations cr
-                JOIN nothingness_concepts nc ON cr.source_table = 'nothingness_concepts' AND cr.source_id = nc.id
-                JOIN existence_concepts ec ON cr.target_table = 'existence_concepts' AND cr.target_id = ec.id
-                ORDER BY strength DESC
-            """)
-            return [dict(row) for row in cursor.fetchall()]
+        return list(self._cross_cultural_rows())
 
-    def find_god_independent_concepts(self) -> Dict[str, List[Dict]]:
-        """神に依存しない根本概念を特定"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 各概念テーブルから神の創造に依存しない概念を抽出
-            tables = ['existence_concepts', 'nothingness_concepts', 'dao_concepts', 'consciousness_concepts']
-            results = {}
-            
-            for table in tables:
-                cursor.execute(f"""
-                    SELECT name, cultural_context, definition
-                    FROM {table}
-                    WHERE id NOT IN (
-                        SELECT target_id 
-                        FROM concept_relations 
-                        WHERE target_table = ? 
-                        AND source_table = 'divine_concepts' 
-                        AND relation_type IN ('creates', 'generates', 'causes')
-                    )
-                """, (table,))
-                results[table] = [dict(row) for row in cursor.fetchall()]
-            
-            return results
+    def iter_cross_cultural_concepts(self, row_type: str = 'dict', batch_size: int = 500):
+        """query_cross_cultural_concepts の結果を1行ずつ返すジェネレーター
+        
+        row_type: 'dict'（既定）/ 'tuple' / 'namedtuple'
+        """
+        yield from self._cross_cultural_rows(row_type, batch_size)
 
-    def analyze_paradoxes(self) -> List[Dict]:
-        """パラドックス・矛盾を分析"""
+    @_cached_result
+    def find_god_independent_concepts(self, parallel: bool = False,
+                                      workers: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """神に依存しない根本概念を特定
+        
+        神が創造した概念の集合は全テーブル分を1回だけ求め、各テーブルの反結合で共有する。
+        既定では集合と各テーブルの行を1つの読み取りトランザクションで読み、
+        並行する書き込みがあっても同じ時点のデータから結果を作る。
+        parallel=True ならテーブルごとの行の走査を読み取り専用接続のワーカーに分散する
+        （集合は呼び出し側の接続で先に求めて渡すため、各ワーカーが行を読む時点とは異なりうる）。
+        """
+        # 各概念テーブルから神の創造に依存しない概念を抽出
+        tables = ['existence_concepts', 'nothingness_concepts', 'dao_concepts', 'consciousness_concepts']
+        
+        def created_sets(conn) -> Dict[str, set]:
+            created: Dict[str, set] = {table: set() for table in tables}
+            for table, concept_id in conn.execute("""
+                SELECT DISTINCT target_table, target_id
+                FROM concept_relations
+                WHERE source_table = 'divine_concepts'
+                  AND relation_type IN ('creates', 'generates', 'causes')
+            """):
+                if table in created:
+                    created[table].add(concept_id)
+            return created
+        
+        def independent(conn, table, created):
+            return [{'name': name, 'cultural_context': context, 'definition': definition}
+                    for concept_id, name, context, definition in conn.execute(f"""
+                        SELECT id, name, cultural_context, definition FROM {table}
+                    """) if concept_id not in created]
+        
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    ec.name as existence_name,
-                    ec.cultural_context as existence_culture,
-                    nc.name as nothingness_name,
-                    nc.cultural_context as nothingness_culture,
-                    nc.paradox_level,
-                    cr.relation_type,
-                    cr.strength,
-                    cr.logical_necessity
-                FROM concept_relations cr
-                JOIN existence_concepts ec ON (
-                    (cr.source_table = 'existence_concepts' AND cr.source_id = ec.id) OR
-                    (cr.target_table = 'existence_concepts' AND cr.target_id = ec.id)
-                )
-                JOIN nothingness_concepts nc ON (
-                    (cr.source_table = 'nothingness_concepts' AND cr.source_id = nc.id) OR
-                    (cr.target_table = 'nothingness_concepts' AND cr.target_id = nc.id)
-                )
-                WHERE nc.paradox_level >= 7
-                ORDER BY nc.paradox_level DESC, cr.strength DESC
-            """)
-            return [dict(row) for row in cursor.fetchall()]
+            # 呼び出し側が既にトランザクション中なら、その中でそのまま読む
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                conn.execute("BEGIN")
+            try:
+                created = created_sets(conn)
+                if not parallel:
+                    return {table: independent(conn, table, created[table]) for table in tables}
+            finally:
+                if own_transaction:
+                    conn.rollback()
+        
+        def read_table(conn, table):
+            return independent(conn, table, created[table])
+        
+        return dict(zip(tables, self._map_tables(read_table, tables, workers)))
+
+    @_cached_result
+    def analyze_paradoxes(self, min_paradox_level: int = 7,
+                          concept_table: str = 'existence_concepts',
+                          paradox_table: str = 'nothingness_concepts',
+                          limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """パラドックス・矛盾を分析
+        
+        concept_table と paradox_table（paradox_level 列を持つ表）を結ぶ関係を
+        両方向について索引で検索する。各関係は1行のみ返し、
+        limit/offset でページングできる（並び順は relation_id で安定化）。
+        """
+        return list(self._paradox_rows(min_paradox_level, concept_table, paradox_table,
+                                       limit, offset))
+
+    def iter_paradoxes(self, min_paradox_level: int = 7,
+                       concept_table: str = 'existence_concepts',
+                       paradox_table: str = 'nothingness_concepts',
+                       limit: Optional[int] = None, offset: int = 0,
+                       row_type: str = 'dict', batch_size: int = 500):
+        """analyze_paradoxes の結果を1行ずつ返すジェネレーター
+        
+        row_type: 'dict'（既定）/ 'tuple' / 'namedtuple'
+        """
+        yield from self._paradox_rows(min_paradox_level, concept_table, paradox_table,
+                                      limit, offset, row_type, batch_size)
+
+    def _paradox_rows(self, min_paradox_level: int, concept_table: str, paradox_table: str,
+                      limit: Optional[int], offset: int, row_type: str = 'dict',
+                      batch_size: int = 500):
+        """パラドックス分析の行を返す（一覧版と iter_ 版で共有）"""
+        for table in (concept_table, paradox_table):
+            if table not in CONCEPT_TABLES:
+                raise ValueError(f"未知の概念テーブルです: {table}")
+        if concept_table == paradox_table:
+            raise ValueError("concept_table と paradox_table には異なるテーブルを指定してください")
+        
+        if 'paradox_level' not in self._columns_of(paradox_table):
+            raise ValueError(f"{paradox_table} に paradox_level 列がありません")
+        
+        # OR結合は索引を使えないため、向きごとに索引検索して UNION ALL で連結する
+        # （2つの分岐は source_table が異なるので同じ関係が重複することはない）
+        # CROSS JOIN で結合順を固定し、paradox_level で絞った側から関係索引を引く
+        branch = f"""
+            SELECT 
+                ec.name as existence_name,
+                ec.cultural_context as existence_culture,
+                nc.name as nothingness_name,
+                nc.cultural_context as nothingness_culture,
+                nc.paradox_level,
+                cr.relation_type,
+                cr.strength,
+                cr.logical_necessity,
+                cr.id as relation_id
+            FROM {paradox_table} nc
+            CROSS JOIN concept_relations cr 
+                ON cr.{{paradox_side}}_table = ? AND cr.{{paradox_side}}_id = nc.id
+                AND cr.{{concept_side}}_table = ?
+            JOIN {concept_table} ec ON ec.id = cr.{{concept_side}}_id
+            WHERE nc.paradox_level >= ?
+        """
+        sql = (
+            branch.format(paradox_side='source', concept_side='target')
+            + " UNION ALL "
+            + branch.format(paradox_side='target', concept_side='source')
+            + " ORDER BY paradox_level DESC, strength DESC, relation_id LIMIT ? OFFSET ?"
+        )
+        params = (paradox_table, concept_table, min_paradox_level) * 2
+        yield from self._iter_query(sql, params + (-1 if limit is None else limit, offset),
+                                    row_type, batch_size)
+
+    def iter_relations(self, after: Optional[Tuple[float, int]] = None,
+                       limit: Optional[int] = None, min_strength: Optional[float] = None,
+                       relation_types: Optional[List[str]] = None,
+                       row_type: str = 'dict', batch_size: int = 500):
+        """concept_relations を強度の降順（同じ強度は id の降順、強度のない行は最後）で1行ずつ返すジェネレーター
+        
+        after に前ページ最後の行の (strength, id) を渡すと、その続きから返す
+        （キーセット方式のため、ページが進んでも OFFSET のように読み飛ばしが増えない）。
+        強度が NULL の行は行値の比較が真にならないため、NULL の側を別の条件で続ける。
+        row_type: 'dict'（既定）/ 'tuple' / 'namedtuple'
+        """
+        conditions, params = [], []
+        if after is not None:
+            strength, last_id = after
+            if strength is None:
+                conditions.append("strength IS NULL AND id < ?")
+                params.append(last_id)
+            else:
+                conditions.append("((strength IS NOT NULL AND (strength, id) < (?, ?)) OR strength IS NULL)")
+                params.extend([strength, last_id])
+        if min_strength is not None:
+            conditions.append("strength >= ?")
+            params.append(min_strength)
+        if relation_types:
+            conditions.append(f"relation_type IN ({','.join('?' * len(relation_types))})")
+            params.extend(relation_types)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(-1 if limit is None else limit)
+        yield from self._iter_query(f"""
+            SELECT * FROM concept_relations{where}
+            ORDER BY strength IS NULL, strength DESC, id DESC
+            LIMIT ?
+        """, params, row_type, batch_size)
 
+    @_cached_result
     def concept_network_analysis(self) -> Dict[str, Any]:
         """概念ネットワーク分析"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # 最も関係性の多い概念
+            # 最も関係性の多い概念（集計表はトリガーで常に最新）
             cursor.execute("""
-                SELECT 
-                    source_table,
-                    COUNT(*) as connection_count
-                FROM concept_relations 
-                GROUP BY source_table
-                ORDER BY connection_count DESC
+                SELECT source_table, connection_count
+                FROM relation_table_stats
+                ORDER BY connection_count DESC, source_table
             """)
             hub_tables = [dict(row) for row in cursor.fetchall()]
             
-            # 最も強い関係性
+            # 最も強い関係性（強度索引を後ろから10件たどるだけなので集計表は持たない）
+            # 索引の範囲検索にするため強度のある関係とない関係に分け、足りない分だけ
+            # NULL の関係で埋める（ORDER BY strength DESC と同じく NULL は最後）
             cursor.execute("""
                 SELECT 
-                    source_table, target_table, relation_type, strength,
-                    cultural_specificity, logical_necessity
-                FROM concept_relations 
-                ORDER BY strength DESC 
-                LIMIT 10
+                    top.source_table, top.target_table, top.relation_type, top.strength,
+                    top.cultural_specificity, top.logical_necessity,
+                    src.name as source_name, tgt.name as target_name
+                FROM (
+                    SELECT * FROM (
+                        SELECT * FROM concept_relations WHERE strength IS NOT NULL
+                        ORDER BY strength DESC LIMIT 10
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT * FROM concept_relations WHERE strength IS NULL LIMIT 10
+                    )
+                    ORDER BY strength DESC LIMIT 10
+                ) top
+                LEFT JOIN concept_registry src
+                    ON src.concept_table = top.source_table AND src.concept_id = top.source_id
+                LEFT JOIN concept_registry tgt
+                    ON tgt.concept_table = top.target_table AND tgt.concept_id = top.target_id
+                ORDER BY top.strength DESC
             """)
             strongest_relations = [dict(row) for row in cursor.fetchall()]
             
@@ -430,12 +2796,11 @@ class MetaphysicsDB:
             cursor.execute("""
                 SELECT 
                     cultural_specificity,
-                    COUNT(*) as count,
-                    AVG(strength) as avg_strength
-                FROM concept_relations 
-                WHERE cultural_specificity IS NOT NULL
-                GROUP BY cultural_specificity
-                ORDER BY count DESC
+                    count,
+                    CASE WHEN strength_count > 0
+                         THEN strength_sum / strength_count END as avg_strength
+                FROM relation_culture_stats
+                ORDER BY count DESC, cultural_specificity
             """)
             cultural_analysis = [dict(row) for row in cursor.fetchall()]
             
@@ -445,69 +2810,1759 @@ class MetaphysicsDB:
                 'cultural_analysis': cultural_analysis
             }
 
-    def add_custom_concept(self, table_name: str, **kwargs):
-        """カスタム概念を追加"""
+    def build_concept_graph(self) -> ConceptGraph:
+        """concept_relations を1回の一括読み込みでグラフ化（結果はキャッシュされる）"""
+        if self._result_cache is not None:
+            self._check_external_changes()
+        # 別スレッドの書き込みで破棄されても、取得・構築したグラフをそのまま返す
+        graph = self._concept_graph
+        if graph is None:
+            with self.get_connection() as conn:
+                # カーソルを直接走査し、行をためずに配列へ流し込む
+                cursor = conn.execute("""
+                    SELECT id, source_table, source_id, target_table, target_id,
+                           relation_type, strength
+                    FROM concept_relations
+                """)
+                graph = ConceptGraph.from_rows(cursor)
+            self._concept_graph = graph
+        return graph
+    
+    def _snapshot_tables(self, tables) -> Tuple[str, ...]:
+        tables = tuple(tables or CONCEPT_TABLES)
+        for table in tables:
+            if table not in CONCEPT_TABLES:
+                raise ValueError(f"未知の概念テーブルです: {table}")
+        return tables
+    
+    def concept_snapshot(self, tables: Optional[List[str]] = None) -> ConceptSnapshot:
+        """概念テーブル（既定は全て）の列指向スナップショット（NumPy が必要）
+        
+        書き込みや他の接続のコミットを検出するまではメモリ上のものを再利用する。
+        """
+        tables = self._snapshot_tables(tables)
+        self._check_external_changes()
+        snapshot = self._concept_snapshots.get(tables)
+        if snapshot is None:
+            with self.get_connection() as conn:
+                snapshot = ConceptSnapshot.from_connection(conn, tables)
+            self._concept_snapshots[tables] = snapshot
+        return snapshot
+    
+    def save_concept_snapshot(self, path: str, tables: Optional[List[str]] = None):
+        """列指向スナップショットを .npz に保存（再起動後に load_concept_snapshot で読み込む）"""
+        self.concept_snapshot(tables).save(path)
+        print(f"✅ 列指向スナップショットを {path} に保存しました")
+    
+    def load_concept_snapshot(self, path: str) -> ConceptSnapshot:
+        """.npz のスナップショットを読み込んでキャッシュに載せる
+        
+        テーブルごとの行数と最大 id が現在のデータベースと食い違う場合は読み込んだものを捨て、
+        データベースから作り直す（行の削除・追加は検出できるが、値だけの更新は検出できない）。
+        """
+        snapshot = ConceptSnapshot.load(path)
+        tables = self._snapshot_tables(list(snapshot.tables))
+        self._check_external_changes()
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # テーブル構造を取得
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            table_info = cursor.fetchall()
-            # id列とDEFAULT値のある列を除外
-            columns = []
-            for col in table_info:
-                col_name = col[1]
-                col_default = col[4]  # DEFAULT値
-                if col_name != 'id' and col_default is None:
-                    columns.append(col_name)
-            
-            # 提供されたキーワード引数から対応する値を取得
-            values = []
-            actual_columns = []
-            for col in columns:
-                if col in kwargs:
-                    actual_columns.append(col)
-                    values.append(kwargs[col])
-            
-            if not actual_columns:
-                raise ValueError("有効なカラムデータが提供されていません")
+            current = {table: tuple(conn.execute(
+                f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table}").fetchone())
+                for table in tables}
+        if current != snapshot.fingerprint():
+            self._concept_snapshots.pop(tables, None)
+            return self.concept_snapshot(tables)
+        self._concept_snapshots[tables] = snapshot
+        return snapshot
+    
+    def _resolve_concepts(self, keys) -> Dict[Tuple[str, int], Dict]:
+        """(table, id) のリストを概念台帳から名前・文化的背景に解決"""
+        concept_keys = [concept_key(table, concept_id)
+                        for table, concept_id in keys if table in CONCEPT_TABLES]
+        resolved = {}
+        with self.get_connection() as conn:
+            for i in range(0, len(concept_keys), 500):
+                chunk = concept_keys[i:i + 500]
+                for row in conn.execute(f"""
+                    SELECT concept_table, concept_id, name, cultural_context
+                    FROM concept_registry
+                    WHERE concept_key IN ({','.join('?' * len(chunk))})
+                """, chunk):
+                    resolved[(row['concept_table'], row['concept_id'])] = {
+                        'name': row['name'],
+                        'cultural_context': row['cultural_context'],
+                    }
+        return resolved
+    
+    def _ranked_concepts(self, graph: ConceptGraph, scores: List[float],
+                         top_n: Optional[int]) -> List[Dict]:
+        """スコア上位のノードを名前付きの辞書リストに変換"""
+        if top_n is None:
+            ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        else:
+            ranked = heapq.nlargest(top_n, range(len(scores)), key=scores.__getitem__)
+        keys = [graph.nodes[u] for u in ranked]
+        names = self._resolve_concepts(keys)
+        return [{
+            'concept_table': table,
+            'concept_id': concept_id,
+            'name': names.get((table, concept_id), {}).get('name'),
+            'cultural_context': names.get((table, concept_id), {}).get('cultural_context'),
+            'score': scores[u],
+        } for u, (table, concept_id) in zip(ranked, keys)]
+    
+    @_cached_result
+    def concept_pagerank(self, top_n: Optional[int] = 10, damping: float = 0.85) -> List[Dict]:
+        """関係強度で重み付けした PageRank によるハブ概念の特定"""
+        graph = self.build_concept_graph()
+        return self._ranked_concepts(graph, graph.pagerank(damping=damping), top_n)
+    
+    @_cached_result
+    def concept_centrality(self, measure: str = 'degree', top_n: Optional[int] = 10,
+                           sample_size: Optional[int] = None) -> List[Dict]:
+        """概念の中心性ランキング
+        
+        measure: 'degree' / 'in_degree' / 'out_degree'（strength の合計）,
+                 'betweenness'（sample_size で近似）, 'eigenvector'
+        """
+        graph = self.build_concept_graph()
+        if measure in ('degree', 'in_degree', 'out_degree'):
+            scores = graph.degree(weighted=True)[measure]
+        elif measure == 'betweenness':
+            scores = graph.betweenness_centrality(sample_size=sample_size)
+        elif measure == 'eigenvector':
+            scores = graph.eigenvector_centrality()
+        else:
+            raise ValueError(f"未知の中心性指標です: {measure}")
+        return self._ranked_concepts(graph, scores, top_n)
+    
+    @_cached_result
+    def concept_shortest_path(self, source_table: str, source_id: int,
+                              target_table: str, target_id: int,
+                              weighted: bool = True) -> Optional[Dict[str, Any]]:
+        """2概念間の最短（weighted=True なら最も強い）関係経路。到達不能なら None"""
+        graph = self.build_concept_graph()
+        result = graph.shortest_path((source_table, source_id), (target_table, target_id),
+                                     weighted=weighted)
+        if result is None:
+            return None
+        names = self._resolve_concepts(result['nodes'])
+        result['nodes'] = [{
+            'concept_table': table,
+            'concept_id': concept_id,
+            'name': names.get((table, concept_id), {}).get('name'),
+        } for table, concept_id in result['nodes']]
+        result['strength_product'] = math.exp(-result['cost']) if weighted else None
+        return result
+
+    def _lineage(self, table: str, concept_id: int, reverse: bool, max_depth: int,
+                 relation_types: Optional[List[str]], min_strength: float,
+                 use_graph: bool, use_closure: Optional[bool]) -> List[Dict]:
+        """concept_ancestors / concept_descendants の共通処理"""
+        if table not in CONCEPT_TABLES:
+            raise ValueError(f"未知の概念テーブルです: {table}")
+        start = (table, concept_id)
+        unfiltered = relation_types is None and min_strength <= 0.0
+        if use_closure is None:
+            use_closure = unfiltered and self._closure_available()
+        elif use_closure and not unfiltered:
+            raise ValueError("閉包テーブルは relation_types / min_strength の絞り込みに対応していません")
+        
+        if use_graph:
+            depths = self.build_concept_graph().traverse(
+                start, max_depth, reverse, relation_types, min_strength)
+        elif use_closure:
+            near, far = ('descendant', 'ancestor') if reverse else ('ancestor', 'descendant')
+            with self.get_connection() as conn:
+                depths = {(row[0], row[1]): row[2] for row in conn.execute(f"""
+                    SELECT {far}_table, {far}_id, depth FROM concept_closure
+                    WHERE {near}_table = ? AND {near}_id = ? AND depth BETWEEN 1 AND ?
+                    AND NOT ({far}_table = ? AND {far}_id = ?)
+                """, (table, concept_id, max_depth, table, concept_id))}
+        else:
+            near, far = ('target', 'source') if reverse else ('source', 'target')
+            type_filter = ''
+            params: List[Any] = [table, concept_id, max_depth, min_strength]
+            if relation_types is not None:
+                type_filter = f"AND cr.relation_type IN ({','.join('?' * len(relation_types))})"
+                params.extend(relation_types)
+            # (概念, 深さ) 単位の UNION で重複を除くため、循環があっても
+            # 行数は 概念数 × max_depth で頭打ちになる
+            with self.get_connection() as conn:
+                depths = {}
+                for row in conn.execute(f"""
+                    WITH RECURSIVE walk(concept_table, concept_id, depth) AS (
+                        SELECT ?, ?, 0
+                        UNION
+                        SELECT cr.{far}_table, cr.{far}_id, walk.depth + 1
+                        FROM walk
+                        JOIN concept_relations cr
+                            ON cr.{near}_table = walk.concept_table
+                            AND cr.{near}_id = walk.concept_id
+                        WHERE walk.depth < ? AND {RELATION_WEIGHT_SQL} >= ? {type_filter}
+                    )
+                    SELECT concept_table, concept_id, MIN(depth) AS depth
+                    FROM walk WHERE depth > 0
+                    GROUP BY concept_table, concept_id
+                """, params):
+                    depths[(row[0], row[1])] = row[2]
+                depths.pop(start, None)
+        
+        names = self._resolve_concepts(depths)
+        return sorted(({
+            'concept_table': key[0],
+            'concept_id': key[1],
+            'name': names.get(key, {}).get('name'),
+            'depth': depth,
+        } for key, depth in depths.items()),
+            key=lambda item: (item['depth'], item['concept_table'], item['concept_id']))
+
+    @_cached_result
+    def concept_descendants(self, table: str, concept_id: int, max_depth: int = 10,
+                            relation_types: Optional[List[str]] = None,
+                            min_strength: float = 0.0, use_graph: bool = False,
+                            use_closure: Optional[bool] = None) -> List[Dict]:
+        """関係の向き（source → target）にたどって到達できる概念と最短の深さ
+        
+        既定では索引付きの再帰CTEで探索する。use_graph=True でメモリ上のグラフを幅優先探索し、
+        閉包テーブルが有効かつ絞り込みがなければ自動的に閉包テーブルを参照する。
+        """
+        return self._lineage(table, concept_id, False, max_depth, relation_types,
+                             min_strength, use_graph, use_closure)
+
+    @_cached_result
+    def concept_ancestors(self, table: str, concept_id: int, max_depth: int = 10,
+                          relation_types: Optional[List[str]] = None,
+                          min_strength: float = 0.0, use_graph: bool = False,
+                          use_closure: Optional[bool] = None) -> List[Dict]:
+        """関係を逆向き（target → source）にたどって到達できる概念と最短の深さ"""
+        return self._lineage(table, concept_id, True, max_depth, relation_types,
+                             min_strength, use_graph, use_closure)
+
+    @_cached_result
+    def concept_paths(self, source_table: str, source_id: int,
+                      target_table: str, target_id: int, max_depth: int = 5,
+                      relation_types: Optional[List[str]] = None,
+                      min_strength: float = 0.0, limit: int = 100) -> List[Dict]:
+        """2概念間の長さ max_depth 以下の単純経路（同じ概念を2度通らない）を列挙"""
+        type_filter = ''
+        params: List[Any] = [source_table, source_id, f'/{source_table}:{source_id}/',
+                             max_depth, min_strength]
+        if relation_types is not None:
+            type_filter = f"AND cr.relation_type IN ({','.join('?' * len(relation_types))})"
+            params.extend(relation_types)
+        params.extend([target_table, target_id, limit])
+        
+        with self.get_connection() as conn:
+            rows = conn.execute(f"""
+                WITH RECURSIVE walk(concept_table, concept_id, depth, path, relation_path) AS (
+                    SELECT ?, ?, 0, ?, ''
+                    UNION ALL
+                    SELECT cr.target_table, cr.target_id, walk.depth + 1,
+                           walk.path || cr.target_table || ':' || cr.target_id || '/',
+                           walk.relation_path || cr.id || '/'
+                    FROM walk
+                    JOIN concept_relations cr
+                        ON cr.source_table = walk.concept_table
+                        AND cr.source_id = walk.concept_id
+                    WHERE walk.depth < ? AND {RELATION_WEIGHT_SQL} >= ? {type_filter}
+                    -- 循環検出: 経路上に既に現れた概念には進まない
+                    AND instr(walk.path, '/' || cr.target_table || ':' || cr.target_id || '/') = 0
+                )
+                SELECT depth, path, relation_path FROM walk
+                WHERE concept_table = ? AND concept_id = ? AND depth > 0
+                ORDER BY depth
+                LIMIT ?
+            """, params).fetchall()
+        
+        paths = []
+        for row in rows:
+            nodes = []
+            for part in row['path'].strip('/').split('/'):
+                table, concept_id = part.rsplit(':', 1)
+                nodes.append((table, int(concept_id)))
+            paths.append({'nodes': nodes, 'depth': row['depth'],
+                          'relation_ids': [int(r) for r in row['relation_path'].strip('/').split('/')]})
+        
+        names = self._resolve_concepts({node for path in paths for node in path['nodes']})
+        for path in paths:
+            path['nodes'] = [{
+                'concept_table': table,
+                'concept_id': concept_id,
+                'name': names.get((table, concept_id), {}).get('name'),
+            } for table, concept_id in path['nodes']]
+        return paths
+
+    def _closure_available(self) -> bool:
+        """閉包テーブルが作成済みで、関係の削除・更新による失効がないか"""
+        with self.get_connection() as conn:
+            exists = conn.execute("""
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_closure_state'
+            """).fetchone()
+            if exists is None:
+                return False
+            return conn.execute("SELECT stale FROM concept_closure_state").fetchone()[0] == 0
+
+    def enable_closure_table(self):
+        """推移閉包テーブルを作成し、関係の挿入時にトリガーで増分更新する
+        
+        関係の削除・更新では閉包を正しく縮められないため失効扱いとなり、
+        rebuild_closure_table() を呼ぶまで探索は再帰CTEに戻る。
+        """
+        with self.get_connection() as conn:
+            conn.executescript(CLOSURE_SCHEMA_SQL)
+        self.rebuild_closure_table()
+
+    def rebuild_closure_table(self):
+        """全概念からの到達可能性を計算し直して閉包テーブルを再構築"""
+        with self.get_connection() as conn:
+            graph = ConceptGraph.from_rows(conn.execute("""
+                SELECT id, source_table, source_id, target_table, target_id,
+                       relation_type, strength
+                FROM concept_relations
+            """))
+            conn.execute("DELETE FROM concept_closure")
+            for node in graph.nodes:
+                reachable = graph.traverse(node, max_depth=graph.node_count)
+                conn.executemany("""
+                    INSERT INTO concept_closure
+                    (ancestor_table, ancestor_id, descendant_table, descendant_id, depth)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [node + descendant + (depth,) for descendant, depth in reachable.items()])
+            conn.execute("UPDATE concept_closure_state SET stale = 0")
+            conn.commit()
+        self._invalidate_caches()
+
+    def _similarity_available(self) -> bool:
+        with self.get_connection() as conn:
+            return conn.execute("""
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_vectors'
+            """).fetchone() is not None
+    
+    def enable_similarity_index(self):
+        """概念の類似検索索引を作成し、以後の概念・関係の変更をトリガーで記録する
+        
+        記録された概念の特徴ベクトルは次の similar_concepts（または update_similarity_index）で
+        差分だけ計算し直す。
+        """
+        with self.get_connection() as conn:
+            conn.executescript(SIMILARITY_SCHEMA_SQL)
+            for number, table in enumerate(CONCEPT_TABLES):
+                key = f"({number} << {CONCEPT_KEY_SHIFT})"
+                conn.executescript(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_similarity_insert
+                    AFTER INSERT ON {table}
+                    BEGIN
+                        INSERT OR IGNORE INTO similarity_pending VALUES ({key} + NEW.id);
+                    END;
+                    
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_similarity_delete
+                    AFTER DELETE ON {table}
+                    BEGIN
+                        INSERT OR IGNORE INTO similarity_pending VALUES ({key} + OLD.id);
+                    END;
+                    
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_similarity_update
+                    AFTER UPDATE ON {table}
+                    BEGIN
+                        INSERT OR IGNORE INTO similarity_pending
+                        VALUES ({key} + OLD.id), ({key} + NEW.id);
+                    END;
+                """)
             
-            # データを挿入
-            placeholders = ','.join(['?' for _ in actual_columns])
-            cursor.execute(f"""
-                INSERT INTO {table_name} ({','.join(actual_columns)})
-                VALUES ({placeholders})
-            """, values)
+            def endpoints(row: str) -> str:
+                return f"""
+                    INSERT OR IGNORE INTO similarity_pending
+                    SELECT concept_key FROM concept_registry
+                    WHERE (concept_table = {row}.source_table AND concept_id = {row}.source_id)
+                       OR (concept_table = {row}.target_table AND concept_id = {row}.target_id);
+                """
             
+            conn.executescript(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_concept_relations_similarity_insert
+                AFTER INSERT ON concept_relations
+                BEGIN
+                    {endpoints('NEW')}
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_concept_relations_similarity_delete
+                AFTER DELETE ON concept_relations
+                BEGIN
+                    {endpoints('OLD')}
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_concept_relations_similarity_update
+                AFTER UPDATE OF source_table, source_id, target_table, target_id,
+                                relation_type, strength ON concept_relations
+                BEGIN
+                    {endpoints('OLD')}
+                    {endpoints('NEW')}
+                END;
+            """)
+        self.rebuild_similarity_index()
+    
+    def rebuild_similarity_index(self):
+        """全概念の特徴ベクトルと LSH バケットを計算し直す"""
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for table in ('concept_vectors', 'concept_lsh', 'similarity_pending'):
+                conn.execute(f"DELETE FROM {table}")
+            count = self._store_similarity_vectors(conn, self._similarity_features(conn))
+            conn.commit()
+        print(f"✅ {count} 概念の類似検索索引を作成しました")
+    
+    def update_similarity_index(self) -> int:
+        """変更が記録された概念の特徴ベクトルだけを計算し直す（戻り値は処理した概念数）"""
+        with self.get_connection() as conn:
+            # 変更がなければ書き込みロックを取らずに終える
+            if conn.execute("SELECT 1 FROM similarity_pending LIMIT 1").fetchone() is None:
+                return 0
+            conn.execute("BEGIN IMMEDIATE")
+            keys = [row[0] for row in conn.execute("SELECT concept_key FROM similarity_pending")]
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                old = conn.execute(f"""
+                    SELECT concept_key, signature FROM concept_vectors
+                    WHERE concept_key IN ({placeholders})
+                """, chunk).fetchall()
+                conn.executemany("""
+                    DELETE FROM concept_lsh WHERE band = ? AND bucket = ? AND concept_key = ?
+                """, [(band, bucket, row[0]) for row in old for band, bucket in enumerate(row[1])])
+                conn.execute(f"DELETE FROM concept_vectors WHERE concept_key IN ({placeholders})", chunk)
+            # 削除された概念は _similarity_features が返さないため、索引から消えたままになる
+            self._store_similarity_vectors(conn, self._similarity_features(conn, keys))
+            conn.execute("DELETE FROM similarity_pending")
             conn.commit()
-            return cursor.lastrowid
+        return len(keys)
+    
+    def _similarity_features(self, conn: sqlite3.Connection, keys: Optional[List[int]] = None):
+        """(concept_key, 特徴ベクトル) を生成（keys を省略すると全概念）
+        
+        属性：テーブルと、名前・定義・文化以外の各列の値
+        関係：関係の向き・種類と相手の概念（strength で重み付け、NULL は 0.5）
+        n-gram：定義文の文字 2-gram・3-gram
+        """
+        ids_by_table: Dict[str, Optional[List[int]]] = {}
+        for key in (keys if keys is not None else []):
+            table = CONCEPT_TABLES[key >> CONCEPT_KEY_SHIFT]
+            ids_by_table.setdefault(table, []).append(key & ((1 << CONCEPT_KEY_SHIFT) - 1))
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        for number, table in enumerate(CONCEPT_TABLES):
+            ids = ids_by_table.get(table) if keys is not None else None
+            if keys is not None and not ids:
+                continue
+            columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+            attributes = [(position, column) for position, column in enumerate(columns)
+                          if column not in SIMILARITY_EXCLUDED_COLUMNS]
+            definition = columns.index('definition')
+            chunks = [ids[i:i + 500] for i in range(0, len(ids), 500)] if ids else [None]
+            for chunk in chunks:
+                where, params = '', []
+                if chunk is not None:
+                    where = f"IN ({','.join('?' * len(chunk))})"
+                    params = chunk
+                neighbours: Dict[int, List[Tuple[str, float]]] = {}
+                for near, far, direction in (('source', 'target', 'out'), ('target', 'source', 'in')):
+                    for concept_id, relation_type, far_table, far_id, strength in cursor.execute(f"""
+                        SELECT {near}_id, relation_type, {far}_table, {far}_id, strength
+                        FROM concept_relations
+                        WHERE {near}_table = ? {f'AND {near}_id ' + where if where else ''}
+                    """, [table] + params):
+                        weight = 0.5 if strength is None else max(float(strength), 0.0)
+                        tokens = neighbours.setdefault(concept_id, [])
+                        tokens.append((f"{direction}:{relation_type}", weight))
+                        tokens.append((f"{direction}:{relation_type}:{far_table}:{far_id}", weight))
+                rows = cursor.execute(
+                    f"SELECT * FROM {table} {'WHERE id ' + where if where else ''}", params).fetchall()
+                for row in rows:
+                    yield (number << CONCEPT_KEY_SHIFT) + row[0], _similarity_vector({
+                        'attributes': [(f"table={table}", 1.0)] + [
+                            (f"{column}={row[position]}", 1.0)
+                            for position, column in attributes if row[position] is not None],
+                        'relations': neighbours.get(row[0], []),
+                        'ngrams': _definition_ngrams(row[definition]),
+                    })
+    
+    def _store_similarity_vectors(self, conn: sqlite3.Connection, items, batch_size: int = 1000) -> int:
+        """特徴ベクトルと LSH バケットをまとめて書き込む（戻り値は件数）"""
+        count = 0
+        batch: List[Tuple[int, array]] = []
+        
+        def flush():
+            signatures = _lsh_signatures([vector for _, vector in batch])
+            conn.executemany("""
+                INSERT OR REPLACE INTO concept_vectors (concept_key, signature, vector)
+                VALUES (?, ?, ?)
+            """, [(key, signature, vector.tobytes())
+                  for (key, vector), signature in zip(batch, signatures)])
+            conn.executemany("""
+                INSERT OR IGNORE INTO concept_lsh (band, bucket, concept_key) VALUES (?, ?, ?)
+            """, [(band, bucket, key) for (key, _), signature in zip(batch, signatures)
+                  for band, bucket in enumerate(signature)])
+            batch.clear()
+        
+        for item in items:
+            batch.append(item)
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return count
+    
+    def similar_concepts(self, table: str, concept_id: int, top_k: int = 10,
+                         other_cultures: bool = False, tables: Optional[List[str]] = None,
+                         exact: bool = False) -> List[Dict]:
+        """属性・関係の近傍・定義文の n-gram が似た概念を類似度（コサイン）の高い順に返す
+        
+        other_cultures=True で基準の概念と同じ cultural_context の概念を除く。
+        既定では LSH のバケットが一致した候補だけを比べる近似検索で、
+        候補が top_k に満たなければ1ビット違いのバケットまで広げる。exact=True で全件と比較する。
+        """
+        if table not in CONCEPT_TABLES:
+            raise ValueError(f"未知の概念テーブルです: {table}")
+        for other in tables or ():
+            if other not in CONCEPT_TABLES:
+                raise ValueError(f"未知の概念テーブルです: {other}")
+        if not self._similarity_available():
+            raise ValueError("類似検索索引がありません（enable_similarity_index を呼んでください）")
+        self.update_similarity_index()
+        
+        key = concept_key(table, concept_id)
+        with self.get_connection() as conn:
+            row = conn.execute("""
+                SELECT v.signature, v.vector, r.cultural_context
+                FROM concept_vectors v JOIN concept_registry r USING (concept_key)
+                WHERE v.concept_key = ?
+            """, (key,)).fetchone()
+            if row is None:
+                raise ValueError(f"概念が見つかりません: {table} {concept_id}")
+            signature = row[0]
+            query = array('f')
+            query.frombytes(row[1])
+            
+            filters, params = ["v.concept_key != ?"], [key]
+            if other_cultures:
+                filters.append("r.cultural_context IS NOT ?")
+                params.append(row[2])
+            if tables:
+                filters.append(f"r.concept_table IN ({','.join('?' * len(tables))})")
+                params.extend(tables)
+            
+            def candidates(probes) -> List[Tuple[int, bytes]]:
+                lsh_filter = ''
+                probe_params: List[int] = []
+                if probes is not None:
+                    # 帯・バケットの組ごとに主キーを引く（行値の IN では索引が使われない）
+                    lsh_filter = f"""AND v.concept_key IN (
+                        SELECT l.concept_key
+                        FROM (VALUES {','.join(['(?, ?)'] * len(probes))}) probe
+                        JOIN concept_lsh l ON l.band = probe.column1 AND l.bucket = probe.column2)"""
+                    probe_params = [value for probe in probes for value in probe]
+                return conn.execute(f"""
+                    SELECT v.concept_key, v.vector
+                    FROM concept_vectors v JOIN concept_registry r USING (concept_key)
+                    WHERE {' AND '.join(filters)} {lsh_filter}
+                """, params + probe_params).fetchall()
+            
+            if exact:
+                rows = candidates(None)
+            else:
+                probes = list(enumerate(signature))
+                rows = candidates(probes)
+                if len(rows) < top_k:
+                    rows = candidates(probes + [(band, bucket ^ (1 << bit))
+                                                for band, bucket in probes
+                                                for bit in range(SIMILARITY_BAND_BITS)])
+        
+        scores = _similarity_scores(query, [vector for _, vector in rows])
+        ranked = heapq.nlargest(top_k, range(len(rows)), key=scores.__getitem__)
+        keys = [(CONCEPT_TABLES[rows[i][0] >> CONCEPT_KEY_SHIFT],
+                 rows[i][0] & ((1 << CONCEPT_KEY_SHIFT) - 1)) for i in ranked]
+        names = self._resolve_concepts(keys)
+        return [{
+            'concept_table': other_table,
+            'concept_id': other_id,
+            'name': names.get((other_table, other_id), {}).get('name'),
+            'cultural_context': names.get((other_table, other_id), {}).get('cultural_context'),
+            'similarity': scores[i],
+        } for i, (other_table, other_id) in zip(ranked, keys)]
 
-    def export_to_json(self, filename: str = "metaphysics_export.json"):
-        """データベースをJSONでエクスポート"""
-        data = {}
+    def detect_contradictions(self, full: bool = False) -> Dict[str, int]:
+        """CONTRADICTION_RULES の規則で関係の矛盾を検出し contradictions に一括で記録する
         
+        初回（または full=True）は全関係を走査し、以後はトリガーで記録された
+        前回からの変更に関わる概念の組（と逆向きの組）・創造関係の強連結成分だけを検査し直す。
+        検出の根拠になった関係の種類は resolution_attempts に記録する（philosopher_comments は利用者の記入欄）。
+        検出済みの行は unresolved などの編集を保つためそのまま残し、
+        成り立たなくなったものだけを削除する。戻り値は追加・削除した件数。
+        大量の関係を取り込んだ直後は full=True で全件走査した方が速い。
+        """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            tracked = conn.execute("""
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contradiction_pending'
+            """).fetchone() is not None
+            if not tracked:
+                full = True
+                conn.executescript(CONTRADICTION_SCHEMA_SQL)
+            elif not full and conn.execute("SELECT 1 FROM contradiction_pending LIMIT 1").fetchone() is None:
+                return {'added': 0, 'removed': 0}
             
-            # 全テーブルのデータを取得
-            tables = [
-                'existence_concepts', 'nothingness_concepts', 'time_concepts',
-                'space_concepts', 'consciousness_concepts', 'substance_concepts',
-                'universal_concepts', 'divine_concepts', 'good_concepts',
-                'dao_concepts', 'concept_relations', 'contradictions',
-                'cultural_interpretations'
-            ]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("""
+                    CREATE TEMP TABLE contradiction_findings (
+                        contradiction_type TEXT NOT NULL,
+                        concept1_table TEXT NOT NULL,
+                        concept1_id INTEGER NOT NULL,
+                        concept2_table TEXT NOT NULL,
+                        concept2_id INTEGER NOT NULL,
+                        comment TEXT,
+                        PRIMARY KEY (contradiction_type, concept1_table, concept1_id,
+                                     concept2_table, concept2_id)
+                    ) WITHOUT ROWID
+                """)
+                # 検査範囲内に記録済みの検出結果
+                conn.execute("""
+                    CREATE TEMP TABLE contradiction_existing (
+                        contradiction_type TEXT NOT NULL,
+                        concept1_table TEXT NOT NULL,
+                        concept1_id INTEGER NOT NULL,
+                        concept2_table TEXT NOT NULL,
+                        concept2_id INTEGER NOT NULL,
+                        id INTEGER NOT NULL,
+                        PRIMARY KEY (contradiction_type, concept1_table, concept1_id,
+                                     concept2_table, concept2_id, id)
+                    ) WITHOUT ROWID
+                """)
+                # 増分実行で創造関係の循環を検査し直す概念と、その途中で求める後方到達集合
+                for name in ('contradiction_scope', 'contradiction_backward'):
+                    conn.execute(f"""
+                        CREATE TEMP TABLE {name} (
+                            concept_table TEXT NOT NULL,
+                            concept_id INTEGER NOT NULL,
+                            PRIMARY KEY (concept_table, concept_id)
+                        ) WITHOUT ROWID
+                    """)
+                self._find_relation_conflicts(conn, full)
+                self._find_creation_cycles(conn, full)
+                counts = self._apply_contradiction_findings(conn, full)
+                conn.execute("DELETE FROM contradiction_pending")
+                for name in ('contradiction_findings', 'contradiction_existing',
+                             'contradiction_scope', 'contradiction_backward'):
+                    conn.execute(f"DROP TABLE temp.{name}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        
+        self._invalidate_caches()
+        if full:
+            print(f"✅ 矛盾を検出しました（追加 {counts['added']} 件・削除 {counts['removed']} 件）")
+        return counts
+    
+    def _find_relation_conflicts(self, conn: sqlite3.Connection, full: bool):
+        """同じ概念の組の関係どうしを組の被覆索引で自己結合し、opposing_relations / necessity_conflict を検出
+        
+        逆向きの組の関係（B → A）も INVERSE_RELATION_TYPES で向きをそろえて突き合わせる。
+        増分実行では変更された概念の組とその逆向きの組ごとに executemany で引く（一時表や
+        VALUES を外側に置いて結合すると、件数の見積もりから関係表全体のブルームフィルターが作られるため）。
+        """
+        same_pair = """b.source_table = a.source_table AND b.source_id = a.source_id
+                   AND b.target_table = a.target_table AND b.target_id = a.target_id"""
+        reversed_pair = """b.source_table = a.target_table AND b.source_id = a.target_id
+                   AND b.target_table = a.source_table AND b.target_id = a.source_id"""
+        
+        def type_pairs(pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+            return ', '.join('(?, ?)' for _ in pairs), [value for pair in pairs for value in pair]
+        
+        opposing, opposing_params = type_pairs(OPPOSING_RELATION_TYPES)
+        reversed_opposing, reversed_params = type_pairs(REVERSED_OPPOSING_RELATION_TYPES)
+        inverse, inverse_params = type_pairs([(x, y) for y, x in INVERSE_RELATION_TYPES.items()])
+        statements = [
+            (f"""
+                INSERT OR IGNORE INTO temp.contradiction_findings
+                SELECT 'opposing_relations', a.source_table, a.source_id, a.target_table, a.target_id,
+                       a.relation_type || ' / ' || b.relation_type
+                FROM concept_relations a INDEXED BY idx_concept_relations_pair
+                CROSS JOIN (VALUES {opposing}) o ON o.column1 = a.relation_type
+                CROSS JOIN concept_relations b INDEXED BY idx_concept_relations_pair
+                    ON {same_pair} AND b.relation_type = o.column2
+                WHERE {{pair_filter}} true
+            """, opposing_params),
+            # 対称な関係どうしは両側から見つかるため、概念の組の小さい側から見たものだけを記録する
+            (f"""
+                INSERT OR IGNORE INTO temp.contradiction_findings
+                SELECT 'opposing_relations', a.source_table, a.source_id, a.target_table, a.target_id,
+                       a.relation_type || ' / ' || b.relation_type || '（逆向き）'
+                FROM concept_relations a INDEXED BY idx_concept_relations_pair
+                CROSS JOIN (VALUES {reversed_opposing}) o ON o.column1 = a.relation_type
+                CROSS JOIN concept_relations b INDEXED BY idx_concept_relations_pair
+                    ON {reversed_pair} AND b.relation_type = o.column2
+                WHERE {{pair_filter}} (o.column1 <> o.column2
+                       OR (a.source_table, a.source_id) < (a.target_table, a.target_id))
+            """, reversed_params),
+            # 同じ向きの同じ種類の関係は自然キーで1件に限られるため、逆向きに読んだ関係と突き合わせる
+            (f"""
+                INSERT OR IGNORE INTO temp.contradiction_findings
+                SELECT 'necessity_conflict', a.source_table, a.source_id, a.target_table, a.target_id,
+                       a.relation_type || ' / ' || b.relation_type || '（逆向き）'
+                FROM concept_relations a INDEXED BY idx_concept_relations_pair
+                CROSS JOIN (VALUES {inverse}) o ON o.column1 = a.relation_type
+                CROSS JOIN concept_relations b INDEXED BY idx_concept_relations_pair
+                    ON {reversed_pair} AND b.relation_type = o.column2
+                WHERE {{pair_filter}} a.logical_necessity = 'necessary'
+                  AND b.logical_necessity = 'impossible'
+            """, inverse_params),
+        ]
+        if full:
+            for sql, params in statements:
+                conn.execute(sql.format(pair_filter=''), params)
+            return
+        pairs = conn.execute("""
+            SELECT source_table, source_id, target_table, target_id FROM contradiction_pending
+            UNION
+            SELECT target_table, target_id, source_table, source_id FROM contradiction_pending
+        """).fetchall()
+        pair_filter = """a.source_table = ? AND a.source_id = ?
+                  AND a.target_table = ? AND a.target_id = ? AND"""
+        for sql, params in statements:
+            conn.executemany(sql.format(pair_filter=pair_filter), [params + list(pair) for pair in pairs])
+    
+    def _find_creation_cycles(self, conn: sqlite3.Connection, full: bool):
+        """創造関係の強連結成分の内部にある辺（＝循環上の辺）を creation_cycle として検出
+        
+        増分実行では、創造関係が追加・変更された概念から前方にも後方にも到達できる概念と、
+        前回検出した循環で変更された概念とつながっていた概念を対象にする。これは強連結成分の
+        和集合になるため、その誘導部分グラフだけで成分を求め直せば全体と一致する。
+        前方探索は後方到達集合の中に限れば両方向の共通部分がそのまま得られる。
+        統計がないと部分索引が選ばれないため、循環検査用の被覆索引を INDEXED BY で指定する。
+        """
+        if full:
+            rows = conn.execute(f"""
+                SELECT 0, source_table, source_id, target_table, target_id, relation_type, NULL
+                FROM concept_relations INDEXED BY idx_concept_relations_cycle_source
+                WHERE {CYCLE_RELATION_FILTER}
+            """)
+        else:
+            if conn.execute("SELECT 1 FROM contradiction_pending WHERE cycle LIMIT 1").fetchone() is None:
+                return
+            
+            def endpoints(name: str, condition: str) -> str:
+                return f"""
+                {name}(concept_table, concept_id) AS (
+                    SELECT source_table, source_id FROM contradiction_pending p WHERE {condition}
+                    UNION
+                    SELECT target_table, target_id FROM contradiction_pending p WHERE {condition}
+                )"""
             
-            for table in tables:
-                cursor.execute(f"SELECT * FROM {table}")
-                columns = [description[0] for description in cursor.description]
-                rows = cursor.fetchall()
-                data[table] = [dict(zip(columns, row)) for row in rows]
+            # 新しい循環ができうるのは今も辺がある組だけなので、前方・後方探索はその端点から始め、
+            # 削除だけの組は前回の循環（previous）から検査し直す
+            seeds = endpoints('seeds', f"""p.cycle AND EXISTS (
+                        SELECT 1 FROM concept_relations cr INDEXED BY idx_concept_relations_cycle_source
+                        WHERE cr.source_table = p.source_table AND cr.source_id = p.source_id
+                          AND cr.target_table = p.target_table AND cr.target_id = p.target_id
+                          AND cr.{CYCLE_RELATION_FILTER})""")
+            changed = endpoints('changed', 'p.cycle')
+            conn.execute(f"""
+                INSERT INTO temp.contradiction_backward
+                WITH RECURSIVE {seeds},
+                backward(concept_table, concept_id) AS (
+                    SELECT * FROM seeds
+                    UNION
+                    SELECT cr.source_table, cr.source_id
+                    FROM backward b
+                    JOIN concept_relations cr INDEXED BY idx_concept_relations_cycle_target
+                        ON cr.target_table = b.concept_table AND cr.target_id = b.concept_id
+                    WHERE cr.{CYCLE_RELATION_FILTER}
+                )
+                SELECT * FROM backward
+            """)
+            conn.execute(f"""
+                INSERT INTO temp.contradiction_scope
+                WITH RECURSIVE {seeds}, {changed},
+                forward(concept_table, concept_id) AS (
+                    SELECT * FROM seeds
+                    UNION
+                    SELECT cr.target_table, cr.target_id
+                    FROM forward f
+                    JOIN concept_relations cr INDEXED BY idx_concept_relations_cycle_source
+                        ON cr.source_table = f.concept_table AND cr.source_id = f.concept_id
+                    JOIN temp.contradiction_backward b
+                        ON b.concept_table = cr.target_table AND b.concept_id = cr.target_id
+                    WHERE cr.{CYCLE_RELATION_FILTER}
+                ),
+                previous(concept_table, concept_id) AS (
+                    SELECT * FROM changed
+                    UNION
+                    SELECT c.concept2_table, c.concept2_id
+                    FROM previous p JOIN contradictions c
+                        ON c.concept1_table = p.concept_table AND c.concept1_id = p.concept_id
+                    WHERE c.contradiction_type = 'creation_cycle'
+                    UNION
+                    SELECT c.concept1_table, c.concept1_id
+                    FROM previous p JOIN contradictions c
+                        ON c.concept2_table = p.concept_table AND c.concept2_id = p.concept_id
+                    WHERE c.contradiction_type = 'creation_cycle'
+                )
+                SELECT * FROM forward
+                UNION
+                SELECT * FROM previous
+            """)
+            rows = conn.execute(f"""
+                SELECT 0, cr.source_table, cr.source_id, cr.target_table, cr.target_id,
+                       cr.relation_type, NULL
+                FROM temp.contradiction_scope s
+                CROSS JOIN concept_relations cr INDEXED BY idx_concept_relations_cycle_source
+                    ON cr.source_table = s.concept_table AND cr.source_id = s.concept_id
+                JOIN temp.contradiction_scope t
+                    ON t.concept_table = cr.target_table AND t.concept_id = cr.target_id
+                WHERE cr.{CYCLE_RELATION_FILTER}
+            """)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        graph = ConceptGraph.from_rows(rows)
+        component = graph.strongly_connected_components()
+        offsets, targets, nodes = graph.out_offsets, graph.out_targets, graph.nodes
+        conn.executemany("""
+            INSERT OR IGNORE INTO temp.contradiction_findings VALUES ('creation_cycle', ?, ?, ?, ?, ?)
+        """, (nodes[u] + nodes[targets[e]] + (graph.relation_types[graph.out_types[e]],)
+              for u in range(graph.node_count)
+              for e in range(offsets[u], offsets[u + 1])
+              if component[u] == component[targets[e]]))
+    
+    def _apply_contradiction_findings(self, conn: sqlite3.Connection, full: bool) -> Dict[str, int]:
+        """検査範囲内で成り立たなくなった検出結果を削除し、新しい検出結果を追加"""
+        same_key = """f.contradiction_type = c.contradiction_type
+                  AND f.concept1_table = c.concept1_table AND f.concept1_id = c.concept1_id
+                  AND f.concept2_table = c.concept2_table AND f.concept2_id = c.concept2_id"""
+        if full:
+            rules = ','.join('?' * len(CONTRADICTION_RULES))
+            scope = f"SELECT c.* FROM contradictions c WHERE c.contradiction_type IN ({rules})"
+            params = list(CONTRADICTION_RULES)
+        else:
+            # 関係の組の検出結果は逆向きの組の関係にも左右されるため、両方向の組を検査し直す
+            scope = """
+                SELECT c.* FROM contradiction_pending p
+                CROSS JOIN contradictions c
+                    ON c.concept1_table = p.source_table AND c.concept1_id = p.source_id
+                   AND c.concept2_table = p.target_table AND c.concept2_id = p.target_id
+                WHERE c.contradiction_type IN ('opposing_relations', 'necessity_conflict')
+                UNION
+                SELECT c.* FROM contradiction_pending p
+                CROSS JOIN contradictions c
+                    ON c.concept1_table = p.target_table AND c.concept1_id = p.target_id
+                   AND c.concept2_table = p.source_table AND c.concept2_id = p.source_id
+                WHERE c.contradiction_type IN ('opposing_relations', 'necessity_conflict')
+                UNION ALL
+                SELECT c.* FROM temp.contradiction_scope s
+                CROSS JOIN contradictions c
+                    ON c.concept1_table = s.concept_table AND c.concept1_id = s.concept_id
+                WHERE c.contradiction_type = 'creation_cycle'
+            """
+            params = []
+        # 範囲内の既存行を一度だけ引いておき、以降の突き合わせは一時表どうしで行う
+        # （ハブ概念は concept1 / concept2 の索引の同じキーに多数の行を持つため）
+        conn.execute(f"""
+            INSERT INTO temp.contradiction_existing
+            SELECT c.contradiction_type, c.concept1_table, c.concept1_id,
+                   c.concept2_table, c.concept2_id, c.id
+            FROM ({scope}) c
+        """, params)
+        removed = conn.execute(f"""
+            DELETE FROM contradictions WHERE id IN (
+                SELECT c.id FROM temp.contradiction_existing c
+                WHERE NOT EXISTS (SELECT 1 FROM temp.contradiction_findings f WHERE {same_key})
+            )
+        """).rowcount
+        added = conn.execute(f"""
+            INSERT INTO contradictions
+                (concept1_table, concept1_id, concept2_table, concept2_id,
+                 contradiction_type, unresolved, resolution_attempts)
+            SELECT f.concept1_table, f.concept1_id, f.concept2_table, f.concept2_id,
+                   f.contradiction_type, TRUE, f.comment
+            FROM temp.contradiction_findings f
+            WHERE NOT EXISTS (SELECT 1 FROM temp.contradiction_existing c WHERE {same_key})
+        """).rowcount
+        return {'added': added, 'removed': removed}
+    
+    def search(self, query: str, tables: Optional[List[str]] = None,
+               limit: int = 20) -> List[Dict]:
+        """概念名・定義・文化的背景と文化的解釈を全文検索
+        
+        BM25 で順位付けし（score は小さいほど適合）、一致箇所を【】で囲んだ snippet を返す。
+        trigram 索引は3文字未満の語を引けないため、短い語は文字 2-gram の副索引
+        concept_search_grams で引いて順位付けする（索引に入らない記号だけの語は LIKE で走査する）。
+        """
+        if not query.strip():
+            return []
+        sources = SEARCH_SOURCE_TABLES if tables is None else tables
+        ranges, params = [], []
+        for table in sources:
+            if table not in SEARCH_SOURCE_TABLES:
+                raise ValueError(f"検索対象外のテーブルです: {table}")
+            number = SEARCH_SOURCE_TABLES.index(table)
+            ranges.append("rowid BETWEEN ? AND ?")
+            params.extend([number << CONCEPT_KEY_SHIFT, ((number + 1) << CONCEPT_KEY_SHIFT) - 1])
+        table_filter = f"({' OR '.join(ranges)})"
+        
+        with self.get_connection() as conn:
+            tokenizer = conn.execute("""
+                SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'concept_search'
+            """).fetchone()
+            if tokenizer is None:
+                raise RuntimeError("この SQLite では FTS5 が利用できないため検索できません")
+            
+            # 利用者の入力はフレーズとして扱い、FTS5 の演算子として解釈させない
+            phrase = '"' + query.replace('"', '""') + '"'
+            if len(query) >= 3 or 'trigram' not in tokenizer[0]:
+                rows = conn.execute(f"""
+                    SELECT rowid, name, cultural_context,
+                           snippet(concept_search, -1, '【', '】', '…', 12) AS snippet,
+                           bm25(concept_search, 10.0, 1.0, 2.0) AS score
+                    FROM concept_search
+                    WHERE concept_search MATCH ? AND {table_filter}
+                    ORDER BY score
+                    LIMIT ?
+                """, [phrase] + params + [limit]).fetchall()
+            elif any(ch.isalnum() for ch in query):
+                # 副索引の列は n-gram の並びなので、表示する値と snippet は本索引から引く
+                marked = f'【{query}】'
+                rows = conn.execute(f"""
+                    SELECT g.rowid, s.name, s.cultural_context,
+                           CASE WHEN instr(s.definition, ?1) > 0 THEN replace(s.definition, ?1, ?2)
+                                WHEN instr(s.name, ?1) > 0 THEN replace(s.name, ?1, ?2)
+                                WHEN instr(s.cultural_context, ?1) > 0
+                                    THEN replace(s.cultural_context, ?1, ?2)
+                                ELSE COALESCE(s.definition, s.name) END AS snippet,
+                           g.score
+                    FROM (
+                        SELECT rowid, bm25(concept_search_grams, 10.0, 1.0, 2.0) AS score
+                        FROM concept_search_grams
+                        WHERE concept_search_grams MATCH ? AND {table_filter}
+                        ORDER BY score
+                        LIMIT ?
+                    ) g
+                    JOIN concept_search s ON s.rowid = g.rowid
+                    ORDER BY g.score
+                """, [query, marked, phrase + ('*' if len(query) == 1 else '')]
+                    + params + [limit]).fetchall()
+            else:
+                escaped = query.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+                pattern = f'%{escaped}%'
+                rows = conn.execute(f"""
+                    SELECT rowid, name, cultural_context,
+                           COALESCE(definition, name) AS snippet, NULL AS score
+                    FROM concept_search
+                    WHERE (name LIKE ? ESCAPE '!' OR definition LIKE ? ESCAPE '!'
+                           OR cultural_context LIKE ? ESCAPE '!')
+                    AND {table_filter}
+                    LIMIT ?
+                """, [pattern] * 3 + params + [limit]).fetchall()
+        
+        mask = (1 << CONCEPT_KEY_SHIFT) - 1
+        return [{
+            'source_table': SEARCH_SOURCE_TABLES[row['rowid'] >> CONCEPT_KEY_SHIFT],
+            'source_id': row['rowid'] & mask,
+            'name': row['name'],
+            'cultural_context': row['cultural_context'],
+            'snippet': row['snippet'],
+            'score': row['score'],
+        } for row in rows]
+
+    def add_custom_concept(self, table_name: str, **kwargs):
+        """カスタム概念を追加"""
+        return self.add_custom_concepts(table_name, [kwargs])[0]
+
+    def add_custom_concepts(self, table_name: str, rows) -> List[int]:
+        """複数の概念を1トランザクションで追加し、追加された id のリストを返す
+        
+        自然キー（概念は名前と文化的背景、関係は両端と種類）が一致する行が既にあれば
+        指定された列を更新し、その行の id を返す。
+        テーブル名・列名はキャッシュ済みのスキーマと照合し、未知のものは ValueError とする。
+        """
+        self._schema_cache()
+        insertable = self._insertable_columns.get(table_name)
+        if insertable is None:
+            raise ValueError(f"未知のテーブルです: {table_name}")
+        
+        prepared = []
+        for row in rows:
+            unknown = set(row).difference(insertable)
+            if unknown:
+                raise ValueError(f"{table_name} に追加できないカラムです: {', '.join(sorted(unknown))}")
+            columns = tuple(col for col in insertable if col in row)
+            if not columns:
+                raise ValueError("有効なカラムデータが提供されていません")
+            prepared.append((self._insert_statement(table_name, columns, returning=True),
+                             [row[col] for col in columns]))
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            ids = []
+            for statement, values in prepared:
+                ids.append(cursor.execute(statement, values).fetchone()[0])
+            conn.commit()
+        
+        self._invalidate_caches()
+        return ids
+
+    def explain_builtin_queries(self) -> Dict[str, List[Dict]]:
+        """組み込みクエリを実行して発行されたSELECT文の実行計画を取得"""
+        statements = []
+        self._statement_trace = statements
+        try:
+            for method_name in PLAN_CHECKED_METHODS:
+                start = len(statements)
+                getattr(self, method_name)()
+                statements[start:] = [(method_name, sql) for sql in statements[start:]]
+        finally:
+            self._statement_trace = None
+        
+        plans = {}
+        with self.get_connection() as conn:
+            for method_name, sql in statements:
+                if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    continue
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+                plans.setdefault(method_name, []).append({
+                    'sql': sql,
+                    'plan': [row['detail'] for row in rows],
+                })
+        return plans
+
+    def check_query_plans(self) -> Dict[str, List[str]]:
+        """concept_relations を全件走査する組み込みクエリを検出
+        
+        索引を使っていても SCAN ... USING (COVERING) INDEX は索引全体をたどるため違反とし、
+        索引の範囲を絞る SEARCH だけを許す。実行計画は別名で表を示すため、SQL から
+        concept_relations の別名を集めて照合する。
+        戻り値はメソッド名 → 問題のある実行計画行。空なら全クエリが索引で検索している。
+        """
+        import re
+        
+        clause_words = {'AS', 'INDEXED', 'NOT', 'WHERE', 'JOIN', 'CROSS', 'LEFT', 'INNER',
+                        'NATURAL', 'ON', 'USING', 'GROUP', 'ORDER', 'LIMIT', 'UNION',
+                        'EXCEPT', 'INTERSECT', 'WINDOW', 'SET', 'VALUES', 'RETURNING'}
+        violations = {}
+        for method_name, queries in self.explain_builtin_queries().items():
+            for query in queries:
+                aliases = {'concept_relations'} | {
+                    alias for alias in re.findall(r'\bconcept_relations\s+(?:AS\s+)?(\w+)',
+                                                  query['sql'], re.IGNORECASE)
+                    if alias.upper() not in clause_words}
+                for detail in query['plan']:
+                    words = detail.split()
+                    # 古い SQLite は "SCAN TABLE concept_relations AS cr" の形で示す
+                    if len(words) >= 3 and words[1] == 'TABLE':
+                        words = words[:1] + words[2:]
+                    if len(words) >= 2 and words[0] == 'SCAN' and words[1] in aliases:
+                        violations.setdefault(method_name, []).append(detail)
+        return violations
+
+    def export_to_json(self, filename: str = "metaphysics_export.json",
+                       format: str = 'json', compression: Optional[str] = None,
+                       tables: Optional[List[str]] = None, split: bool = False,
+                       created_after=None, created_before=None,
+                       chunk_size: int = 1000, resolve_names: bool = False,
+                       parallel: bool = False, workers: Optional[int] = None) -> Dict[str, int]:
+        """データベースをJSONでエクスポート
+        
+        行は fetchmany で読みながら逐次書き出すため、メモリ使用量はテーブルの大きさによらない。
+        format: 'json'（従来の整形JSON）または 'ndjson'（1行1レコード）
+        split: ndjson でテーブルごとに filename ディレクトリ下の <table>.ndjson へ分割
+               （False なら1ファイルに {"table": ..., "row": {...}} の形で出力）
+        compression: 'gzip' / 'bz2' / 'xz'。None なら filename の拡張子から判定
+        created_after / created_before: created_at 列を持つテーブルの期間指定
+        resolve_names: 関係・矛盾・文化的解釈の参照先概念名を *_name 列として付加
+                       （bulk_import は取り込み時にこれらの列を無視する）
+        parallel: テーブルごとの読み出しと整形を読み取り専用接続のワーカーに分散する
+                  （テーブルごとに別プロセスで変換し、1ファイル出力では一時ファイルを
+                   経由して元の順序で連結する）
+        戻り値はテーブルごとの出力行数。
+        """
+        if format not in ('json', 'ndjson'):
+            raise ValueError(f"未知の出力形式です: {format}")
+        if split and format != 'ndjson':
+            raise ValueError("split は ndjson 形式でのみ指定できます")
+        tables = list(DATA_TABLES if tables is None else tables)
+        for table in tables:
+            if table not in DATA_TABLES:
+                raise ValueError(f"未知のテーブルです: {table}")
+        compression = compression or _compression_from_path(filename)
+        
+        row_options = {'created_after': created_after, 'created_before': created_before,
+                       'chunk_size': chunk_size, 'resolve_names': resolve_names}
+        
+        if split:
+            os.makedirs(filename, exist_ok=True)
+            write_file = functools.partial(
+                _export_table_file, directory=filename,
+                suffix='.ndjson' + COMPRESSION_SUFFIXES.get(compression, ''),
+                compression=compression, format=format, split=True, row_options=row_options)
+            if parallel:
+                # JSON への変換は GIL を保持するため、テーブルごとに別プロセスで書き出す
+                counts = dict(zip(tables, self._map_tables(write_file, tables, workers,
+                                                           processes=True)))
+            else:
+                with self.get_connection() as conn:
+                    counts = {table: write_file(conn, table) for table in tables}
+            print(f"✅ データを {filename} にエクスポートしました")
+            return counts
+        
+        import json
+        import shutil
+        import tempfile
+        
+        with tempfile.TemporaryDirectory() as spool_dir:
+            if parallel:
+                # 各テーブルを一時ファイルに並列で書き、後で元の順序どおりに連結する
+                write_file = functools.partial(
+                    _export_table_file, directory=spool_dir, suffix='.part', compression=None,
+                    format=format, split=False, row_options=row_options)
+                spooled = dict(zip(tables, self._map_tables(write_file, tables, workers,
+                                                            processes=True)))
+            
+            counts = {}
+            with self.get_connection() as conn, _open_text(filename, 'w', compression) as f:
+                if format == 'json':
+                    # json.dump(indent=2) と同一の出力を1行ずつ組み立てる
+                    f.write('{')
+                for t, table in enumerate(tables):
+                    if format == 'json':
+                        f.write(',\n  ' if t else '\n  ')
+                        f.write(json.dumps(table, ensure_ascii=False) + ': [')
+                    if parallel:
+                        counts[table] = spooled[table]
+                        with open(os.path.join(spool_dir, table + '.part'),
+                                  encoding='utf-8') as part:
+                            shutil.copyfileobj(part, f)
+                    else:
+                        counts[table] = _write_export_rows(f, conn, table, format, False,
+                                                           **row_options)
+                    if format == 'json':
+                        f.write('\n  ]' if counts[table] else ']')
+                if format == 'json':
+                    f.write('\n}' if tables else '}')
         
         print(f"✅ データを {filename} にエクスポートしました")
+        return counts
+
+    def _iter_import_records(self, path: str):
+        """エクスポートファイルから (table, row) を順に読み出す
+        
+        ディレクトリなら split 形式の <table>.ndjson、拡張子 .ndjson / .jsonl なら
+        タグ付きNDJSON、それ以外は整形JSON（全体を一度に読み込む）として扱う。
+        """
+        import json
+        
+        if os.path.isdir(path):
+            files = []
+            for name in sorted(os.listdir(path)):
+                compression = _compression_from_path(name)
+                base = name[:-len(COMPRESSION_SUFFIXES[compression])] if compression else name
+                table, ext = os.path.splitext(base)
+                if ext in ('.ndjson', '.jsonl'):
+                    files.append((table, name, compression))
+            # 参照先の概念テーブルを参照元より先に読む（DATA_TABLES の順、未知のテーブルは最後）
+            files.sort(key=lambda file: DATA_TABLES.index(file[0]) if file[0] in DATA_TABLES
+                       else len(DATA_TABLES))
+            for table, name, compression in files:
+                with _open_text(os.path.join(path, name), 'r', compression) as f:
+                    for line in f:
+                        if line.strip():
+                            yield table, json.loads(line)
+            return
+        
+        compression = _compression_from_path(path)
+        base = path[:-len(COMPRESSION_SUFFIXES[compression])] if compression else path
+        with _open_text(path, 'r', compression) as f:
+            if base.endswith(('.ndjson', '.jsonl')):
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        yield record['table'], record['row']
+            else:
+                for table, rows in json.load(f).items():
+                    for row in rows:
+                        yield table, row
+
+    def bulk_import(self, path: str, batch_size: int = 10000,
+                    on_conflict: str = 'abort', relax_durability: bool = False,
+                    defer_indexes: bool = True) -> Dict[str, int]:
+        """export_to_json の出力（整形JSON / NDJSON / 分割NDJSON、圧縮可）を一括で取り込む
+        
+        元の id を保持したまま executemany でまとめて挿入するため、関係の参照は有効なまま。
+        既存の概念と自然キー (name, cultural_context) が重なる概念は既存の id にまとめ、
+        取り込む関係などの参照もその id に付け替える（_resolve_import_natural_keys）。
+        全体を1トランザクションで実行し、失敗時は何も取り込まれない。
+        on_conflict: 'abort'（id・自然キーの重複で ValueError）/ 'ignore'（既存行を残す）/
+        'replace'（既存行の id のまま上書き）
+        relax_durability: 取り込み中のみ synchronous=OFF（WAL以外では journal_mode=MEMORY）にする
+        defer_indexes: 索引と集計用トリガーを外してから取り込み、最後に作り直す
+        戻り値はテーブルごとの取り込み行数。
+        """
+        conflict_clause = {'abort': '', 'ignore': 'OR IGNORE', 'replace': 'OR REPLACE'}
+        if on_conflict not in conflict_clause:
+            raise ValueError(f"未知の on_conflict 指定です: {on_conflict}")
+        
+        counts: Dict[str, int] = {}
+        with self.get_connection() as conn:
+            synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if relax_durability:
+                conn.execute("PRAGMA synchronous = OFF")
+                if journal_mode.lower() != 'wal':
+                    conn.execute("PRAGMA journal_mode = MEMORY")
+            
+            batches: Dict[Tuple[str, Tuple[str, ...]], List[Tuple]] = {}
+            # 自然キーの重複で既存の概念にまとめた (table, 取り込む側の id) → 残る id
+            remapped: Dict[Tuple[str, int], int] = {}
+            referenced = False
+            
+            def flush(key):
+                table, columns = key
+                rows = batches.pop(key)
+                if table in CONCEPT_TABLES and 'name' in columns:
+                    columns, rows = self._resolve_import_natural_keys(
+                        conn, table, columns, rows, on_conflict, remapped, referenced)
+                try:
+                    conn.executemany(f"""
+                        INSERT {conflict_clause[on_conflict]} INTO {table} ({','.join(columns)})
+                        VALUES ({','.join('?' * len(columns))})
+                    """, rows)
+                except sqlite3.IntegrityError as e:
+                    if on_conflict != 'abort':
+                        raise
+                    raise ValueError(f"{table} の取り込みで既存の行と重複しました: {e}") from e
+            
+            # FTS5 のない SQLite では副索引もトリガーも作られていない
+            search_grams = conn.execute("""
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'concept_search_grams'
+            """).fetchone() is not None
+            
+            try:
+                # 索引の削除・再作成も同じトランザクション内で行い、失敗時は元に戻す
+                conn.execute("BEGIN")
+                conn.execute("""
+                    CREATE TEMP TABLE import_natural_keys (
+                        position INTEGER PRIMARY KEY,
+                        name TEXT,
+                        cultural_context TEXT
+                    )
+                """)
+                if defer_indexes:
+                    for index_name in INDEX_DEFINITIONS:
+                        conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+                    # 集計表・n-gram の副索引も1行ごとのトリガー更新をやめ、最後にまとめて作り直す
+                    for trigger_name in (*RELATION_SUMMARY_TRIGGERS, *SEARCH_GRAM_TRIGGERS):
+                        conn.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+                
+                for table, row in self._iter_import_records(path):
+                    # resolve_names 付きエクスポートの名前列は台帳から再生成されるため捨てる
+                    for _, _, name_column in REFERENCE_COLUMNS.get(table, ()):
+                        row.pop(name_column, None)
+                    if table in REFERENCE_COLUMNS:
+                        # 付け替え先を確定させるため、参照元の最初の行の前に概念をすべて書き込む
+                        if not referenced:
+                            for pending in [key for key in batches if key[0] in CONCEPT_TABLES]:
+                                flush(pending)
+                            referenced = True
+                        for table_column, id_column, _ in REFERENCE_COLUMNS[table]:
+                            survivor = remapped.get((row.get(table_column), row.get(id_column)))
+                            if survivor is not None:
+                                row[id_column] = survivor
+                    columns = tuple(row)
+                    unknown = set(columns).difference(self._columns_of(table))
+                    if unknown:
+                        raise ValueError(f"{table} に存在しないカラムです: {', '.join(sorted(unknown))}")
+                    key = (table, columns)
+                    batch = batches.setdefault(key, [])
+                    batch.append(tuple(row.values()))
+                    counts[table] = counts.get(table, 0) + 1
+                    if len(batch) >= batch_size:
+                        flush(key)
+                for key in list(batches):
+                    flush(key)
+                
+                if defer_indexes:
+                    for index_name, definition in INDEX_DEFINITIONS.items():
+                        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {definition}")
+                    for sql in RELATION_SUMMARY_TRIGGERS.values():
+                        conn.execute(sql)
+                    if search_grams:
+                        if any(table in counts for table in SEARCH_SOURCE_TABLES):
+                            self._fill_search_grams(conn)
+                        for sql in SEARCH_GRAM_TRIGGERS.values():
+                            conn.execute(sql)
+                # REPLACE で消えた行には削除トリガーが動かないため、こちらも集計し直す
+                if 'concept_relations' in counts and (defer_indexes or on_conflict == 'replace'):
+                    self._fill_relation_summaries(conn)
+                conn.execute("DROP TABLE temp.import_natural_keys")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                if relax_durability:
+                    conn.execute(f"PRAGMA synchronous = {synchronous}")
+                    if journal_mode.lower() != 'wal':
+                        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        
+        self._invalidate_caches()
+        print(f"✅ {path} から {sum(counts.values())} 行を取り込みました")
+        return counts
+    
+    def _resolve_import_natural_keys(self, conn: sqlite3.Connection, table: str,
+                                     columns: Tuple[str, ...], rows: List[Tuple],
+                                     on_conflict: str, remapped: Dict[Tuple[str, int], int],
+                                     referenced: bool) -> Tuple[Tuple[str, ...], List[Tuple]]:
+        """取り込む概念の行を自然キーで既存の行・同じバッチの先の行と突き合わせる
+        
+        REPLACE で id の違う既存行を消すと削除トリガーが動かず、IGNORE で捨てると
+        取り込む関係の参照が宙に浮くため、_setup_natural_keys と同じく残る行の id にまとめる。
+        'abort' は ValueError、'ignore' は既存行を残し、'replace' は既存行の id のまま上書きする。
+        まとめた id は remapped に記録し、参照元の行を書き込む前に付け替える。
+        referenced: 参照元テーブルの行を既に読んだ後か（付け替えが間に合わないためエラーにする）
+        """
+        if 'id' not in columns:
+            columns += ('id',)
+            rows = [row + (None,) for row in rows]
+        id_index, name_index = columns.index('id'), columns.index('name')
+        context_index = columns.index('cultural_context') if 'cultural_context' in columns else None
+        keys = [(row[name_index], '' if context_index is None or row[context_index] is None
+                 else row[context_index]) for row in rows]
+        conn.executemany("INSERT INTO temp.import_natural_keys VALUES (?, ?, ?)",
+                         ((position,) + key for position, key in enumerate(keys)))
+        existing = dict(conn.execute(f"""
+            SELECT k.position, t.id FROM temp.import_natural_keys k
+            CROSS JOIN {table} t INDEXED BY idx_{table}_natural_key
+                ON t.name = k.name AND IFNULL(t.cultural_context, '') = k.cultural_context
+        """).fetchall())
+        conn.execute("DELETE FROM temp.import_natural_keys")
+        
+        resolved: List[Tuple] = []
+        first: Dict[Tuple[str, str], int] = {}
+        for position, (row, key) in enumerate(zip(rows, keys)):
+            row_id = row[id_index]
+            earlier = None
+            if position in existing:
+                survivor = existing[position]
+                if survivor == row_id:
+                    # 同じ id の行どうしは通常の id の重複として on_conflict の句に任せる
+                    resolved.append(row)
+                    continue
+            elif key in first:
+                earlier = first[key]
+                survivor = resolved[earlier][id_index]
+            else:
+                first[key] = len(resolved)
+                resolved.append(row)
+                continue
+            if on_conflict == 'abort':
+                raise ValueError(f"{table} の概念「{key[0]}」（{key[1] or '文化的文脈なし'}）が"
+                                 f" id {survivor} と自然キーで重複しています（取り込む行の id {row_id}）")
+            if row_id is not None and row_id != survivor:
+                if referenced:
+                    raise ValueError(f"{table} の行が参照元のテーブルより後にあるため、"
+                                     f"自然キーが重複する概念「{key[0]}」の参照を付け替えられません")
+                remapped[(table, row_id)] = survivor
+            if on_conflict == 'replace':
+                row = row[:id_index] + (survivor,) + row[id_index + 1:]
+                if earlier is None:
+                    resolved.append(row)
+                else:
+                    resolved[earlier] = row
+        return columns, resolved
+    
+    def snapshot(self, dest: Union[str, sqlite3.Connection], pages: int = 1024,
+                 sleep: float = 0.0,
+                 progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """オンラインバックアップAPIでデータベースの一貫したコピーを dest（パスまたは接続）へ作成
+        
+        pages ページずつ複製し、各ステップの間に sleep 秒待つ（書き込み側はその間にロックを得られる）。
+        WAL では開始時点の読み取りトランザクションを保ったまま複製するため、途中のコミットで
+        最初からやり直しにならず、開始時点の内容がそのまま写る。それ以外のジャーナルでは
+        読み取りロックを保つと書き込みを止めてしまうため保たず、途中で書き込みがあればやり直す。
+        progress(remaining, total) は各ステップの後に呼ばれる。戻り値は複製したページ数。
+        """
+        if pages == 0 or sleep < 0:
+            raise ValueError("pages は0以外、sleep は0以上を指定してください")
+        
+        copied = 0
+        
+        def step(status, remaining, total):
+            nonlocal copied
+            copied = total
+            if progress is not None:
+                progress(remaining, total)
+            if sleep and remaining:
+                time.sleep(sleep)
+        
+        # バックアップはSQL文を実行しないため、計測用ではない通常の接続で読む
+        source = _sqlite_connect(self.db_path)
+        target = _sqlite_connect(dest) if isinstance(dest, str) else dest
+        try:
+            journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+            if journal_mode.lower() == 'wal':
+                # 最初の読み取りでスナップショットが固定される
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=pages, progress=step)
+        finally:
+            if source.in_transaction:
+                source.rollback()
+            source.close()
+            if target is not dest:
+                target.close()
+        
+        if isinstance(dest, str):
+            print(f"✅ {dest} へスナップショットを作成しました（{copied} ページ）")
+        return copied
+
+# AsyncMetaphysicsDB で読み取りスレッドプールに回すメソッド
+ASYNC_READ_METHODS = (
+    'query_cross_cultural_concepts', 'find_god_independent_concepts',
+    'analyze_paradoxes', 'concept_network_analysis', 'build_concept_graph',
+    'concept_pagerank', 'concept_centrality', 'concept_shortest_path',
+    'concept_descendants', 'concept_ancestors', 'concept_paths',
+    'search', 'export_to_json', 'cache_stats', 'query_stats', 'slow_queries',
+    'concept_snapshot', 'save_concept_snapshot', 'load_concept_snapshot', 'snapshot',
+)
+
+# AsyncMetaphysicsDB.astream で非同期に1行ずつ返せるジェネレーターメソッド
+ASYNC_STREAM_METHODS = ('iter_cross_cultural_concepts', 'iter_paradoxes', 'iter_relations')
+
+# 単一の書き込みスレッドで直列に実行するメソッド
+# （explain_builtin_queries はインスタンス全体のSQLトレースを切り替えるため、
+#  similar_concepts は保留中の類似検索索引の更新を書き込むためこちら）
+ASYNC_WRITE_METHODS = (
+    'setup_database', 'insert_sample_data', 'add_custom_concept',
+    'add_custom_concepts', 'bulk_import', 'enable_closure_table',
+    'rebuild_closure_table', 'rebuild_relation_summaries',
+    'enable_similarity_index', 'rebuild_similarity_index', 'update_similarity_index',
+    'similar_concepts', 'detect_contradictions',
+    'explain_builtin_queries', 'check_query_plans',
+    'enable_instrumentation', 'disable_instrumentation',
+)
+
+def _async_method(name: str, write: bool):
+    """MetaphysicsDB のメソッドをスレッドプールで実行する awaitable 版を作成"""
+    method = getattr(MetaphysicsDB, name)
+    
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._submit(write, getattr(self.db, name), *args, **kwargs)
+    return wrapper
+
+class AsyncMetaphysicsDB:
+    """MetaphysicsDB の asyncio 版
+    
+    読み取りは複数スレッドのプール、書き込みは単一スレッドで実行し、イベントループを塞がない。
+    接続はプールモード（WAL）で、読み取りは書き込み中も並行して進む。
+    sqlite3 はクエリ実行中に GIL を解放するため、読み取りスレッドは複数コアに分散する。
+    各プールへの投入数は max_pending で制限され、超えた呼び出しは空きが出るまで待つ。
+    """
+    
+    def __init__(self, db_path: str = "metaphysics.db", readers: int = 4,
+                 max_pending: int = 64, **kwargs):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        
+        kwargs.setdefault('pooled', True)
+        kwargs.setdefault('pool_size', readers + 1)
+        self.db = MetaphysicsDB(db_path, **kwargs)
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix='metaphysics-reader')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='metaphysics-writer')
+        self._read_slots = asyncio.Semaphore(max_pending)
+        self._write_slots = asyncio.Semaphore(max_pending)
+    
+    async def _submit(self, write: bool, func, *args, **kwargs):
+        """投入数の上限を守りながら関数をスレッドプールで実行"""
+        import asyncio
+        
+        executor, slots = ((self._writer, self._write_slots) if write
+                           else (self._readers, self._read_slots))
+        async with slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+    
+    async def _stream(self, make_rows: Callable, batch_size: int, max_batches: int):
+        """同期ジェネレーター make_rows() を読み取りスレッドで回し、行を非同期に1行ずつ返す
+        
+        読み取りスレッドは batch_size 行ごとの塊を長さ max_batches のキューに入れるため、
+        消費側が遅ければ取得も待たされ、メモリ使用量は一定に保たれる。
+        """
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        batches: asyncio.Queue = asyncio.Queue(max_batches)
+        stop = threading.Event()
+        
+        def put(item):
+            asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+        
+        def produce():
+            try:
+                rows = make_rows()
+                try:
+                    batch = []
+                    for row in rows:
+                        batch.append(row)
+                        if len(batch) >= batch_size:
+                            if stop.is_set():
+                                return
+                            put(batch)
+                            batch = []
+                    if batch and not stop.is_set():
+                        put(batch)
+                finally:
+                    rows.close()
+                if not stop.is_set():
+                    put([])
+            except BaseException as exc:
+                if not stop.is_set():
+                    put(exc)
+        
+        async with self._read_slots:
+            producer = loop.run_in_executor(self._readers, produce)
+            try:
+                while True:
+                    batch = await batches.get()
+                    if isinstance(batch, BaseException):
+                        raise batch
+                    if not batch:
+                        break
+                    for row in batch:
+                        yield row
+            finally:
+                # 途中で打ち切られた場合もキューを空けて読み取りスレッドを終わらせる
+                stop.set()
+                while not producer.done():
+                    while not batches.empty():
+                        batches.get_nowait()
+                    await asyncio.sleep(0.001)
+    
+    def iterate(self, sql: str, params=(), batch_size: int = 500, max_batches: int = 4):
+        """読み取り専用の SELECT の結果を辞書として非同期に1行ずつ返す"""
+        return self._stream(
+            lambda: self.db._iter_query(sql, params, batch_size=batch_size, read_only=True),
+            batch_size, max_batches)
+    
+    def astream(self, method: str, *args, batch_size: int = 500, max_batches: int = 4,
+                **kwargs):
+        """iter_* メソッド（iter_relations など）の結果を非同期に1行ずつ返す
+        
+        例: async for row in db.astream('iter_relations', min_strength=0.8): ...
+        """
+        if method not in ASYNC_STREAM_METHODS:
+            raise ValueError(f"ストリーミングできないメソッドです: {method}")
+        return self._stream(
+            functools.partial(getattr(self.db, method), *args, batch_size=batch_size, **kwargs),
+            batch_size, max_batches)
+    
+    async def close(self):
+        """スレッドプールを停止して接続を閉じる"""
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._readers.shutdown)
+        await loop.run_in_executor(None, self._writer.shutdown)
+        self.db.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+for _name in ASYNC_READ_METHODS:
+    setattr(AsyncMetaphysicsDB, _name, _async_method(_name, write=False))
+for _name in ASYNC_WRITE_METHODS:
+    setattr(AsyncMetaphysicsDB, _name, _async_method(_name, write=True))
+del _name
+
+# ReplicatedMetaphysicsDB で複製へ回す読み取りメソッド
+# （snapshot は元のデータベースを、query_stats・slow_queries は計測を有効にした primary を読む）
+REPLICA_READ_METHODS = tuple(name for name in ASYNC_READ_METHODS + ASYNC_STREAM_METHODS
+                             if name not in ('snapshot', 'query_stats', 'slow_queries'))
+
+# メモリ上の複製に付ける共有キャッシュ名の通し番号
+_replica_numbers = itertools.count()
+
+class ReplicatedMetaphysicsDB:
+    """読み取りをローカルの複製、書き込みを元のデータベースへ振り分ける MetaphysicsDB
+    
+    REPLICA_READ_METHODS は複製上で実行されるため、重い分析が元のデータベースの
+    書き込みとロックを奪い合わない。それ以外のメソッドは primary（元のデータベース）で実行する。
+    replica=':memory:' ならメモリ上、パスならそのファイルへ snapshot で複製する。
+    複製は refresh_interval 秒ごと（None なら refresh_replica() を呼んだときのみ）に作り直され、
+    読み取り結果は最後に複製した時点のものになる。
+    """
+    
+    def __init__(self, db_path: str = "metaphysics.db", replica: str = ':memory:',
+                 refresh_interval: Optional[float] = 60.0, pages: int = 1024,
+                 sleep: float = 0.0, result_cache_size: int = 0, **kwargs):
+        """
+        pages・sleep は複製時の snapshot に渡す。result_cache_size は複製側の結果キャッシュ、
+        kwargs（pooled など）は primary の MetaphysicsDB に渡す。
+        """
+        self.primary = MetaphysicsDB(db_path, **kwargs)
+        self.replica_path = replica
+        self.refresh_interval = refresh_interval
+        self.pages = pages
+        self.sleep = sleep
+        self.result_cache_size = result_cache_size
+        self._replica: Optional[MetaphysicsDB] = None
+        self._holder: Optional[sqlite3.Connection] = None
+        self._synced_version = None
+        self._refresh_lock = threading.Lock()
+        # 差し替え前の複製は、その上で実行中の読み取りがすべて終わってから閉じる
+        self._readers_lock = threading.Lock()
+        self._active_reads: Dict[MetaphysicsDB, int] = {}
+        self._retired: Dict[MetaphysicsDB, sqlite3.Connection] = {}
+        self._stop = threading.Event()
+        self._refresher = None
+        self.refresh_replica()
+        if refresh_interval is not None:
+            self._refresher = threading.Thread(target=self._refresh_loop,
+                                               name='metaphysics-replica', daemon=True)
+            self._refresher.start()
+    
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in REPLICA_READ_METHODS:
+            return self._replica_method(name)
+        return getattr(self.primary, name)
+    
+    @property
+    def replica(self) -> MetaphysicsDB:
+        """現在の複製（直接使う場合、メモリ上の複製は次の更新後に閉じられる）"""
+        return self._replica
+    
+    def _replica_method(self, name: str) -> Callable:
+        """複製上で name を実行する関数（実行中は使っている複製を閉じさせない）"""
+        method = getattr(MetaphysicsDB, name)
+        if name in ASYNC_STREAM_METHODS:
+            @functools.wraps(method)
+            def stream(*args, **kwargs):
+                replica = self._acquire_replica()
+                try:
+                    yield from getattr(replica, name)(*args, **kwargs)
+                finally:
+                    self._release_replica(replica)
+            return stream
+        
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            replica = self._acquire_replica()
+            try:
+                return getattr(replica, name)(*args, **kwargs)
+            finally:
+                self._release_replica(replica)
+        return call
+    
+    def _acquire_replica(self) -> MetaphysicsDB:
+        """現在の複製を読み取り中として登録して返す"""
+        with self._readers_lock:
+            replica = self._replica
+            if replica is None:
+                raise ValueError("複製は既に閉じられています")
+            self._active_reads[replica] = self._active_reads.get(replica, 0) + 1
+            return replica
+    
+    def _release_replica(self, replica: MetaphysicsDB):
+        """読み取りの終了を記録し、差し替え済みで使われなくなった複製を閉じる"""
+        with self._readers_lock:
+            self._active_reads[replica] -= 1
+            if not self._active_reads[replica]:
+                del self._active_reads[replica]
+            self._close_retired()
+    
+    def _close_retired(self):
+        """読み取り中でない差し替え前の複製を閉じる（_readers_lock を保持して呼ぶ）"""
+        for replica in [r for r in self._retired if r not in self._active_reads]:
+            replica.close()
+            self._retired.pop(replica).close()
+    
+    def refresh_replica(self, force: bool = False) -> bool:
+        """primary の内容で複製を作り直す（前回から primary にコミットがなければ何もしない）
+        
+        メモリ上の複製は新しい共有メモリのデータベースへ複製してから差し替えるため、
+        実行中の読み取りは古い複製を最後まで読める。ファイルの複製はその場で上書きする
+        （読み取り中のページは書き換えられないため、読み取りが終わるまで待つことがある）。
+        作り直したら True を返す。
+        """
+        with self._refresh_lock:
+            # data_version は監視用接続以外からのコミットで変わるため、primary 経由の書き込みも検出できる
+            self.primary._check_external_changes()
+            version = self.primary._data_version
+            if not force and self._replica is not None and version == self._synced_version:
+                return False
+            
+            if self.replica_path == ':memory:':
+                uri = f"file:metaphysics_replica_{next(_replica_numbers)}?mode=memory&cache=shared"
+                # 共有メモリのデータベースは接続が1つでも開いている間だけ存在する
+                holder = _sqlite_connect(uri, check_same_thread=False)
+                try:
+                    self.primary.snapshot(holder, pages=self.pages, sleep=self.sleep)
+                    replica = MetaphysicsDB(uri, result_cache_size=self.result_cache_size)
+                except BaseException:
+                    holder.close()
+                    raise
+                with self._readers_lock:
+                    if self._replica is not None:
+                        self._retired[self._replica] = self._holder
+                    self._replica, self._holder = replica, holder
+                    self._close_retired()
+            else:
+                target = _sqlite_connect(self.replica_path)
+                try:
+                    self.primary.snapshot(target, pages=self.pages, sleep=self.sleep)
+                finally:
+                    target.close()
+                if self._replica is None:
+                    self._replica = MetaphysicsDB(self.replica_path,
+                                                  result_cache_size=self.result_cache_size)
+                else:
+                    self._replica._invalidate_caches()
+            self._synced_version = version
+            return True
+    
+    def _refresh_loop(self):
+        """refresh_interval ごとに複製を更新するバックグラウンドスレッド"""
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh_replica()
+            except sqlite3.Error:
+                # 一時的なロック競合などは次の周期で再試行する
+                import logging
+                logging.getLogger(__name__).exception("複製の更新に失敗しました")
+    
+    def close(self):
+        """更新スレッドを止め、複製と primary の接続を閉じる"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+        with self._refresh_lock, self._readers_lock:
+            if self._replica is not None:
+                self._replica.close()
+                self._replica = None
+            if self._holder is not None:
+                self._holder.close()
+                self._holder = None
+            for replica, holder in self._retired.items():
+                replica.close()
+                holder.close()
+            self._retired = {}
+        self.primary.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 def main():
     """メイン実行関数"""
@@ -154,66 +154,34 @@ ORDER BY 平均関係強度 DESC, 関係数 DESC;
 -- SQL革命：概念のネットワーク構造を定量分析、隠れたパターンを発見
 
 -- 3-1. 最も重要な「ハブ概念」の特定（PageRank的分析）
-WITH concept_connections AS (
-    -- 各概念の接続数を計算（送信・受信両方向）
+-- 各概念の送信・受信接続数と強度合計はトリガーで更新される concept_degree に集計済み
+WITH hub_analysis AS (
     SELECT 
-        source_table as table_name,
-        source_id as concept_id,
-        COUNT(*) as outbound_connections,
-        AVG(strength) as avg_outbound_strength
-    FROM concept_relations
-    GROUP BY source_table, source_id
-    
-    UNION ALL
-    
-    SELECT 
-        target_table as table_name,
-        target_id as concept_id,
-        COUNT(*) as inbound_connections,
-        AVG(strength) as avg_inbound_strength
-    FROM concept_relations
-    GROUP BY target_table, target_id
-),
-hub_analysis AS (
-    SELECT 
-        table_name,
+        concept_table as table_name,
         concept_id,
-        SUM(outbound_connections) as total_connections,
-        AVG(avg_outbound_strength) as connection_strength,
-        -- ハブ重要度 = 接続数 × 平均強度
-        SUM(outbound_connections) * AVG(avg_outbound_strength) as hub_importance
-    FROM concept_connections
-    GROUP BY table_name, concept_id
+        out_degree + in_degree as total_connections,
+        -- 送信・受信それぞれの平均強度の平均（片方向しかなければその平均）
+        CASE
+            WHEN out_strength_count > 0 AND in_strength_count > 0
+                THEN (out_strength_sum / out_strength_count + in_strength_sum / in_strength_count) / 2
+            WHEN out_strength_count > 0 THEN out_strength_sum / out_strength_count
+            WHEN in_strength_count > 0 THEN in_strength_sum / in_strength_count
+        END as connection_strength
+    FROM concept_degree
 )
 SELECT 
     ha.table_name as 概念分野,
-    CASE ha.table_name
-        WHEN 'existence_concepts' THEN ec.name
-        WHEN 'nothingness_concepts' THEN nc.name
-        WHEN 'dao_concepts' THEN dc.name
-        WHEN 'divine_concepts' THEN dv.name
-        WHEN 'consciousness_concepts' THEN cc.name
-        ELSE 'Unknown'
-    END as 概念名,
+    COALESCE(reg.name, 'Unknown') as 概念名,
     ha.total_connections as 総接続数,
     ROUND(ha.connection_strength, 3) as 平均接続強度,
-    ROUND(ha.hub_importance, 3) as ハブ重要度,
-    CASE ha.table_name
-        WHEN 'existence_concepts' THEN ec.cultural_context
-        WHEN 'nothingness_concepts' THEN nc.cultural_context
-        WHEN 'dao_concepts' THEN dc.cultural_context
-        WHEN 'divine_concepts' THEN dv.cultural_context
-        WHEN 'consciousness_concepts' THEN cc.cultural_context
-        ELSE 'Unknown'
-    END as 文化的背景
+    -- ハブ重要度 = 接続数 × 平均強度
+    ROUND(ha.total_connections * ha.connection_strength, 3) as ハブ重要度,
+    COALESCE(reg.cultural_context, 'Unknown') as 文化的背景
 FROM hub_analysis ha
-LEFT JOIN existence_concepts ec ON ha.table_name = 'existence_concepts' AND ha.concept_id = ec.id
-LEFT JOIN nothingness_concepts nc ON ha.table_name = 'nothingness_concepts' AND ha.concept_id = nc.id
-LEFT JOIN dao_concepts dc ON ha.table_name = 'dao_concepts' AND ha.concept_id = dc.id
-LEFT JOIN divine_concepts dv ON ha.table_name = 'divine_concepts' AND ha.concept_id = dv.id
-LEFT JOIN consciousness_concepts cc ON ha.table_name = 'consciousness_concepts' AND ha.concept_id = cc.id
+-- 概念台帳で全10概念テーブルの名前を1回の索引検索で解決
+LEFT JOIN concept_registry reg ON reg.concept_table = ha.table_name AND reg.concept_id = ha.concept_id
 WHERE ha.total_connections > 0
-ORDER BY ha.hub_importance DESC;
+ORDER BY ha.total_connections * ha.connection_strength DESC;
 
 -- 3-2. パラドックス・矛盾の構造分析（従来の哲学では避けられた問題を正面から分析）
 WITH paradox_network AS (
@@ -224,20 +192,11 @@ WITH paradox_network AS (
         cr.relation_type as 関係タイプ,
         cr.strength as 関係強度,
         cr.logical_necessity as 論理的必然性,
-        CASE cr.target_table
-            WHEN 'existence_concepts' THEN ec.name
-            WHEN 'divine_concepts' THEN dc.name
-            ELSE '他概念'
-        END as 相互作用概念,
-        CASE cr.target_table
-            WHEN 'existence_concepts' THEN ec.cultural_context
-            WHEN 'divine_concepts' THEN dc.name
-            ELSE '不明'
-        END as 相互作用文化
+        COALESCE(reg.name, '他概念') as 相互作用概念,
+        COALESCE(reg.cultural_context, '不明') as 相互作用文化
     FROM nothingness_concepts nc
     JOIN concept_relations cr ON nc.id = cr.source_id AND cr.source_table = 'nothingness_concepts'
-    LEFT JOIN existence_concepts ec ON cr.target_table = 'existence_concepts' AND cr.target_id = ec.id
-    LEFT JOIN divine_concepts dc ON cr.target_table = 'divine_concepts' AND cr.target_id = dc.id
+    LEFT JOIN concept_registry reg ON reg.concept_table = cr.target_table AND reg.concept_id = cr.target_id
     WHERE nc.paradox_level >= 7  -- 高パラドックス概念のみ
 )
 SELECT 
@@ -265,21 +224,11 @@ ORDER BY パラドックス影響度 DESC;
 -- 「最も論理的に安定した概念関係」の特定
 
 SELECT 
-    cr.source_table || '.' || 
-    COALESCE(
-        (SELECT name FROM existence_concepts WHERE id = cr.source_id AND cr.source_table = 'existence_concepts'),
-        (SELECT name FROM nothingness_concepts WHERE id = cr.source_id AND cr.source_table = 'nothingness_concepts'),
-        (SELECT name FROM dao_concepts WHERE id = cr.source_id AND cr.source_table = 'dao_concepts')
-    ) as 起点概念,
+    cr.source_table || '.' || src.name as 起点概念,
     
     cr.relation_type as 関係,
     
-    cr.target_table || '.' ||
-    COALESCE(
-        (SELECT name FROM existence_concepts WHERE id = cr.target_id AND cr.target_table = 'existence_concepts'),
-        (SELECT name FROM nothingness_concepts WHERE id = cr.target_id AND cr.target_table = 'nothingness_concepts'),
-        (SELECT name FROM dao_concepts WHERE id = cr.target_id AND cr.target_table = 'dao_concepts')
-    ) as 終点概念,
+    cr.target_table || '.' || tgt.name as 終点概念,
     
     ROUND(cr.strength, 3) as 関係強度,
     cr.logical_necessity as 論理的必然性,
@@ -303,6 +252,8 @@ SELECT
         END, 4) as 総合安定性スコア
 
 FROM concept_relations cr
+LEFT JOIN concept_registry src ON src.concept_table = cr.source_table AND src.concept_id = cr.source_id
+LEFT JOIN concept_registry tgt ON tgt.concept_table = cr.target_table AND tgt.concept_id = cr.target_id
 WHERE cr.strength >= 0.5  -- ある程度の関係強度がある関係のみ
 ORDER BY 総合安定性スコア DESC, 関係強度 DESC
 LIMIT 15;
\ No newline at end of file
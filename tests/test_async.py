@@ -0,0 +1,74 @@
+"""AsyncMetaphysicsDB の読み取り・書き込み・ストリーミングのテスト"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from metaphysics_python import AsyncMetaphysicsDB, MetaphysicsDB
+
+
+class AsyncMetaphysicsDBTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'async.db')
+        MetaphysicsDB(self.path).insert_sample_data()
+        self.db = AsyncMetaphysicsDB(self.path, readers=3, max_pending=2)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+
+    def relation(self, n):
+        return {'source_table': 'dao_concepts', 'source_id': 1, 'target_table': 'time_concepts',
+                'target_id': n, 'relation_type': 'generates', 'strength': n / 100}
+
+    async def test_concurrent_reads_and_serialized_writes(self):
+        sync = MetaphysicsDB(self.path)
+        expected = sync.query_cross_cultural_concepts()
+        writes = [self.db.add_custom_concept('concept_relations', **self.relation(n))
+                  for n in range(1, 21)]
+        reads = [self.db.query_cross_cultural_concepts() for _ in range(10)]
+        results = await asyncio.gather(*writes, *reads)
+        ids, cross = results[:20], results[20:]
+        self.assertEqual(len(set(ids)), 20)
+        self.assertTrue(all(result == expected for result in cross))
+        analysis = await self.db.concept_network_analysis()
+        self.assertEqual(analysis, sync.concept_network_analysis())
+
+    async def test_astream_matches_sync_iterator(self):
+        await self.db.add_custom_concepts('concept_relations',
+                                          [self.relation(n) for n in range(1, 51)])
+        expected = list(MetaphysicsDB(self.path).iter_relations(row_type='tuple'))
+        rows = [row async for row in self.db.astream('iter_relations', row_type='tuple',
+                                                     batch_size=7, max_batches=1)]
+        self.assertEqual(rows, expected)
+        with self.assertRaises(ValueError):
+            self.db.astream('add_custom_concept')
+
+    async def test_stream_can_stop_early(self):
+        await self.db.add_custom_concepts('concept_relations',
+                                          [self.relation(n) for n in range(1, 51)])
+        stream = self.db.iterate("SELECT id FROM concept_relations ORDER BY id", batch_size=5,
+                                 max_batches=1)
+        seen = []
+        async for row in stream:
+            seen.append(row['id'])
+            if len(seen) == 3:
+                break
+        await stream.aclose()
+        self.assertEqual(len(seen), 3)
+        # 読み取りスレッドが解放され、次の呼び出しが進む
+        self.assertTrue(await asyncio.wait_for(self.db.search('存在'), 5))
+
+    async def test_iterate_rejects_writes(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            async for _ in self.db.iterate("DELETE FROM concept_relations RETURNING id"):
+                pass
+        self.assertTrue(await self.db.concept_network_analysis())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""ベンチマークの合成データ生成と集計関数のテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_benchmark import (SAMPLE_QUERIES_PATH, generate_synthetic_data,
+                                   latency_summary, scaled_counts, split_sql_statements)
+from metaphysics_python import CONCEPT_TABLES, INDEX_DEFINITIONS, MetaphysicsDB
+
+
+class SyntheticDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def generate(self, name, **sizes):
+        db = MetaphysicsDB(os.path.join(self.tmp.name, name))
+        rates = generate_synthetic_data(db, **sizes)
+        with db.get_connection() as conn:
+            counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in CONCEPT_TABLES + ('concept_relations', 'contradictions',
+                                                     'cultural_interpretations')}
+        return db, rates, counts
+
+    def test_requested_counts(self):
+        db, rates, counts = self.generate('counts.db', concepts=50, relations=500,
+                                          contradictions=40, interpretations=30, seed=1)
+        self.assertEqual(set(rates), {'concepts', 'relations', 'contradictions', 'interpretations'})
+        for table in CONCEPT_TABLES:
+            self.assertEqual(counts[table], 50)
+        # 自然キーが重なった関係は捨てられるため、要求した件数を超えない
+        self.assertLessEqual(counts['concept_relations'], 500)
+        self.assertGreater(counts['concept_relations'], 400)
+        self.assertEqual(counts['contradictions'], 40)
+        self.assertEqual(counts['cultural_interpretations'], 30)
+        with db.get_connection() as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            # id の小さい概念ほど多くの関係を持つ
+            hub, tail = conn.execute("""
+                SELECT SUM(source_id <= 5), SUM(source_id > 45) FROM concept_relations
+            """).fetchone()
+        self.assertTrue(set(INDEX_DEFINITIONS) <= indexes)
+        self.assertGreater(hub, tail)
+
+    def test_same_seed_is_reproducible_and_appends(self):
+        first, _, _ = self.generate('a.db', concepts=20, relations=100, contradictions=10,
+                                    interpretations=10, seed=4)
+        second, _, _ = self.generate('b.db', concepts=20, relations=100, contradictions=10,
+                                     interpretations=10, seed=4)
+        query = "SELECT source_table, source_id, target_table, target_id, strength FROM concept_relations"
+        with first.get_connection() as a, second.get_connection() as b:
+            self.assertEqual(a.execute(query).fetchall(), b.execute(query).fetchall())
+        # 既存の行の後ろに追加する
+        generate_synthetic_data(first, concepts=5, relations=10, contradictions=1,
+                                interpretations=1, seed=5)
+        with first.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM dao_concepts").fetchone()[0], 25)
+
+    def test_scaled_counts(self):
+        self.assertEqual(scaled_counts(1000), {'concepts': 50, 'relations': 1000,
+                                               'contradictions': 100, 'interpretations': 100})
+        self.assertEqual(scaled_counts(10)['concepts'], 10)
+
+
+class ReportHelpersTest(unittest.TestCase):
+
+    def test_latency_summary(self):
+        summary = latency_summary([0.004, 0.001, 0.003, 0.002])
+        self.assertEqual((summary['count'], summary['min'], summary['max']), (4, 0.001, 0.004))
+        self.assertEqual(summary['p50'], 0.002)
+        self.assertAlmostEqual(summary['mean'], 0.0025)
+        self.assertAlmostEqual(summary['throughput_per_sec'], 400)
+
+    def test_sample_queries_are_split_into_statements(self):
+        with open(SAMPLE_QUERIES_PATH, encoding='utf-8') as f:
+            statements = split_sql_statements(f.read())
+        self.assertTrue(statements)
+        self.assertEqual(len({label for label, _ in statements}), len(statements))
+        self.assertTrue(all(sql.rstrip().endswith(';') for _, sql in statements))
+
+
+if __name__ == '__main__':
+    unittest.main()
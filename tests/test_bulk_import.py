@@ -0,0 +1,124 @@
+"""bulk_import の自然キーの重複の扱い（on_conflict ごと）のテスト"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class BulkImportNaturalKeyTest(unittest.TestCase):
+    """既存の概念と自然キーが重なり id だけが違う概念を取り込む"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'target.db'))
+        self.filler_id, self.being_id = self.db.add_custom_concepts('existence_concepts', [
+            {'name': '埋め草', 'cultural_context': 'western', 'definition': '既存'},
+            {'name': '存在', 'cultural_context': 'western', 'definition': '既存の定義'},
+        ])
+        self.void_id = self.db.add_custom_concept(
+            'nothingness_concepts', name='虚無', cultural_context='buddhist')
+        self.db.add_custom_concept(
+            'concept_relations', source_table='existence_concepts', source_id=self.being_id,
+            target_table='nothingness_concepts', target_id=self.void_id, relation_type='opposes')
+
+        # 取り込む側では「存在」が別の id を持ち、関係もその id を参照する
+        self.imported_id = 100
+        self.path = os.path.join(self.tmp.name, 'import.json')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'existence_concepts': [
+                    {'id': self.imported_id, 'name': '存在', 'cultural_context': 'western',
+                     'definition': '取り込んだ定義'},
+                ],
+                'nothingness_concepts': [
+                    {'id': 50, 'name': '空', 'cultural_context': 'buddhist'},
+                ],
+                'concept_relations': [
+                    {'id': 500, 'source_table': 'existence_concepts', 'source_id': self.imported_id,
+                     'target_table': 'nothingness_concepts', 'target_id': 50,
+                     'relation_type': 'contains'},
+                    {'id': 501, 'source_table': 'existence_concepts', 'source_id': self.imported_id,
+                     'target_table': 'nothingness_concepts', 'target_id': self.void_id,
+                     'relation_type': 'opposes'},
+                ],
+            }, f, ensure_ascii=False)
+
+    def fetch(self, sql, params=()):
+        with self.db.get_connection() as conn:
+            return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+    def assert_consistent(self):
+        """台帳・検索索引が概念テーブルと一致し、関係の参照先がすべて存在する"""
+        self.assertEqual(
+            self.fetch("SELECT concept_id, name FROM concept_registry"
+                       " WHERE concept_table = 'existence_concepts' ORDER BY concept_id"),
+            self.fetch("SELECT id, name FROM existence_concepts ORDER BY id"))
+        self.assertEqual(len(self.db.search('存在', tables=['existence_concepts'])), 1)
+        dangling = self.fetch("""
+            SELECT r.id FROM concept_relations r
+            WHERE NOT EXISTS (SELECT 1 FROM concept_registry g
+                              WHERE g.concept_table = r.source_table AND g.concept_id = r.source_id)
+               OR NOT EXISTS (SELECT 1 FROM concept_registry g
+                              WHERE g.concept_table = r.target_table AND g.concept_id = r.target_id)
+        """)
+        self.assertEqual(dangling, [])
+
+    def relations(self):
+        return self.fetch("""
+            SELECT source_id, target_table, target_id, relation_type FROM concept_relations
+            ORDER BY relation_type
+        """)
+
+    def test_abort_rejects_natural_key_collision(self):
+        before = self.fetch("SELECT * FROM existence_concepts ORDER BY id")
+        with self.assertRaisesRegex(ValueError, '存在'):
+            self.db.bulk_import(self.path, on_conflict='abort')
+        self.assertEqual(self.fetch("SELECT * FROM existence_concepts ORDER BY id"), before)
+        self.assertEqual(self.fetch("SELECT COUNT(*) FROM nothingness_concepts"), [(1,)])
+        self.assert_consistent()
+
+    def test_ignore_keeps_existing_row_and_remaps_relations(self):
+        self.db.bulk_import(self.path, on_conflict='ignore')
+        self.assertEqual(self.fetch("SELECT id, definition FROM existence_concepts WHERE name = '存在'"),
+                         [(self.being_id, '既存の定義')])
+        # 既存の関係と重なった opposes は1件にまとまる
+        self.assertEqual(self.relations(), [
+            (self.being_id, 'nothingness_concepts', 50, 'contains'),
+            (self.being_id, 'nothingness_concepts', self.void_id, 'opposes'),
+        ])
+        self.assert_consistent()
+
+    def test_replace_updates_existing_row_and_remaps_relations(self):
+        self.db.bulk_import(self.path, on_conflict='replace')
+        self.assertEqual(self.fetch("SELECT id, definition FROM existence_concepts WHERE name = '存在'"),
+                         [(self.being_id, '取り込んだ定義')])
+        self.assertEqual(self.fetch("SELECT COUNT(*) FROM existence_concepts"), [(2,)])
+        self.assertEqual(self.relations(), [
+            (self.being_id, 'nothingness_concepts', 50, 'contains'),
+            (self.being_id, 'nothingness_concepts', self.void_id, 'opposes'),
+        ])
+        self.assertEqual(self.db.search('取り込んだ定義')[0]['source_id'], self.being_id)
+        self.assert_consistent()
+
+    def test_split_export_resolves_concepts_before_relations(self):
+        # 分割NDJSON ではファイル名順だと concept_relations が概念より先に来る
+        directory = os.path.join(self.tmp.name, 'split')
+        with open(self.path, encoding='utf-8') as f:
+            tables = json.load(f)
+        os.makedirs(directory)
+        for table, rows in tables.items():
+            with open(os.path.join(directory, f'{table}.ndjson'), 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.db.bulk_import(directory, on_conflict='ignore')
+        self.assertEqual(self.fetch("SELECT DISTINCT source_id FROM concept_relations"),
+                         [(self.being_id,)])
+        self.assert_consistent()
+
+
+if __name__ == '__main__':
+    unittest.main()
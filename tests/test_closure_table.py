@@ -0,0 +1,115 @@
+"""推移閉包テーブル（enable_closure_table）のトリガーによる増分更新と失効のテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class ClosureTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'closure.db'))
+        self.db.insert_sample_data()
+        self.db.enable_closure_table()
+
+    def closure(self):
+        with self.db.get_connection() as conn:
+            return sorted(tuple(row) for row in conn.execute("SELECT * FROM concept_closure"))
+
+    def rebuilt_closure(self):
+        self.db.rebuild_closure_table()
+        return self.closure()
+
+    def relate(self, source, target, relation_type='generates'):
+        return self.db.add_custom_concept(
+            'concept_relations', source_table=source[0], source_id=source[1],
+            target_table=target[0], target_id=target[1], relation_type=relation_type)
+
+    def lineage(self, use_closure):
+        return {
+            'descendants': self.db.concept_descendants('dao_concepts', 1, use_closure=use_closure),
+            'ancestors': self.db.concept_ancestors('time_concepts', 1, use_closure=use_closure),
+        }
+
+    def test_insert_trigger_keeps_closure_complete(self):
+        self.relate(('dao_concepts', 1), ('existence_concepts', 1))
+        self.relate(('existence_concepts', 1), ('time_concepts', 1))
+        # 既存の経路より短い辺を足すと深さが縮む
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'creates')
+        incremental = self.closure()
+        self.assertTrue(self.db._closure_available())
+        self.assertEqual(incremental, self.rebuilt_closure())
+        self.assertEqual(self.lineage(True), self.lineage(False))
+
+    def test_null_strength_edges_are_followed_everywhere(self):
+        with self.db.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO concept_relations
+                    (source_table, source_id, target_table, target_id, relation_type, strength)
+                VALUES (?, ?, ?, ?, 'generates', ?)
+            """, [('dao_concepts', 1, 'existence_concepts', 1, None),
+                  ('existence_concepts', 1, 'time_concepts', 1, None),
+                  ('time_concepts', 1, 'space_concepts', 1, 0.2)])
+            conn.commit()
+        self.assertTrue(self.db._closure_available())
+        closure = self.lineage(True)
+        self.assertIn(('time_concepts', 1), {
+            (row['concept_table'], row['concept_id']) for row in closure['descendants']})
+        self.assertEqual(closure, self.lineage(False))
+        graph = {
+            'descendants': self.db.concept_descendants('dao_concepts', 1, use_graph=True),
+            'ancestors': self.db.concept_ancestors('time_concepts', 1, use_graph=True),
+        }
+        self.assertEqual(closure, graph)
+        # NULL は 0.5 とみなすため、0.5 以下の絞り込みでは残り、それより上では落ちる
+        for min_strength in (0.5, 0.6):
+            with self.subTest(min_strength=min_strength):
+                self.assertEqual(
+                    self.db.concept_descendants('dao_concepts', 1, min_strength=min_strength),
+                    self.db.concept_descendants('dao_concepts', 1, min_strength=min_strength,
+                                                use_graph=True))
+        self.assertEqual(len(self.db.concept_paths('dao_concepts', 1, 'space_concepts', 1)), 1)
+
+    def test_rebuild_invalidates_cached_lineage(self):
+        self.db = MetaphysicsDB(self.db.db_path, result_cache_size=16)
+        self.addCleanup(self.db.close)
+        self.lineage(None)
+        self.assertGreater(self.db.cache_stats()['size'], 0)
+        self.db.rebuild_closure_table()
+        self.assertEqual(self.db.cache_stats()['size'], 0)
+        self.lineage(None)
+        self.db.enable_closure_table()
+        self.assertEqual(self.db.cache_stats()['size'], 0)
+
+    def test_delete_marks_closure_stale_until_rebuild(self):
+        relation_id = self.relate(('dao_concepts', 1), ('existence_concepts', 1))
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM concept_relations WHERE id = ?", (relation_id,))
+            conn.commit()
+        self.assertFalse(self.db._closure_available())
+        # 失効中は再帰CTEに戻るため、削除した辺はたどられない
+        self.assertNotIn(('existence_concepts', 1), {
+            (row['concept_table'], row['concept_id'])
+            for row in self.db.concept_descendants('dao_concepts', 1)})
+        self.db.rebuild_closure_table()
+        self.assertTrue(self.db._closure_available())
+        self.assertEqual(self.lineage(True), self.lineage(False))
+
+    def test_update_of_endpoints_marks_closure_stale(self):
+        relation_id = self.relate(('dao_concepts', 1), ('existence_concepts', 1))
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE concept_relations SET strength = 0.5 WHERE id = ?", (relation_id,))
+            conn.commit()
+        self.assertTrue(self.db._closure_available())
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE concept_relations SET target_id = 2 WHERE id = ?", (relation_id,))
+            conn.commit()
+        self.assertFalse(self.db._closure_available())
+
+
+if __name__ == '__main__':
+    unittest.main()
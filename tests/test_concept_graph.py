@@ -0,0 +1,95 @@
+"""ConceptGraph（CSR配列のグラフ）の PageRank・中心性・最短経路・強連結成分のテスト"""
+
+import math
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import ConceptGraph, MetaphysicsDB
+
+A, B, C, D = (('dao_concepts', 1), ('existence_concepts', 1),
+              ('nothingness_concepts', 1), ('time_concepts', 1))
+# A → B → C → A の循環と、循環へ入るだけの D
+EDGES = [(1, A, B, 'generates', 0.9), (2, B, C, 'generates', 0.9), (3, C, A, 'contains', 0.5),
+         (4, D, A, 'depends_on', 0.5), (5, A, C, 'opposes', 0.1)]
+
+
+class ConceptGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = ConceptGraph.from_rows(
+            (relation_id,) + source + target + (relation_type, strength)
+            for relation_id, source, target, relation_type, strength in EDGES)
+        self.index = self.graph.node_index
+
+    def score(self, scores, node):
+        return scores[self.index[node]]
+
+    def test_csr_arrays_and_degree(self):
+        self.assertEqual((self.graph.node_count, self.graph.edge_count), (4, 5))
+        degree = self.graph.degree()
+        self.assertEqual(self.score(degree['out_degree'], A), 2)
+        self.assertEqual(self.score(degree['in_degree'], A), 2)
+        self.assertEqual(self.score(degree['in_degree'], D), 0)
+        weighted = self.graph.degree(weighted=True)
+        self.assertAlmostEqual(self.score(weighted['out_degree'], A), 1.0)
+        self.assertAlmostEqual(self.score(weighted['in_degree'], C), 1.0)
+
+    def test_pagerank(self):
+        damping = 0.85
+        ranks = self.graph.pagerank(damping=damping, tol=1e-12, max_iter=1000)
+        self.assertAlmostEqual(sum(ranks), 1.0)
+        teleport = (1 - damping) / 4
+        # 入辺のない D はテレポートの分だけを持つ
+        self.assertAlmostEqual(self.score(ranks, D), teleport)
+        # B へは A の出辺の強度の 0.9 / 1.0 が流れる
+        self.assertAlmostEqual(self.score(ranks, B), teleport + damping * 0.9 * self.score(ranks, A))
+        self.assertEqual(max(self.graph.nodes, key=lambda node: self.score(ranks, node)), A)
+
+    def test_centrality(self):
+        eigenvector = self.graph.eigenvector_centrality(max_iter=1000)
+        self.assertAlmostEqual(math.sqrt(sum(x * x for x in eigenvector)), 1.0)
+        self.assertAlmostEqual(self.score(eigenvector, D), 0.0, places=3)
+        betweenness = self.graph.betweenness_centrality(normalized=False)
+        # D から B・C への最短経路はすべて A を通る
+        self.assertEqual(self.score(betweenness, D), 0.0)
+        self.assertGreater(self.score(betweenness, A), self.score(betweenness, B))
+
+    def test_strongly_connected_components(self):
+        component = self.graph.strongly_connected_components()
+        cycle = {self.score(component, node) for node in (A, B, C)}
+        self.assertEqual(len(cycle), 1)
+        self.assertNotIn(self.score(component, D), cycle)
+
+    def test_shortest_path(self):
+        strongest = self.graph.shortest_path(D, C)
+        self.assertEqual(strongest['nodes'], [D, A, B, C])
+        self.assertAlmostEqual(math.exp(-strongest['cost']), 0.5 * 0.9 * 0.9)
+        fewest = self.graph.shortest_path(D, C, weighted=False)
+        self.assertEqual(fewest['nodes'], [D, A, C])
+        self.assertEqual([relation['relation_id'] for relation in fewest['relations']], [4, 5])
+        self.assertIsNone(self.graph.shortest_path(C, D))
+        self.assertEqual(self.graph.traverse(D), {A: 1, B: 2, C: 2})
+
+
+class ConceptGraphDatabaseTest(unittest.TestCase):
+
+    def test_methods_read_the_relations_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = MetaphysicsDB(os.path.join(directory, 'graph.db'))
+            db.insert_sample_data()
+            graph = db.build_concept_graph()
+            with db.get_connection() as conn:
+                self.assertEqual(graph.edge_count,
+                                 conn.execute("SELECT COUNT(*) FROM concept_relations").fetchone()[0])
+            ranking = db.concept_pagerank(top_n=None)
+            self.assertEqual(len(ranking), graph.node_count)
+            self.assertTrue(all(row['name'] for row in ranking))
+            self.assertIsNotNone(db.concept_shortest_path('dao_concepts', 1,
+                                                          'nothingness_concepts', 1))
+            with self.assertRaises(ValueError):
+                db.concept_centrality('closeness')
+
+
+if __name__ == '__main__':
+    unittest.main()
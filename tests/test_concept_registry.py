@@ -0,0 +1,58 @@
+"""概念台帳（concept_registry）がトリガーで全概念テーブルに追従することのテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import CONCEPT_TABLES, MetaphysicsDB, concept_key
+
+
+class ConceptRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'registry.db'))
+        self.db.insert_sample_data()
+
+    def registry(self):
+        with self.db.get_connection() as conn:
+            return sorted(tuple(row) for row in conn.execute("""
+                SELECT concept_key, concept_table, concept_id, name, cultural_context
+                FROM concept_registry
+            """))
+
+    def concepts(self):
+        with self.db.get_connection() as conn:
+            return sorted((concept_key(table, row[0]), table) + tuple(row)
+                          for table in CONCEPT_TABLES
+                          for row in conn.execute(
+                              f"SELECT id, name, cultural_context FROM {table}"))
+
+    def test_registry_follows_inserts_updates_and_deletes(self):
+        self.assertEqual(self.registry(), self.concepts())
+        ids = {table: self.db.add_custom_concept(table, name=f'{table}の新概念',
+                                                 cultural_context='test')
+               for table in CONCEPT_TABLES}
+        self.assertEqual(self.registry(), self.concepts())
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE good_concepts SET name = '改名', cultural_context = NULL WHERE id = ?",
+                         (ids['good_concepts'],))
+            conn.execute("UPDATE universal_concepts SET id = 900 WHERE id = ?",
+                         (ids['universal_concepts'],))
+            conn.execute("DELETE FROM space_concepts WHERE id = ?", (ids['space_concepts'],))
+            conn.commit()
+        self.assertEqual(self.registry(), self.concepts())
+        self.assertIn((concept_key('universal_concepts', 900), 'universal_concepts', 900,
+                       'universal_conceptsの新概念', 'test'), self.registry())
+
+    def test_every_concept_table_resolves_to_a_name(self):
+        keys = [(table, self.db.add_custom_concept(table, name=f'{table}の名'))
+                for table in CONCEPT_TABLES]
+        resolved = self.db._resolve_concepts(keys)
+        self.assertEqual({key: value['name'] for key, value in resolved.items()},
+                         {(table, concept_id): f'{table}の名' for table, concept_id in keys})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""列指向スナップショット（concept_snapshot）が概念テーブルの内容と一致することのテスト"""
+
+import importlib.util
+import math
+import os
+import tempfile
+import unittest
+
+from metaphysics_benchmark import generate_synthetic_data
+from metaphysics_python import CONCEPT_TABLES, MetaphysicsDB
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+class ConceptSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'snapshot.db'))
+        self.db.insert_sample_data()
+        generate_synthetic_data(self.db, concepts=30, relations=50, contradictions=1,
+                                interpretations=1, seed=2)
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE nothingness_concepts SET paradox_level = NULL WHERE id % 7 = 0")
+            conn.commit()
+
+    @unittest.skipIf(HAS_NUMPY, "NumPy がインストールされている")
+    def test_requires_numpy(self):
+        with self.assertRaises(ImportError):
+            self.db.concept_snapshot()
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy が必要")
+    def test_columns_match_tables(self):
+        snapshot = self.db.concept_snapshot()
+        with self.db.get_connection() as conn:
+            for table in CONCEPT_TABLES:
+                with self.subTest(table=table):
+                    numeric = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+                               if row[1] != 'id'
+                               and row[2].upper() in ('INTEGER', 'REAL', 'BOOLEAN')]
+                    self.assertEqual(snapshot.columns(table), numeric)
+                    rows = conn.execute(f"""
+                        SELECT id, cultural_context{''.join(', ' + column for column in numeric)}
+                        FROM {table} ORDER BY id
+                    """).fetchall()
+                    columns = snapshot.tables[table]
+                    self.assertEqual(columns['id'].tolist(), [row[0] for row in rows])
+                    self.assertEqual([None if code < 0 else snapshot.cultures[code]
+                                      for code in columns['cultural_context'].tolist()],
+                                     [row[1] for row in rows])
+                    for position, column in enumerate(numeric, start=2):
+                        for value, row in zip(columns[column].tolist(), rows):
+                            if row[position] is None:
+                                self.assertTrue(math.isnan(value))
+                            else:
+                                self.assertEqual(value, float(row[position]))
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy が必要")
+    def test_group_by_matches_sql(self):
+        snapshot = self.db.concept_snapshot(['nothingness_concepts'])
+        with self.db.get_connection() as conn:
+            expected = {row[0]: (row[1], row[2]) for row in conn.execute("""
+                SELECT cultural_context, COUNT(paradox_level), AVG(paradox_level)
+                FROM nothingness_concepts
+                WHERE cultural_context IS NOT NULL AND paradox_level IS NOT NULL
+                GROUP BY cultural_context
+            """)}
+        groups = snapshot.group_by('nothingness_concepts', 'paradox_level')
+        self.assertEqual({group['group'] for group in groups}, set(expected))
+        for group in groups:
+            count, mean = expected[group['group']]
+            self.assertEqual(group['count'], count)
+            self.assertAlmostEqual(group['mean'], mean)
+        histogram = snapshot.histogram('nothingness_concepts', 'paradox_level', bins=5)
+        with self.db.get_connection() as conn:
+            present, missing = conn.execute("""
+                SELECT COUNT(paradox_level), COUNT(*) - COUNT(paradox_level) FROM nothingness_concepts
+            """).fetchone()
+        self.assertEqual((sum(histogram['counts']), histogram['missing']), (present, missing))
+        self.assertGreater(missing, 0)
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy が必要")
+    def test_snapshot_is_refreshed_after_write(self):
+        before = self.db.concept_snapshot(['dao_concepts'])
+        self.assertIs(self.db.concept_snapshot(['dao_concepts']), before)
+        self.db.add_custom_concept('dao_concepts', name='新しい道', cultural_context='daoist')
+        after = self.db.concept_snapshot(['dao_concepts'])
+        self.assertEqual(len(after.tables['dao_concepts']['id']),
+                         len(before.tables['dao_concepts']['id']) + 1)
+        path = os.path.join(self.tmp.name, 'dao.npz')
+        self.db.save_concept_snapshot(path, ['dao_concepts'])
+        self.assertEqual(self.db.load_concept_snapshot(path).fingerprint(), after.fingerprint())
+
+
+if __name__ == '__main__':
+    unittest.main()
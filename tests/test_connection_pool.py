@@ -0,0 +1,105 @@
+"""接続プール（pooled=True）の再利用・返却・fork 後の初期化のテスト"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'pool.db'), pooled=True, pool_size=2)
+        self.addCleanup(self.db.close)
+
+    def test_connection_is_reused_and_uses_wal(self):
+        with self.db.get_connection() as outer:
+            with self.db.get_connection() as inner:
+                self.assertIs(inner, outer)
+            self.assertEqual(outer.execute("PRAGMA journal_mode").fetchone()[0].lower(), 'wal')
+        with self.db.get_connection() as again:
+            self.assertIs(again, outer)
+        self.assertEqual(len(self.db._pool_connections), 1)
+
+    def test_release_rolls_back_uncommitted_changes(self):
+        with self.db.get_connection() as conn:
+            conn.execute("INSERT INTO existence_concepts (name) VALUES ('未確定')")
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM existence_concepts").fetchone()[0], 0)
+
+    def test_pool_size_bounds_concurrent_connections(self):
+        held = threading.Barrier(3)
+        done = threading.Event()
+        seen = []
+
+        def worker():
+            with self.db.get_connection() as conn:
+                seen.append(conn)
+                held.wait()
+                done.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        held.wait()
+        self.assertEqual(len({id(conn) for conn in seen}), 2)
+        self.assertEqual(len(self.db._pool_connections), 2)
+        done.set()
+        for thread in threads:
+            thread.join()
+        # 上限に達した後は返却された接続を使い回す
+        with self.db.get_connection() as conn:
+            self.assertIn(conn, seen)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "fork のない環境")
+    def test_child_process_opens_its_own_connections(self):
+        with self.db.get_connection() as parent_conn:
+            pass
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                with self.db.get_connection() as conn:
+                    conn.execute("INSERT INTO existence_concepts (name) VALUES ('子')")
+                    conn.commit()
+                    if conn is not parent_conn and parent_conn in self.db._abandoned_connections:
+                        status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        # 親の接続は子に閉じられておらず、子の書き込みも見える
+        with self.db.get_connection() as conn:
+            self.assertIs(conn, parent_conn)
+            self.assertEqual(conn.execute("SELECT name FROM existence_concepts").fetchall()[0][0], '子')
+
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "fork のない環境")
+    def test_fork_inside_open_block_does_not_reuse_parent_connection(self):
+        with self.db.get_connection() as parent_conn:
+            parent_conn.execute("INSERT INTO existence_concepts (name) VALUES ('親の未確定')")
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    with self.db.get_connection() as conn:
+                        # 子の接続からは親の未コミットの行は見えない
+                        visible = conn.execute("SELECT COUNT(*) FROM existence_concepts").fetchone()[0]
+                        if conn is not parent_conn and visible == 0:
+                            status = 0
+                finally:
+                    os._exit(status)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            # 親の接続とトランザクションは子に触られていない
+            self.assertTrue(parent_conn.in_transaction)
+            self.assertEqual(parent_conn.execute("SELECT name FROM existence_concepts").fetchall()[0][0],
+                             '親の未確定')
+
+
+if __name__ == '__main__':
+    unittest.main()
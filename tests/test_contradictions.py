@@ -0,0 +1,127 @@
+"""矛盾検出（detect_contradictions）の規則と、増分実行が全件走査と一致することのテスト"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from metaphysics_python import CONCEPT_TABLES, CONTRADICTION_RULES, MetaphysicsDB
+
+
+class ContradictionDetectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'contradictions.db'))
+        self.db.insert_sample_data()
+        self.db.detect_contradictions()
+
+    def relate(self, source, target, relation_type, necessity=None):
+        return self.db.add_custom_concept(
+            'concept_relations', source_table=source[0], source_id=source[1],
+            target_table=target[0], target_id=target[1], relation_type=relation_type,
+            logical_necessity=necessity)
+
+    def detected(self):
+        with self.db.get_connection() as conn:
+            return sorted(tuple(row) for row in conn.execute(f"""
+                SELECT contradiction_type, concept1_table, concept1_id, concept2_table, concept2_id,
+                       resolution_attempts
+                FROM contradictions
+                WHERE contradiction_type IN ({','.join('?' * len(CONTRADICTION_RULES))})
+            """, list(CONTRADICTION_RULES)))
+
+    def test_reversed_relation_is_read_as_opposing(self):
+        # 道 → 時間 transcends と 時間 → 道 grounds（＝道 → 時間 depends_on）は対立する
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'transcends')
+        self.relate(('time_concepts', 1), ('dao_concepts', 1), 'grounds')
+        self.assertEqual(self.db.detect_contradictions(), {'added': 1, 'removed': 0})
+        self.assertIn(('opposing_relations', 'dao_concepts', 1, 'time_concepts', 1,
+                       'transcends / grounds（逆向き）'), self.detected())
+
+    def test_reversed_conflict_is_recorded_once(self):
+        # 時間 → 道 opposes は 道 → 時間 opposes と読めるが、時間の側から見た対はない
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'sustains')
+        self.relate(('time_concepts', 1), ('dao_concepts', 1), 'opposes')
+        self.db.detect_contradictions()
+        self.assertEqual([row for row in self.detected()
+                          if {row[1], row[3]} == {'dao_concepts', 'time_concepts'}],
+                         [('opposing_relations', 'dao_concepts', 1, 'time_concepts', 1,
+                           'sustains / opposes（逆向き）')])
+        # 逆向きの関係を消すと増分実行でも検出結果が消える
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                DELETE FROM concept_relations
+                WHERE source_table = 'time_concepts' AND relation_type = 'opposes'
+            """)
+            conn.commit()
+        self.assertEqual(self.db.detect_contradictions(), {'added': 0, 'removed': 1})
+
+    def test_necessity_conflict_over_inverse_pair(self):
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'creates', 'necessary')
+        self.relate(('time_concepts', 1), ('dao_concepts', 1), 'created_by', 'impossible')
+        self.db.detect_contradictions()
+        self.assertIn(('necessity_conflict', 'dao_concepts', 1, 'time_concepts', 1,
+                       'creates / created_by（逆向き）'), self.detected())
+        # 逆向きでも対になっていない種類なら矛盾ではない
+        self.relate(('time_concepts', 1), ('dao_concepts', 1), 'opposes', 'impossible')
+        self.db.detect_contradictions()
+        self.assertEqual(len([row for row in self.detected() if row[0] == 'necessity_conflict']), 1)
+
+    def test_user_edits_are_kept_and_comments_untouched(self):
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'contains')
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'is_empty_of')
+        self.db.detect_contradictions()
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                UPDATE contradictions SET unresolved = FALSE, philosopher_comments = '空は器である'
+                WHERE contradiction_type = 'opposing_relations' AND concept1_table = 'dao_concepts'
+            """)
+            conn.commit()
+        # 同じ組の別の変更で検査し直しても、成り立っている行は編集ごと残る
+        self.relate(('dao_concepts', 1), ('time_concepts', 1), 'generates')
+        self.db.detect_contradictions()
+        with self.db.get_connection() as conn:
+            row = conn.execute("""
+                SELECT unresolved, philosopher_comments, resolution_attempts FROM contradictions
+                WHERE contradiction_type = 'opposing_relations' AND concept1_table = 'dao_concepts'
+            """).fetchone()
+        self.assertEqual(tuple(row), (0, '空は器である', 'contains / is_empty_of'))
+
+    def test_incremental_detection_matches_full_scan(self):
+        rng = random.Random(11)
+        types = ['contains', 'is_empty_of', 'depends_on', 'transcends', 'sustains', 'opposes',
+                 'grounds', 'contained_in', 'sustained_by', 'transcended_by', 'creates',
+                 'created_by', 'generates']
+        for _ in range(5):
+            with self.db.get_connection() as conn:
+                for _ in range(60):
+                    ids = [row[0] for row in conn.execute("SELECT id FROM concept_relations")]
+                    action = rng.random()
+                    if action < 0.6 or not ids:
+                        conn.execute("""
+                            INSERT OR IGNORE INTO concept_relations
+                                (source_table, source_id, target_table, target_id, relation_type,
+                                 logical_necessity)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        """, (rng.choice(CONCEPT_TABLES), rng.randint(1, 2),
+                              rng.choice(CONCEPT_TABLES), rng.randint(1, 2), rng.choice(types),
+                              rng.choice([None, 'necessary', 'impossible'])))
+                    elif action < 0.8:
+                        conn.execute("""
+                            UPDATE OR IGNORE concept_relations
+                            SET relation_type = ?, logical_necessity = ? WHERE id = ?
+                        """, (rng.choice(types), rng.choice([None, 'necessary', 'impossible']),
+                              rng.choice(ids)))
+                    else:
+                        conn.execute("DELETE FROM concept_relations WHERE id = ?", (rng.choice(ids),))
+                conn.commit()
+            self.db.detect_contradictions()
+            incremental = self.detected()
+            self.assertEqual(self.db.detect_contradictions(full=True), {'added': 0, 'removed': 0})
+            self.assertEqual(self.detected(), incremental)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""add_custom_concept(s) による行の一括追加と列の照合のテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class AddCustomConceptsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'custom.db'))
+        self.db.insert_sample_data()
+
+    def test_columns_with_default_can_be_set(self):
+        ids = self.db.add_custom_concepts('concept_relations', [
+            {'source_table': 'dao_concepts', 'source_id': 1, 'target_table': 'time_concepts',
+             'target_id': 1, 'relation_type': 'generates', 'strength': 0.9,
+             'created_at': '2001-02-03 04:05:06'},
+            {'source_table': 'dao_concepts', 'source_id': 1, 'target_table': 'space_concepts',
+             'target_id': 1, 'relation_type': 'generates', 'strength': None},
+            {'source_table': 'dao_concepts', 'source_id': 1, 'target_table': 'time_concepts',
+             'target_id': 2, 'relation_type': 'generates'},
+        ])
+        with self.db.get_connection() as conn:
+            rows = {row['id']: (row['strength'], row['created_at']) for row in conn.execute(
+                "SELECT id, strength, created_at FROM concept_relations"
+                f" WHERE id IN ({','.join('?' * len(ids))})", ids)}
+        self.assertEqual(rows[ids[0]], (0.9, '2001-02-03 04:05:06'))
+        self.assertIsNone(rows[ids[1]][0])
+        # 指定しなかった列にはスキーマの既定値が入る
+        self.assertEqual(rows[ids[2]][0], 0.5)
+        self.assertIsNotNone(rows[ids[2]][1])
+
+    def test_upsert_updates_explicit_strength(self):
+        row = {'source_table': 'dao_concepts', 'source_id': 1, 'target_table': 'time_concepts',
+               'target_id': 1, 'relation_type': 'generates', 'strength': 0.3}
+        first = self.db.add_custom_concept('concept_relations', **row)
+        second = self.db.add_custom_concept('concept_relations', **dict(row, strength=0.7))
+        self.assertEqual(first, second)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT strength FROM concept_relations WHERE id = ?",
+                                          (first,)).fetchone()[0], 0.7)
+
+    def test_unknown_and_id_columns_are_rejected(self):
+        for row in ({'name': '未知', 'colour': 'blue'}, {'id': 99, 'name': '採番'}):
+            with self.subTest(row=row):
+                with self.assertRaises(ValueError):
+                    self.db.add_custom_concepts('dao_concepts', [row])
+        with self.assertRaises(ValueError):
+            self.db.add_custom_concepts('no_such_table', [{'name': '無'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""export_to_json の各出力形式・圧縮形式が bulk_import で元どおりに取り込めることのテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_benchmark import generate_synthetic_data
+from metaphysics_python import DATA_TABLES, MetaphysicsDB
+
+
+class ExportRoundTripTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.source = MetaphysicsDB(os.path.join(cls.tmp.name, 'source.db'))
+        cls.source.insert_sample_data()
+        generate_synthetic_data(cls.source, concepts=20, relations=200, contradictions=20,
+                                interpretations=20, seed=9)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    @staticmethod
+    def contents(db, tables=DATA_TABLES):
+        with db.get_connection() as conn:
+            return {table: [tuple(row) for row in conn.execute(f"SELECT * FROM {table} ORDER BY id")]
+                    for table in tables}
+
+    def round_trip(self, name, **options):
+        path = os.path.join(self.tmp.name, name)
+        counts = self.source.export_to_json(path, **options)
+        target = MetaphysicsDB(os.path.join(self.tmp.name, f'target-{name}.db'))
+        self.assertEqual(target.bulk_import(path), counts)
+        return counts, target
+
+    def test_formats_and_compressions_round_trip(self):
+        expected = self.contents(self.source)
+        cases = {
+            'pretty.json': {},
+            'pretty.json.gz': {},
+            'single.ndjson.bz2': {'format': 'ndjson'},
+            'split-xz': {'format': 'ndjson', 'split': True, 'compression': 'xz'},
+            'split-parallel': {'format': 'ndjson', 'split': True, 'parallel': True, 'workers': 2},
+            'parallel.ndjson': {'format': 'ndjson', 'parallel': True, 'workers': 2,
+                                'resolve_names': True, 'chunk_size': 7},
+        }
+        for name, options in cases.items():
+            with self.subTest(name=name):
+                counts, target = self.round_trip(name, **options)
+                self.assertEqual(counts, {table: len(rows) for table, rows in expected.items()})
+                self.assertEqual(self.contents(target), expected)
+
+    def test_table_and_created_at_filters(self):
+        with self.source.get_connection() as conn:
+            middle = conn.execute("""
+                SELECT created_at FROM concept_relations ORDER BY created_at
+                LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM concept_relations)
+            """).fetchone()[0]
+            expected = conn.execute("SELECT COUNT(*) FROM concept_relations WHERE created_at >= ?",
+                                    (middle,)).fetchone()[0]
+        counts, target = self.round_trip('filtered.ndjson', format='ndjson',
+                                         tables=['dao_concepts', 'concept_relations'],
+                                         created_after=middle)
+        self.assertEqual(set(counts), {'dao_concepts', 'concept_relations'})
+        self.assertEqual(counts['concept_relations'], expected)
+        self.assertEqual(self.contents(target, ['dao_concepts']),
+                         self.contents(self.source, ['dao_concepts']))
+
+    def test_invalid_options_are_rejected(self):
+        path = os.path.join(self.tmp.name, 'invalid')
+        for options in ({'format': 'xml'}, {'split': True}, {'tables': ['no_such_table']}):
+            with self.subTest(options=options):
+                with self.assertRaises(ValueError):
+                    self.source.export_to_json(path, **options)
+
+
+if __name__ == '__main__':
+    unittest.main()
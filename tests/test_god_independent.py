@@ -0,0 +1,41 @@
+"""find_god_independent_concepts の直列・並列実行のテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_benchmark import generate_synthetic_data
+from metaphysics_python import MetaphysicsDB
+
+
+class GodIndependentConceptsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'god.db'))
+        self.db.insert_sample_data()
+        generate_synthetic_data(self.db, concepts=30, relations=300, contradictions=10,
+                                interpretations=10, seed=3)
+
+    def test_parallel_matches_serial(self):
+        serial = self.db.find_god_independent_concepts()
+        self.assertTrue(any(serial.values()))
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                self.assertEqual(self.db.find_god_independent_concepts(parallel=True, workers=workers),
+                                 serial)
+
+    def test_created_concepts_are_excluded(self):
+        self.db.add_custom_concept('concept_relations', source_table='divine_concepts', source_id=1,
+                                   target_table='dao_concepts', target_id=1, relation_type='generates')
+        with self.db.get_connection() as conn:
+            name = conn.execute("SELECT name FROM dao_concepts WHERE id = 1").fetchone()[0]
+        for parallel in (False, True):
+            with self.subTest(parallel=parallel):
+                result = self.db.find_god_independent_concepts(parallel=parallel)
+                self.assertNotIn(name, [row['name'] for row in result['dao_concepts']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""SQL文の計測（enable_instrumentation）の集計・低速ログ・エクスポーターのテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'instrumented.db')
+        MetaphysicsDB(self.path).insert_sample_data()
+
+    def open(self, **kwargs):
+        db = MetaphysicsDB(self.path, **kwargs)
+        self.addCleanup(db.close)
+        return db
+
+    def test_stats_are_grouped_by_calling_method(self):
+        db = self.open()
+        db.enable_instrumentation()
+        db.concept_network_analysis()
+        db.concept_network_analysis()
+        methods = {row['method']: row for row in db.query_stats(group_by='method')}
+        self.assertEqual(methods['concept_network_analysis']['count'], 6)
+        statements = [row for row in db.query_stats() if row['method'] == 'concept_network_analysis']
+        self.assertEqual(len(statements), 3)
+        for row in statements:
+            self.assertEqual(row['count'], 2)
+            self.assertNotIn('\n', row['sql'])
+            self.assertLessEqual(row['p50_ms'], row['max_ms'])
+        self.assertEqual(db.slow_queries(), [])
+
+    def test_pooled_connection_setup_is_not_recorded(self):
+        db = self.open(pooled=True)
+        db.enable_instrumentation()
+        db.concept_network_analysis()
+        self.assertFalse([row for row in db.query_stats() if 'PRAGMA' in row['sql']])
+        self.assertEqual({row['method'] for row in db.query_stats(group_by='method')},
+                         {'concept_network_analysis'})
+
+    def test_slow_log_and_exporter(self):
+        db = self.open()
+        records = []
+        with self.assertLogs('metaphysics_python', level='WARNING'):
+            db.enable_instrumentation(slow_query_ms=0, explain='slow', exporter=records.append)
+            db.search('存在')
+        slow = db.slow_queries()
+        self.assertTrue(slow)
+        self.assertEqual(len(records), sum(row['count'] for row in db.query_stats()))
+        record = next(record for record in records
+                      if record['method'] == 'search' and record['rows'] > 0)
+        self.assertTrue(record['sql'].startswith('SELECT'))
+        self.assertTrue(record['plan'])
+        self.assertIn(record, slow)
+
+    def test_failing_exporter_does_not_break_queries(self):
+        db = self.open()
+
+        def exporter(record):
+            raise RuntimeError("収集先に接続できません")
+
+        db.enable_instrumentation(exporter=exporter)
+        with self.assertLogs('metaphysics_python', level='ERROR'):
+            self.assertTrue(db.concept_network_analysis()['hub_tables'])
+
+    def test_disabled_instrumentation_raises(self):
+        db = self.open()
+        db.enable_instrumentation()
+        db.disable_instrumentation()
+        with self.assertRaises(ValueError):
+            db.query_stats()
+        with self.assertRaises(ValueError):
+            db.slow_queries()
+
+
+if __name__ == '__main__':
+    unittest.main()
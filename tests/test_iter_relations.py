@@ -0,0 +1,57 @@
+"""iter_relations のキーセット方式のページ送りのテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class IterRelationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'iter.db'))
+        self.db.insert_sample_data()
+        with self.db.get_connection() as conn:
+            # 強度のない関係と、同じ強度の関係を混ぜる
+            conn.executemany("""
+                INSERT INTO concept_relations
+                    (source_table, source_id, target_table, target_id, relation_type, strength)
+                VALUES ('dao_concepts', 1, ?, ?, ?, ?)
+            """, [('time_concepts', 1, 'creates', None), ('time_concepts', 1, 'sustains', None),
+                  ('time_concepts', 2, 'creates', 0.5), ('space_concepts', 1, 'creates', 0.5),
+                  ('space_concepts', 1, 'sustains', None)])
+            conn.commit()
+
+    def expected(self):
+        with self.db.get_connection() as conn:
+            return [row[0] for row in conn.execute("""
+                SELECT id FROM concept_relations ORDER BY strength IS NULL, strength DESC, id DESC
+            """)]
+
+    def test_pages_cover_every_row_once(self):
+        expected = self.expected()
+        self.assertGreaterEqual(sum(1 for _ in self.db.iter_relations()), 8)
+        for limit in (1, 2, 3):
+            with self.subTest(limit=limit):
+                seen, after = [], None
+                while True:
+                    page = list(self.db.iter_relations(after=after, limit=limit))
+                    if not page:
+                        break
+                    self.assertLessEqual(len(page), limit)
+                    seen.extend(row['id'] for row in page)
+                    after = (page[-1]['strength'], page[-1]['id'])
+                self.assertEqual(seen, expected)
+
+    def test_page_after_null_strength_continues_with_null_rows(self):
+        null_ids = [row['id'] for row in self.db.iter_relations() if row['strength'] is None]
+        self.assertGreaterEqual(len(null_ids), 2)
+        rest = [row['id'] for row in self.db.iter_relations(after=(None, null_ids[0]))]
+        self.assertEqual(rest, null_ids[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""自然キーの一意索引と、索引のない旧版のデータベースの重複統合のテスト"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from metaphysics_python import NATURAL_KEYS, MetaphysicsDB
+
+
+class NaturalKeyMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'keys.db')
+        self.db = MetaphysicsDB(self.path)
+        self.db.insert_sample_data()
+
+    def fetch(self, sql, params=()):
+        with self.db.get_connection() as conn:
+            return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+    def make_legacy_duplicates(self):
+        """一意索引を外し、旧版の insert_sample_data の再実行と同じ重複を作る"""
+        conn = sqlite3.connect(self.path)
+        try:
+            for table in NATURAL_KEYS:
+                conn.execute(f"DROP INDEX idx_{table}_natural_key")
+            conn.execute("""
+                INSERT INTO existence_concepts (name, cultural_context, definition)
+                SELECT name, cultural_context, definition FROM existence_concepts
+            """)
+            duplicate_id = conn.execute(
+                "SELECT MAX(id) FROM existence_concepts WHERE name = '存在'").fetchone()[0]
+            # 重複した概念を参照する関係（残る行へ付け替えると既存の関係と重なる）と矛盾
+            copied = conn.execute("""
+                INSERT INTO concept_relations
+                    (source_table, source_id, target_table, target_id, relation_type)
+                SELECT source_table, source_id, 'existence_concepts', ?, relation_type
+                FROM concept_relations
+                WHERE target_table = 'existence_concepts' AND target_id = 1
+            """, (duplicate_id,)).rowcount
+            self.assertGreater(copied, 0)
+            conn.execute("""
+                INSERT INTO contradictions (concept1_table, concept1_id, concept2_table, concept2_id,
+                                            contradiction_type)
+                VALUES ('existence_concepts', ?, 'nothingness_concepts', 1, 'legacy')
+            """, (duplicate_id,))
+            conn.execute("PRAGMA user_version = 1")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_setup_merges_duplicates_and_remaps_references(self):
+        relations = self.fetch("SELECT source_table, source_id, target_table, target_id, relation_type"
+                               " FROM concept_relations ORDER BY id")
+        concepts = self.fetch("SELECT id, name FROM existence_concepts ORDER BY id")
+        self.make_legacy_duplicates()
+
+        self.db = MetaphysicsDB(self.path)
+        self.assertEqual(self.fetch("SELECT id, name FROM existence_concepts ORDER BY id"), concepts)
+        self.assertEqual(self.fetch("SELECT source_table, source_id, target_table, target_id,"
+                                    " relation_type FROM concept_relations ORDER BY id"), relations)
+        self.assertEqual(self.fetch("SELECT concept1_id FROM contradictions"
+                                    " WHERE contradiction_type = 'legacy'"), [(1,)])
+        # 台帳は削除トリガーで追従している
+        self.assertEqual(
+            self.fetch("SELECT concept_id FROM concept_registry"
+                       " WHERE concept_table = 'existence_concepts' ORDER BY concept_id"),
+            [(concept_id,) for concept_id, _ in concepts])
+        indexes = {name for name, in self.fetch("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({f"idx_{table}_natural_key" for table in NATURAL_KEYS} <= indexes)
+        self.assertEqual(self.fetch("PRAGMA integrity_check"), [('ok',)])
+
+    def test_sample_data_is_idempotent(self):
+        counts = self.fetch("SELECT (SELECT COUNT(*) FROM existence_concepts),"
+                            " (SELECT COUNT(*) FROM concept_relations)")
+        self.db.insert_sample_data()
+        self.assertEqual(self.fetch("SELECT (SELECT COUNT(*) FROM existence_concepts),"
+                                    " (SELECT COUNT(*) FROM concept_relations)"), counts)
+
+    def test_null_cultural_context_counts_as_same_key(self):
+        first = self.db.add_custom_concept('dao_concepts', name='無名', definition='一')
+        second = self.db.add_custom_concept('dao_concepts', name='無名', definition='二')
+        self.assertEqual(first, second)
+        self.assertEqual(self.fetch("SELECT definition FROM dao_concepts WHERE id = ?", (first,)),
+                         [('二',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
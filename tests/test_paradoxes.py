@@ -0,0 +1,48 @@
+"""analyze_paradoxes（向きごとの索引検索の UNION ALL）が書き換え前の OR 結合と一致することのテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_benchmark import LEGACY_PARADOX_SQL, populate_paradox_data
+from metaphysics_python import MetaphysicsDB
+
+COLUMNS = ('existence_name', 'existence_culture', 'nothingness_name', 'nothingness_culture',
+           'paradox_level', 'relation_type', 'strength', 'logical_necessity')
+
+
+class AnalyzeParadoxesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'paradox.db'))
+        populate_paradox_data(self.db, 400, concepts_per_table=40, seed=5)
+
+    def test_matches_legacy_query(self):
+        with self.db.get_connection() as conn:
+            legacy = sorted(tuple(row) for row in conn.execute(LEGACY_PARADOX_SQL))
+        rows = self.db.analyze_paradoxes()
+        self.assertTrue(rows)
+        self.assertEqual(sorted(tuple(row[column] for column in COLUMNS) for row in rows), legacy)
+        self.assertEqual(len({row['relation_id'] for row in rows}), len(rows))
+
+    def test_pages_concatenate_to_full_result(self):
+        full = self.db.analyze_paradoxes(min_paradox_level=5)
+        pages = []
+        for offset in range(0, len(full) + 7, 7):
+            pages.extend(self.db.analyze_paradoxes(min_paradox_level=5, limit=7, offset=offset))
+        self.assertEqual(pages, full)
+        self.assertEqual(list(self.db.iter_paradoxes(min_paradox_level=5)), full)
+
+    def test_invalid_tables_are_rejected(self):
+        for tables in (('existence_concepts', 'existence_concepts'),
+                       ('no_such_table', 'nothingness_concepts'),
+                       ('nothingness_concepts', 'existence_concepts')):
+            with self.subTest(tables=tables):
+                with self.assertRaises(ValueError):
+                    self.db.analyze_paradoxes(concept_table=tables[0], paradox_table=tables[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
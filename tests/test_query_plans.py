@@ -0,0 +1,87 @@
+"""組み込みクエリの実行計画（concept_relations を全件走査しないこと）のテスト"""
+
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+import metaphysics_python
+from metaphysics_benchmark import generate_synthetic_data
+from metaphysics_python import PLAN_CHECKED_METHODS, MetaphysicsDB
+
+
+class ScanningDB(MetaphysicsDB):
+    """concept_relations の索引全体をたどるクエリを持つ検査用のクラス"""
+
+    def scan_relations(self):
+        with self.get_connection() as conn:
+            return conn.execute("SELECT source_table FROM concept_relations rel").fetchall()
+
+
+class QueryPlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def open_db(self, name, cls=MetaphysicsDB):
+        return cls(os.path.join(self.tmp.name, name))
+
+    def assert_no_relation_scan(self, db):
+        plans = db.explain_builtin_queries()
+        self.assertEqual(set(plans), set(PLAN_CHECKED_METHODS))
+        for method_name, queries in plans.items():
+            for query in queries:
+                names = {'concept_relations'} | set(re.findall(
+                    r'\bconcept_relations\s+(?!INDEXED\b|WHERE\b|JOIN\b|ORDER\b|LIMIT\b)(\w+)',
+                    query['sql']))
+                for detail in query['plan']:
+                    words = detail.split()
+                    with self.subTest(method=method_name, detail=detail):
+                        # 索引を使っていても SCAN は全件をたどる
+                        self.assertFalse(words[0] == 'SCAN' and words[1] in names,
+                                         f"{method_name}: {detail}")
+        self.assertEqual(db.check_query_plans(), {})
+
+    def test_sample_data_plans_search_relations(self):
+        db = self.open_db('sample.db')
+        db.insert_sample_data()
+        self.assert_no_relation_scan(db)
+
+    def test_skewed_data_plans_search_relations_after_analyze(self):
+        db = self.open_db('synthetic.db')
+        generate_synthetic_data(db, concepts=200, relations=5000,
+                                contradictions=100, interpretations=100)
+        with db.get_connection() as conn:
+            conn.execute("ANALYZE")
+            conn.commit()
+        self.assert_no_relation_scan(db)
+
+    def test_full_index_scan_is_reported(self):
+        db = self.open_db('scan.db', ScanningDB)
+        db.insert_sample_data()
+        with mock.patch.object(metaphysics_python, 'PLAN_CHECKED_METHODS', ('scan_relations',)):
+            violations = db.check_query_plans()
+        self.assertEqual(list(violations), ['scan_relations'])
+        self.assertTrue(violations['scan_relations'][0].startswith('SCAN rel USING COVERING INDEX'))
+
+    def test_strongest_relations_fill_with_null_strength_last(self):
+        db = self.open_db('strength.db')
+        db.insert_sample_data()
+        with db.get_connection() as conn:
+            strengths = [row[0] for row in conn.execute("SELECT strength FROM concept_relations")]
+            conn.executemany("""
+                INSERT INTO concept_relations
+                    (source_table, source_id, target_table, target_id, relation_type, strength)
+                VALUES ('existence_concepts', 1, 'dao_concepts', 1, ?, NULL)
+            """, [(f'test_{i}',) for i in range(10)])
+            conn.commit()
+        strongest = [row['strength'] for row in db.concept_network_analysis()['strongest_relations']]
+        self.assertEqual(len(strongest), 10)
+        self.assertEqual(strongest[:len(strengths)], sorted(strengths, reverse=True))
+        self.assertEqual(strongest[len(strengths):], [None] * (10 - len(strengths)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""concept_relations の集計表をトリガーで増分更新した結果が全件集計と一致することのテスト"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from metaphysics_python import CONCEPT_TABLES, MetaphysicsDB
+
+
+SUMMARY_TABLES = {
+    'relation_table_stats': 'source_table',
+    'relation_culture_stats': 'cultural_specificity',
+    'concept_degree': 'concept_table, concept_id',
+}
+
+
+class RelationSummaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'summary.db'))
+        self.db.insert_sample_data()
+
+    def summaries(self):
+        """集計表の内容（浮動小数の合計は丸めて比べる）"""
+        with self.db.get_connection() as conn:
+            return {table: [tuple(round(value, 9) if isinstance(value, float) else value
+                                  for value in row)
+                            for row in conn.execute(f"SELECT * FROM {table} ORDER BY {order}")]
+                    for table, order in SUMMARY_TABLES.items()}
+
+    def assert_matches_rebuild(self):
+        incremental = self.summaries()
+        self.db.rebuild_relation_summaries()
+        self.assertEqual(incremental, self.summaries())
+
+    def test_random_changes_match_full_aggregation(self):
+        rng = random.Random(7)
+        cultures = ['universal', 'western', 'eastern', None]
+        with self.db.get_connection() as conn:
+            for step in range(300):
+                ids = [row[0] for row in conn.execute("SELECT id FROM concept_relations")]
+                action = rng.random()
+                if action < 0.5 or not ids:
+                    conn.execute("""
+                        INSERT OR IGNORE INTO concept_relations
+                            (source_table, source_id, target_table, target_id, relation_type,
+                             strength, cultural_specificity)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, (rng.choice(CONCEPT_TABLES), rng.randint(1, 3), rng.choice(CONCEPT_TABLES),
+                          rng.randint(1, 3), rng.choice(['creates', 'opposes', 'contains']),
+                          rng.choice([None, rng.random()]), rng.choice(cultures)))
+                elif action < 0.8:
+                    conn.execute("""
+                        UPDATE OR IGNORE concept_relations
+                        SET strength = ?, cultural_specificity = ?, target_id = ?
+                        WHERE id = ?
+                    """, (rng.choice([None, rng.random()]), rng.choice(cultures),
+                          rng.randint(1, 3), rng.choice(ids)))
+                else:
+                    conn.execute("DELETE FROM concept_relations WHERE id = ?", (rng.choice(ids),))
+            conn.commit()
+        self.assert_matches_rebuild()
+
+    def test_rows_are_removed_when_counts_reach_zero(self):
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM concept_relations")
+            conn.commit()
+        self.assertEqual(self.summaries(), {table: [] for table in SUMMARY_TABLES})
+
+    def test_bulk_import_refills_summaries(self):
+        path = os.path.join(self.tmp.name, 'export.json')
+        self.db.export_to_json(path)
+        target = MetaphysicsDB(os.path.join(self.tmp.name, 'target.db'))
+        target.bulk_import(path)
+        expected = self.summaries()
+        self.db = target
+        self.assertEqual(self.summaries(), expected)
+        self.assert_matches_rebuild()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""snapshot（オンラインバックアップ）と ReplicatedMetaphysicsDB の複製の更新のテスト"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from metaphysics_python import DATA_TABLES, MetaphysicsDB, ReplicatedMetaphysicsDB
+
+
+def contents(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+                for table in DATA_TABLES}
+    finally:
+        conn.close()
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'primary.db')
+        self.db = MetaphysicsDB(self.path, pooled=True)
+        self.addCleanup(self.db.close)
+        self.db.insert_sample_data()
+
+    def test_snapshot_copies_database_in_steps(self):
+        dest = os.path.join(self.tmp.name, 'copy.db')
+        steps = []
+        pages = self.db.snapshot(dest, pages=2, progress=lambda remaining, total: steps.append(remaining))
+        self.assertGreater(pages, 0)
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(steps[-1], 0)
+        self.assertEqual(contents(dest), contents(self.path))
+        self.assertEqual(MetaphysicsDB(dest).search('存在'), self.db.search('存在'))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.db.snapshot(os.path.join(self.tmp.name, 'x.db'), pages=0)
+        with self.assertRaises(ValueError):
+            self.db.snapshot(os.path.join(self.tmp.name, 'x.db'), sleep=-1)
+
+
+class ReplicaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'primary.db')
+        MetaphysicsDB(self.path).insert_sample_data()
+
+    def open(self, replica):
+        db = ReplicatedMetaphysicsDB(self.path, replica=replica, refresh_interval=None,
+                                     pooled=True)
+        self.addCleanup(db.close)
+        return db
+
+    def hub_count(self, db):
+        return sum(row['connection_count'] for row in db.concept_network_analysis()['hub_tables'])
+
+    def test_refresh_sees_new_writes(self):
+        for replica in (':memory:', os.path.join(self.tmp.name, 'replica.db')):
+            with self.subTest(replica=replica):
+                db = self.open(replica)
+                before = self.hub_count(db)
+                # 書き込みは primary へ送られ、複製は更新するまで前の内容を読む
+                db.add_custom_concept('concept_relations', source_table='dao_concepts',
+                                      source_id=1, target_table='time_concepts', target_id=1,
+                                      relation_type=f'replica_{len(replica)}')
+                self.assertEqual(self.hub_count(db.primary), before + 1)
+                self.assertEqual(self.hub_count(db), before)
+                self.assertTrue(db.refresh_replica())
+                self.assertEqual(self.hub_count(db), before + 1)
+                # コミットがなければ作り直さない
+                self.assertFalse(db.refresh_replica())
+
+    def test_stream_holds_replica_during_refresh(self):
+        db = self.open(':memory:')
+        rows = db.iter_relations(batch_size=1)
+        first = next(rows)
+        db.add_custom_concept('concept_relations', source_table='dao_concepts', source_id=1,
+                              target_table='time_concepts', target_id=1, relation_type='streamed')
+        self.assertTrue(db.refresh_replica())
+        # 差し替え前の複製を最後まで読み切れる
+        remaining = list(rows)
+        self.assertEqual(len(remaining) + 1, len(list(db.primary.iter_relations())) - 1)
+        self.assertNotIn('streamed', [row['relation_type'] for row in [first] + remaining])
+        self.assertIn('streamed', [row['relation_type'] for row in db.iter_relations()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""分析結果のキャッシュと PRAGMA data_version による無効化のテスト"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'cache.db')
+        self.db = MetaphysicsDB(self.path, result_cache_size=16)
+        self.addCleanup(self.db.close)
+        self.db.insert_sample_data()
+
+    def relation_count(self):
+        return sum(row['connection_count']
+                   for row in self.db.concept_network_analysis()['hub_tables'])
+
+    def test_repeated_call_is_served_from_cache(self):
+        first = self.relation_count()
+        before = self.db.cache_stats()
+        self.assertEqual(self.relation_count(), first)
+        after = self.db.cache_stats()
+        self.assertEqual(after['hits'], before['hits'] + 1)
+        self.assertEqual(after['misses'], before['misses'])
+
+    def test_cached_value_is_copied(self):
+        self.db.concept_network_analysis()['hub_tables'].clear()
+        self.assertTrue(self.db.concept_network_analysis()['hub_tables'])
+
+    def test_own_write_invalidates_cache(self):
+        count = self.relation_count()
+        self.db.add_custom_concept('concept_relations', source_table='existence_concepts',
+                                   source_id=1, target_table='dao_concepts', target_id=1,
+                                   relation_type='test_own')
+        self.assertEqual(self.relation_count(), count + 1)
+
+    def test_commit_from_other_connection_invalidates_cache(self):
+        count = self.relation_count()
+        invalidations = self.db.cache_stats()['invalidations']
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("""
+                INSERT INTO concept_relations
+                    (source_table, source_id, target_table, target_id, relation_type)
+                VALUES ('existence_concepts', 1, 'dao_concepts', 1, 'test_external')
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+        self.assertEqual(self.relation_count(), count + 1)
+        self.assertGreater(self.db.cache_stats()['invalidations'], invalidations)
+
+    def test_uncommitted_change_from_other_connection_keeps_cache(self):
+        self.relation_count()
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("DELETE FROM concept_relations")
+            hits = self.db.cache_stats()['hits']
+            self.relation_count()
+            self.assertEqual(self.db.cache_stats()['hits'], hits + 1)
+        finally:
+            conn.rollback()
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""PRAGMA user_version によるスキーマの版の記録と、旧版のデータベースの移行のテスト"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from metaphysics_python import INDEX_DEFINITIONS, NATURAL_KEYS, SCHEMA_VERSION, MetaphysicsDB
+
+BASELINE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'metaphysics.db')
+
+
+class SchemaVersionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'baseline.db')
+        shutil.copyfile(BASELINE_DB, self.path)
+
+    def fetch(self, sql):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_baseline_database_is_upgraded(self):
+        self.assertEqual(self.fetch("PRAGMA user_version"), [(0,)])
+        counts = self.fetch("SELECT (SELECT COUNT(*) FROM existence_concepts),"
+                            " (SELECT COUNT(*) FROM concept_relations)")
+        db = MetaphysicsDB(self.path)
+        self.assertEqual(self.fetch("PRAGMA user_version"), [(SCHEMA_VERSION,)])
+        self.assertEqual(self.fetch("SELECT (SELECT COUNT(*) FROM existence_concepts),"
+                                    " (SELECT COUNT(*) FROM concept_relations)"), counts)
+        names = {name for name, in self.fetch("SELECT name FROM sqlite_master")}
+        self.assertTrue(set(INDEX_DEFINITIONS) <= names)
+        self.assertTrue({f"idx_{table}_natural_key" for table in NATURAL_KEYS} <= names)
+        self.assertIn('concept_registry', names)
+        # 移行後の概念台帳とトリガーが既存の行にも効いている
+        self.assertTrue(db.search('存在'))
+
+    def test_current_version_skips_setup(self):
+        MetaphysicsDB(self.path)
+        with mock.patch.object(MetaphysicsDB, 'setup_database') as setup:
+            MetaphysicsDB(self.path)
+        setup.assert_not_called()
+
+    def test_newer_schema_is_rejected(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        conn.close()
+        with self.assertRaises(ValueError):
+            MetaphysicsDB(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
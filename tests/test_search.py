@@ -0,0 +1,72 @@
+"""search の全文検索（3文字未満の語の n-gram 副索引を含む）のテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_python import MetaphysicsDB
+
+
+class ShortQuerySearchTest(unittest.TestCase):
+    """trigram 索引で引けない1・2文字の語も BM25 で順位付けして返す"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'search.db'))
+        self.db.insert_sample_data()
+
+    def names(self, query, **kwargs):
+        return [(row['source_table'], row['name']) for row in self.db.search(query, **kwargs)]
+
+    def test_single_character_query_is_ranked(self):
+        results = self.db.search('空')
+        self.assertGreaterEqual(len(results), 2)
+        self.assertTrue(all(row['score'] is not None for row in results))
+        self.assertEqual([row['score'] for row in results], sorted(row['score'] for row in results))
+        # 名前に一致する概念が定義だけに含む概念より上に来る
+        self.assertEqual(results[0]['name'], '空')
+        self.assertIn('【空】', results[0]['snippet'])
+
+    def test_two_character_query_matches_bigram_only(self):
+        # 「存」と「在」を離れて含むだけの概念は一致しない
+        self.db.add_custom_concept('existence_concepts', name='在り方',
+                                   cultural_context='japanese', definition='在ることと存すること')
+        results = self.db.search('存在')
+        self.assertEqual(results[0]['name'], '存在')
+        self.assertTrue(all('存在' in (row['snippet'] or '') for row in results))
+        self.assertNotIn('在り方', [row['name'] for row in results])
+
+    def test_short_query_respects_tables(self):
+        self.assertEqual(self.names('空', tables=['time_concepts']), [('time_concepts', '時空')])
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        concept_id = self.db.add_custom_concept(
+            'dao_concepts', name='玄', cultural_context='daoist', definition='玄之又玄')
+        self.assertIn(('dao_concepts', '玄'), self.names('玄'))
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE dao_concepts SET name = '妙', definition = '衆妙之門' WHERE id = ?",
+                         (concept_id,))
+            conn.commit()
+        self.assertNotIn(('dao_concepts', '玄'), self.names('玄'))
+        self.assertIn(('dao_concepts', '妙'), self.names('妙'))
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM dao_concepts WHERE id = ?", (concept_id,))
+            conn.commit()
+        self.assertEqual(self.names('妙'), [])
+
+    def test_bulk_import_rebuilds_index(self):
+        path = os.path.join(self.tmp.name, 'export.ndjson')
+        self.db.export_to_json(path, format='ndjson')
+        target = MetaphysicsDB(os.path.join(self.tmp.name, 'target.db'))
+        target.bulk_import(path)
+        self.assertEqual([row['name'] for row in target.search('空')],
+                         [row['name'] for row in self.db.search('空')])
+
+    def test_symbol_only_query_falls_back_to_scan(self):
+        self.db.add_custom_concept('good_concepts', name='善%', cultural_context='western')
+        self.assertEqual(self.names('%'), [('good_concepts', '善%')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""類似検索索引（enable_similarity_index / similar_concepts）のテスト"""
+
+import os
+import tempfile
+import unittest
+
+from metaphysics_benchmark import generate_synthetic_data
+from metaphysics_python import MetaphysicsDB
+
+DEFINITION = '縁起によって生じ、自性を持たずに移ろう現象の在り方'
+
+
+class SimilarConceptsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = MetaphysicsDB(os.path.join(self.tmp.name, 'similarity.db'))
+        self.db.insert_sample_data()
+        generate_synthetic_data(self.db, concepts=40, relations=300, contradictions=1,
+                                interpretations=1, seed=6)
+        self.db.enable_similarity_index()
+
+    def add(self, name, culture, definition=DEFINITION):
+        return self.db.add_custom_concept('nothingness_concepts', name=name,
+                                          cultural_context=culture, definition=definition,
+                                          paradox_level=9)
+
+    def keys(self, results):
+        return [(row['concept_table'], row['concept_id']) for row in results]
+
+    def test_exact_duplicate_is_nearest_after_insert(self):
+        base = self.add('空性', 'buddhist')
+        duplicate = self.add('Emptiness', 'western')
+        self.assertGreater(self.db.update_similarity_index(), 0)
+        self.assertEqual(self.db.update_similarity_index(), 0)
+        for exact in (False, True):
+            with self.subTest(exact=exact):
+                results = self.db.similar_concepts('nothingness_concepts', base, top_k=5, exact=exact)
+                self.assertEqual(self.keys(results)[0], ('nothingness_concepts', duplicate))
+                self.assertAlmostEqual(results[0]['similarity'], 1.0, places=5)
+                self.assertEqual(results[0]['name'], 'Emptiness')
+                self.assertNotIn(('nothingness_concepts', base), self.keys(results))
+
+    def test_approximate_search_agrees_with_exact_top_result(self):
+        base = self.add('空性', 'buddhist')
+        self.add('空の教え', 'buddhist', DEFINITION + 'として説かれる')
+        approximate = self.db.similar_concepts('nothingness_concepts', base, top_k=3)
+        exact = self.db.similar_concepts('nothingness_concepts', base, top_k=3, exact=True)
+        self.assertEqual(self.keys(approximate)[0], self.keys(exact)[0])
+        scores = [row['similarity'] for row in exact]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_filters(self):
+        base = self.add('空性', 'buddhist')
+        same_culture = self.add('空の相', 'buddhist')
+        other = self.add('Śūnyatā', 'hindu')
+        results = self.db.similar_concepts('nothingness_concepts', base, top_k=5,
+                                           other_cultures=True, exact=True)
+        self.assertNotIn(('nothingness_concepts', same_culture), self.keys(results))
+        self.assertEqual(self.keys(results)[0], ('nothingness_concepts', other))
+        limited = self.db.similar_concepts('nothingness_concepts', base, tables=['dao_concepts'],
+                                           exact=True)
+        self.assertEqual({table for table, _ in self.keys(limited)}, {'dao_concepts'})
+        with self.assertRaises(ValueError):
+            self.db.similar_concepts('no_such_table', 1)
+
+
+if __name__ == '__main__':
+    unittest.main()